@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Lifecycle Scoring Benchmark
+============================
+Compares the legacy iterrows scorer (the original body of
+`generate_lifecycle`) with the vectorized `score_lifecycle` on a
+synthetic dim_customer, and checks both agree on every deterministic
+column (tenure, cohort, lifecycle stage). The random columns come from
+different generators and are compared by their ranges only.
+
+Usage:
+    python benchmarks/bench_lifecycle.py                       # 1M customers, legacy on 100k
+    python benchmarks/bench_lifecycle.py --customers 5000000 --legacy-customers 50000
+    python benchmarks/bench_lifecycle.py --spark               # also time the mapInPandas job
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+DATA_GEN_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'data_generation')
+PIPELINES_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines')
+sys.path.insert(0, DATA_GEN_DIR)
+
+from generate_lifecycle import (  # noqa: E402
+    LIFECYCLE_SCHEMA, lifecycle_map_in_pandas, score_lifecycle,
+)
+
+STATUSES = ['Active', 'Active', 'Active', 'Active', 'Inactive', 'Churned', 'New']
+DETERMINISTIC_COLUMNS = ['customer_uid', 'cohort_month', 'cohort_quarter', 'tenure_days',
+                         'tenure_months', 'lifecycle_stage']
+
+
+def make_customers(n: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic dim_customer with the columns the lifecycle scorer reads."""
+    rng = np.random.default_rng(seed)
+    created = np.datetime64('2018-01-01') + rng.integers(0, 2900, n)
+    last_activity = np.minimum(created + rng.integers(0, 2900, n), np.datetime64('2026-01-31'))
+    return pd.DataFrame({
+        'customer_uid': [f'CUST-{i:012d}' for i in range(n)],
+        'status': np.array(STATUSES)[rng.integers(0, len(STATUSES), n)],
+        'created_date': np.datetime_as_string(created, unit='D'),
+        'last_activity_date': np.datetime_as_string(last_activity, unit='D'),
+        'lifetime_value': np.round(rng.uniform(1000, 250000, n), 2),
+    })
+
+
+def legacy_lifecycle(customers_df: pd.DataFrame) -> pd.DataFrame:
+    """The original row-at-a-time scorer, kept verbatim as the baseline."""
+    records = []
+    ref_date = datetime(2026, 2, 1)
+
+    for _, c in customers_df.iterrows():
+        created = datetime.strptime(c['created_date'], '%Y-%m-%d')
+        last_activity = datetime.strptime(c['last_activity_date'], '%Y-%m-%d')
+        tenure_days = (ref_date - created).days
+        tenure_months = tenure_days // 30
+        days_since_activity = (ref_date - last_activity).days
+
+        if c['status'] == 'Churned':
+            stage = 'Churned'
+            churn_risk = 1.0
+        elif c['status'] == 'New':
+            stage = 'Onboarding' if tenure_months < 3 else 'Activated'
+            churn_risk = round(random.uniform(0.05, 0.25), 3)
+        elif days_since_activity > 90:
+            stage = 'Dormant'
+            churn_risk = round(random.uniform(0.60, 0.95), 3)
+        elif days_since_activity > 45:
+            stage = 'At-Risk'
+            churn_risk = round(random.uniform(0.30, 0.65), 3)
+        elif tenure_months > 24:
+            stage = 'Champion'
+            churn_risk = round(random.uniform(0.01, 0.10), 3)
+        elif tenure_months > 12:
+            stage = 'Loyal'
+            churn_risk = round(random.uniform(0.05, 0.20), 3)
+        else:
+            stage = 'Growing'
+            churn_risk = round(random.uniform(0.10, 0.35), 3)
+
+        total_orders = random.randint(1, 30) if c['status'] != 'Churned' else random.randint(1, 5)
+        repeat_orders = max(0, total_orders - 1)
+
+        first_order = created + timedelta(days=random.randint(1, min(90, tenure_days)))
+        last_order = last_activity - timedelta(days=random.randint(0, 60))
+        if last_order < first_order:
+            last_order = first_order
+
+        health_score = round(100 - (churn_risk * 100) + random.uniform(-5, 5), 1)
+        health_score = max(0, min(100, health_score))
+
+        records.append({
+            'customer_uid': c['customer_uid'],
+            'cohort_month': created.strftime('%Y-%m'),
+            'cohort_quarter': f"Q{(created.month - 1) // 3 + 1} {created.year}",
+            'tenure_days': tenure_days,
+            'tenure_months': tenure_months,
+            'lifecycle_stage': stage,
+            'churn_risk_score': churn_risk,
+            'churn_risk_tier': 'High' if churn_risk >= 0.5 else 'Medium' if churn_risk >= 0.2 else 'Low',
+            'total_orders': total_orders,
+            'repeat_orders': repeat_orders,
+            'is_repeat_customer': repeat_orders > 0,
+            'first_order_date': first_order.strftime('%Y-%m-%d'),
+            'last_order_date': last_order.strftime('%Y-%m-%d'),
+            'days_since_last_order': (ref_date - last_order).days,
+            'avg_order_frequency_days': round(tenure_days / max(total_orders, 1), 1),
+            'predicted_ltv_12mo': round(c['lifetime_value'] * random.uniform(0.8, 1.4), 2),
+            'nps_score': random.choice([None] + list(range(0, 11))),
+            'health_score': health_score,
+        })
+    return pd.DataFrame(records)
+
+
+def check_agreement(legacy: pd.DataFrame, vectorized: pd.DataFrame):
+    """Deterministic columns must match exactly; random ones stay in the legacy ranges."""
+    for column in DETERMINISTIC_COLUMNS:
+        mismatches = int((legacy[column].astype(str).to_numpy()
+                          != vectorized[column].astype(str).to_numpy()).sum())
+        if mismatches:
+            raise AssertionError(f'{column}: {mismatches:,} rows differ from the legacy scorer')
+    for column in ['churn_risk_score', 'total_orders', 'health_score']:
+        lo, hi = legacy[column].min(), legacy[column].max()
+        if vectorized[column].min() < lo - 1 or vectorized[column].max() > hi + 1:
+            raise AssertionError(f'{column}: range {vectorized[column].min()}..{vectorized[column].max()} '
+                                 f'outside legacy {lo}..{hi}')
+    if (vectorized['last_order_date'] < vectorized['first_order_date']).any():
+        raise AssertionError('last_order_date before first_order_date')
+
+
+def bench_pandas(customers: pd.DataFrame, legacy_rows: int) -> dict:
+    sample = customers.head(legacy_rows)
+
+    random.seed(42)
+    t0 = time.perf_counter()
+    legacy = legacy_lifecycle(sample)
+    legacy_s = time.perf_counter() - t0
+
+    check_agreement(legacy, score_lifecycle(sample, np.random.default_rng(42)))
+
+    t0 = time.perf_counter()
+    score_lifecycle(customers, np.random.default_rng(42))
+    vec_s = time.perf_counter() - t0
+
+    legacy_rate = len(sample) / legacy_s
+    vec_rate = len(customers) / vec_s
+    return {
+        'legacy_rows_per_s': legacy_rate,
+        'vectorized_rows_per_s': vec_rate,
+        'speedup': vec_rate / legacy_rate,
+    }
+
+
+def bench_spark(customers: pd.DataFrame) -> dict:
+    sys.path.insert(0, PIPELINES_DIR)
+    from spark_session import get_spark
+
+    # Same tuned local session as the pipeline benchmarks (Arrow enabled in BASE_CONFIG)
+    spark = get_spark('bench-lifecycle', local=True)
+    spark.sparkContext.addPyFile(os.path.join(DATA_GEN_DIR, 'generate_lifecycle.py'))
+    df = spark.createDataFrame(customers).cache()
+    df.count()
+
+    scored = df.mapInPandas(lifecycle_map_in_pandas(), LIFECYCLE_SCHEMA)
+    scored.groupBy('lifecycle_stage').count().collect()  # warm-up: Python worker start
+    t0 = time.perf_counter()
+    scored.groupBy('lifecycle_stage').count().collect()
+    spark_s = time.perf_counter() - t0
+    return {'spark_map_in_pandas_rows_per_s': len(customers) / spark_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--legacy-customers', type=int, default=100_000,
+                        help='Rows for the (slow) iterrows baseline; rates are compared per row')
+    parser.add_argument('--spark', action='store_true', help='Also benchmark the mapInPandas Gold job')
+    args = parser.parse_args()
+
+    print(f'Building {args.customers:,} synthetic customers...')
+    customers = make_customers(args.customers)
+
+    results = bench_pandas(customers, min(args.legacy_customers, args.customers))
+    if args.spark:
+        results.update(bench_spark(customers))
+
+    print('=' * 60)
+    for k, v in results.items():
+        print(f'  {k:<44} {v:>12,.1f}')
+    print('=' * 60)
+
+
+if __name__ == '__main__':
+    main()
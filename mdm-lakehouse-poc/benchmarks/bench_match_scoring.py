@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Match Scoring Benchmark
+========================
+Compares the legacy row-at-a-time scorer (the body of the original
+`composite_match_score` UDF) with the vectorized NumPy engine on a
+synthetic set of candidate pairs, and checks both produce the same scores.
+
+Usage:
+    python benchmarks/bench_match_scoring.py                 # 1M pairs, pandas only
+    python benchmarks/bench_match_scoring.py --pairs 200000
+    python benchmarks/bench_match_scoring.py --spark         # also time all Spark scoring modes
+
+The pandas comparison understates the real gain: in Spark the legacy UDF
+additionally pays one JVM↔Python round trip per row, while the pandas_udf
+ships Arrow batches and the spark_sql mode never leaves the JVM.
+
+With --spark, each mode also reports executor run/CPU time from the
+Spark status REST API. Note executor CPU covers JVM threads only; Python
+worker CPU shows up as run time the executor spends waiting on Python.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+PIPELINES_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines')
+sys.path.insert(0, PIPELINES_DIR)
+
+from match_scoring import (  # noqa: E402
+    composite_match_score, composite_match_score_row, MATCH_COLUMNS,
+)
+
+STREETS = ['MAIN ST', 'OAK AVE', 'PARK BLVD', 'MARKET ST', 'HIGH ST', 'ELM RD']
+
+
+def _typo(values: np.ndarray, rng: np.random.Generator, rate: float) -> np.ndarray:
+    """Swap two adjacent characters in a fraction of the strings."""
+    out = values.copy()
+    for i in np.flatnonzero(rng.random(len(values)) < rate):
+        s = out[i]
+        if len(s) > 3:
+            k = rng.integers(0, len(s) - 1)
+            out[i] = s[:k] + s[k + 1] + s[k] + s[k + 2:]
+    return out
+
+
+def make_pairs(n_pairs: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic blocked pairs shaped like Silver customer_master rows."""
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(1, max(n_pairs // 4, 10), size=n_pairs)
+    names = np.array([f'CUSTOMER {i}' for i in ids], dtype=object)
+    emails = np.array([f'contact_{i}@company{i}.com' for i in ids], dtype=object)
+    phones = np.array([f'1{rng.integers(2000000000, 9999999999)}' for _ in ids], dtype=object)
+    streets = np.array([f'{i % 900 + 1} {STREETS[i % len(STREETS)]}' for i in ids], dtype=object)
+
+    same_email = rng.random(n_pairs) < 0.5
+    same_phone = rng.random(n_pairs) < 0.4
+    return pd.DataFrame({
+        'norm_name_a': names,
+        'norm_name_b': _typo(names, rng, 0.3),
+        'norm_email_a': emails,
+        'norm_email_b': np.where(same_email, emails, 'other@example.com'),
+        'norm_phone_a': phones,
+        'norm_phone_b': np.where(same_phone, phones, '15550000000'),
+        'street_address_a': streets,
+        'street_address_b': _typo(streets, rng, 0.2),
+    })
+
+
+def bench_pandas(pairs: pd.DataFrame) -> dict:
+    args = [pairs[f'{c}_{side}'] for c in MATCH_COLUMNS for side in ('a', 'b')]
+
+    t0 = time.perf_counter()
+    row_scores = np.fromiter(
+        (composite_match_score_row(*row) for row in zip(*args)),
+        dtype=np.float64, count=len(pairs),
+    )
+    row_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vec_scores = composite_match_score(*args)
+    vec_s = time.perf_counter() - t0
+
+    return {
+        'row_at_a_time_s': row_s,
+        'vectorized_s': vec_s,
+        'speedup': row_s / vec_s,
+        'max_abs_diff': float(np.abs(row_scores - vec_scores).max()),
+    }
+
+
+def _stage_metrics(spark, job_group: str) -> dict:
+    """Sum executor run/CPU time over the stages of one job group."""
+    sc = spark.sparkContext
+    stage_ids = [s for j in sc.statusTracker().getJobIdsForGroup(job_group)
+                 for s in sc.statusTracker().getJobInfo(j).stageIds]
+    url = f'{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/stages'
+    with urllib.request.urlopen(url) as resp:
+        stages = [s for s in json.load(resp) if s['stageId'] in stage_ids]
+    return {
+        'executor_run_s': sum(s['executorRunTime'] for s in stages) / 1e3,
+        'executor_cpu_s': sum(s['executorCpuTime'] for s in stages) / 1e9,
+    }
+
+
+def bench_spark(pairs: pd.DataFrame) -> dict:
+    from pyspark.sql import SparkSession
+    from pyspark.sql.functions import col, udf, sum as sum_
+    from pyspark.sql.types import FloatType
+    from match_scoring import composite_match_score_udf
+    from spark_similarity import composite_match_score_sql
+
+    spark = (SparkSession.builder.appName('bench-match-scoring')
+             .config('spark.sql.execution.arrow.pyspark.enabled', 'true')
+             .getOrCreate())
+    # Python workers need the scorer module for the UDF modes
+    spark.sparkContext.addPyFile(os.path.join(PIPELINES_DIR, 'match_scoring.py'))
+    df = spark.createDataFrame(pairs).cache()
+    df.count()
+    names = [f'{c}_{side}' for c in MATCH_COLUMNS for side in ('a', 'b')]
+    args = [col(n) for n in names]
+
+    modes = [
+        ('python_udf', udf(composite_match_score_row, FloatType())(*args)),
+        ('vectorized', composite_match_score_udf()(*args)),
+        ('spark_sql', composite_match_score_sql(*names)),
+        ('spark_sql_levenshtein', composite_match_score_sql(*names, similarity='levenshtein')),
+    ]
+    results = {}
+    for label, score in modes:
+        df.select(sum_(score)).collect()  # warm-up: JIT, Python worker start
+        spark.sparkContext.setJobGroup(label, label)
+        t0 = time.perf_counter()
+        df.select(sum_(score)).collect()
+        results[f'spark_{label}_s'] = time.perf_counter() - t0
+        for metric, value in _stage_metrics(spark, label).items():
+            results[f'spark_{label}_{metric}'] = value
+    for label, _ in modes[1:]:
+        results[f'spark_{label}_speedup'] = results['spark_python_udf_s'] / results[f'spark_{label}_s']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--pairs', type=int, default=1_000_000)
+    parser.add_argument('--spark', action='store_true', help='Also benchmark the Spark scoring modes')
+    args = parser.parse_args()
+
+    print(f'Building {args.pairs:,} synthetic candidate pairs...')
+    pairs = make_pairs(args.pairs)
+
+    results = bench_pandas(pairs)
+    if args.spark:
+        results.update(bench_spark(pairs))
+
+    print('=' * 60)
+    for k, v in results.items():
+        print(f'  {k:<44} {v:>12.4f}')
+    print('=' * 60)
+
+
+if __name__ == '__main__':
+    main()
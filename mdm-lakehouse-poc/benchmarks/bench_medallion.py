@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Medallion Pipeline Benchmark
+==============================
+End-to-end Bronze → Silver → MDM matching → golden records on a local
+lakehouse, at scale factors of the sample Bronze (500 SAP + 400
+Salesforce customers at 1×).
+
+Each scale factor runs local_pipeline.run_local_pipeline in a fresh
+Python + JVM process, so memory peaks and Spark state never leak between
+runs. Per stage it records:
+  - wall time
+  - input / shuffle read / shuffle write bytes (Spark status REST API)
+  - peak execution memory of any Spark stage
+  - pairs scored (matching) and golden records produced
+plus the run's peak driver JVM heap and Python RSS.
+
+Results are appended as one JSON line per scale factor to --output, so
+runs of different commits accumulate in one file for regression checks
+and Glue worker sizing.
+
+Usage:
+    python benchmarks/bench_medallion.py                          # 1×, 10×
+    python benchmarks/bench_medallion.py --scales 1 10 100 1000 --scoring-mode vectorized
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+PIPELINES_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines')
+sys.path.insert(0, PIPELINES_DIR)
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'results', 'bench_medallion.jsonl')
+RESULT_MARKER = 'BENCH_RESULT '
+STAGES = ['bronze', 'silver', 'matching', 'golden']
+STAGE_FIELDS = ['seconds', 'input_bytes', 'shuffle_read_bytes', 'shuffle_write_bytes',
+                'peak_execution_memory_bytes']
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+# ═══════════════════════════════════════
+# Worker (one scale factor, own process)
+# ═══════════════════════════════════════
+
+def run_worker(scale: int, root: str, scoring_mode: str) -> dict:
+    from local_pipeline import run_local_pipeline
+
+    started = time.perf_counter()
+    stages = run_local_pipeline(root, scoring_mode=scoring_mode, scale=scale)
+    total_s = time.perf_counter() - started
+
+    from pyspark.sql import SparkSession
+    from spark_session import jvm_peak_memory
+    jvm = jvm_peak_memory(SparkSession.getActiveSession())
+
+    matching = stages['matching']['result'] or {}
+    result = {
+        'scale': scale,
+        'scoring_mode': scoring_mode,
+        'bronze_rows': sum(stages['bronze']['result'].values()),
+        'total_seconds': round(total_s, 2),
+        'stages': {name: {f: stages[name][f] for f in STAGE_FIELDS} for name in STAGES},
+        'pairs_scored': matching.get('blocking', {}).get('candidate_pairs'),
+        'match_tiers': matching.get('matching', {}).get('tiers'),
+        'golden_records': (stages['golden']['result'] or {}).get('golden_records'),
+        'jvm_peak_heap_bytes': max((e['heap_bytes'] for e in jvm.values()), default=0),
+        # ru_maxrss is KiB on Linux
+        'python_peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+    result['stages']['matching']['pairs_scored'] = result['pairs_scored']
+    return result
+
+
+# ═══════════════════════════════════════
+# Driver
+# ═══════════════════════════════════════
+
+def bench_scale(scale: int, scoring_mode: str, keep_root: str = None) -> dict:
+    """Run one scale factor in a subprocess and return its result record."""
+    with tempfile.TemporaryDirectory(prefix=f'lakehouse_{scale}x_') as tmp:
+        root = os.path.join(keep_root, f'{scale}x') if keep_root else tmp
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker',
+               '--scales', str(scale), '--root', root, '--scoring-mode', scoring_mode]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith(RESULT_MARKER)]
+    if proc.returncode != 0 or not lines:
+        sys.stderr.write(proc.stdout[-4000:] + proc.stderr[-4000:])
+        raise RuntimeError(f'{scale}x run failed (exit {proc.returncode})')
+    return json.loads(lines[-1][len(RESULT_MARKER):])
+
+
+def print_summary(results: list):
+    print('=' * 92)
+    print(f"  {'scale':>6} {'rows':>9} {'stage':<9} {'wall_s':>8} {'shuffle_MB':>11} "
+          f"{'peak_exec_MB':>13} {'pairs':>12}")
+    for r in results:
+        for name in STAGES:
+            s = r['stages'][name]
+            pairs = s.get('pairs_scored')
+            print(f"  {r['scale']:>5}x {r['bronze_rows']:>9,} {name:<9} {s['seconds']:>8.2f} "
+                  f"{s['shuffle_write_bytes'] / 2**20:>11.1f} {s['peak_execution_memory_bytes'] / 2**20:>13.1f} "
+                  f"{f'{pairs:,}' if pairs is not None else '':>12}")
+        print(f"  {'':>6} {'':>9} {'total':<9} {r['total_seconds']:>8.2f}   "
+              f"JVM heap peak {r['jvm_peak_heap_bytes'] / 2**20:,.0f} MB, "
+              f"Python RSS peak {r['python_peak_rss_bytes'] / 2**20:,.0f} MB")
+    print('=' * 92)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                        help='Scale factors of the sample Bronze (1 = 900 customers)')
+    parser.add_argument('--scoring-mode', default='spark_sql',
+                        choices=['vectorized', 'spark_sql', 'spark_sql_levenshtein', 'python_udf'])
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON-lines results file (appended)')
+    parser.add_argument('--keep-root', help='Keep each lakehouse under this directory instead of a temp dir')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--root', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.scales[0], args.root, args.scoring_mode)
+        print(RESULT_MARKER + json.dumps(result, default=str))
+        return
+
+    commit = _git_commit()
+    results = []
+    for scale in args.scales:
+        print(f'Running {scale}x ({args.scoring_mode})...')
+        result = bench_scale(scale, args.scoring_mode, args.keep_root)
+        result.update(commit=commit, recorded_at=datetime.now(timezone.utc).isoformat())
+        results.append(result)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(result, default=str) + '\n')
+
+    print_summary(results)
+    print(f'Results appended to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
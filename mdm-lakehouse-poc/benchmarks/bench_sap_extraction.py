@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+SAP Extraction Benchmark
+=========================
+Compares the legacy single-call extraction (one RFC_READ_TABLE with
+ROWCOUNT=0, every row held as a dict before the DataFrame is built) with
+the chunked, pooled reader in sap_rfc_reader.py, against an in-process
+fake RFC server.
+
+The fake models SAP-side cost as a fixed round-trip latency plus a
+per-row read time (slept, so it overlaps across connections the way a
+real application server does) and builds genuine fixed-width WA rows
+for the client to parse.
+
+Usage:
+    python benchmarks/bench_sap_extraction.py                     # 500k rows
+    python benchmarks/bench_sap_extraction.py --rows 2000000 --pool 8 --chunk 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+PIPELINES_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines')
+sys.path.insert(0, PIPELINES_DIR)
+
+from sap_rfc_reader import (  # noqa: E402
+    RFCConnectionPool, iter_table_chunks, read_table_chunk, write_parquet_chunks,
+)
+
+KNA1_LAYOUT = [('KUNNR', 10), ('NAME1', 35), ('NAME2', 35), ('LAND1', 3), ('ORT01', 35),
+               ('PSTLZ', 10), ('STRAS', 35), ('TELF1', 16), ('SMTP_ADDR', 241), ('KTOKD', 4)]
+COUNTRIES = ['US', 'DE', 'GB', 'FR', 'IN', 'JP', 'BR', 'CA']
+
+
+class FakeRFCServer:
+    """Synthetic KNA1 of `n_rows` rows served through RFC_READ_TABLE semantics."""
+
+    def __init__(self, n_rows: int, latency_s: float = 0.05, row_read_s: float = 2e-6):
+        self.n_rows = n_rows
+        self.latency_s = latency_s
+        self.row_read_s = row_read_s
+        self.calls = 0
+        self._lock = threading.Lock()
+        # Rendered once up front so the client side dominates the measurements
+        self.table = [self._row(i) for i in range(n_rows)]
+
+    @staticmethod
+    def _row(i: int) -> str:
+        values = {
+            'KUNNR': f'{i:010d}', 'NAME1': f'CUSTOMER {i} GMBH', 'NAME2': '',
+            'LAND1': COUNTRIES[i % len(COUNTRIES)], 'ORT01': f'CITY {i % 500}',
+            'PSTLZ': f'{i % 99999:05d}', 'STRAS': f'{i % 900 + 1} MAIN ST',
+            'TELF1': f'+1555{i % 10_000_000:07d}', 'SMTP_ADDR': f'contact_{i}@company{i % 2000}.com',
+            'KTOKD': '0001',
+        }
+        return ''.join(values[name].ljust(length) for name, length in KNA1_LAYOUT)
+
+    def connect(self):
+        return FakeRFCConnection(self)
+
+
+class FakeRFCConnection:
+    def __init__(self, server: FakeRFCServer):
+        self.server = server
+
+    def call(self, function, QUERY_TABLE, FIELDS, ROWSKIPS=0, ROWCOUNT=0, OPTIONS=None):
+        assert function == 'RFC_READ_TABLE' and QUERY_TABLE == 'KNA1'
+        server = self.server
+        with server._lock:
+            server.calls += 1
+        start = min(ROWSKIPS, server.n_rows)
+        stop = server.n_rows if ROWCOUNT == 0 else min(start + ROWCOUNT, server.n_rows)
+        time.sleep(server.latency_s + (stop - start) * server.row_read_s)
+
+        fields, offset = [], 0
+        for name, length in KNA1_LAYOUT:
+            fields.append({'FIELDNAME': name, 'OFFSET': f'{offset:06d}', 'LENGTH': f'{length:06d}'})
+            offset += length
+        return {'FIELDS': fields, 'DATA': [{'WA': wa} for wa in server.table[start:stop]]}
+
+    def close(self):
+        pass
+
+
+def _measure(fn) -> dict:
+    """Time one clean run, then repeat under tracemalloc for peak Python heap."""
+    t0 = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'rows': rows, 'wall_s': elapsed, 'rows_per_s': rows / elapsed, 'peak_mb': peak / 2**20}
+
+
+def bench_legacy(server: FakeRFCServer, fields: list) -> dict:
+    """One ROWCOUNT=0 call, rows as dicts, then a columnar table (≈ createDataFrame)."""
+    import pyarrow as pa
+
+    def run():
+        chunk = read_table_chunk(server.connect(), 'KNA1', fields, 0, 0)
+        rows = [dict(zip(chunk, values)) for values in zip(*chunk.values())]
+        table = pa.Table.from_pylist(rows)
+        return table.num_rows
+    return _measure(run)
+
+
+def bench_chunked(server: FakeRFCServer, fields: list, pool_size: int, chunk_size: int) -> dict:
+    def run():
+        pool = RFCConnectionPool(server.connect, size=pool_size)
+        with tempfile.TemporaryDirectory() as staging:
+            chunks = iter_table_chunks(pool, 'KNA1', fields, chunk_size=chunk_size)
+            return write_parquet_chunks(chunks, staging, fields)['rows']
+    return _measure(run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--pool', type=int, default=4)
+    parser.add_argument('--chunk', type=int, default=50_000)
+    parser.add_argument('--latency', type=float, default=0.05, help='RFC round-trip latency (s)')
+    args = parser.parse_args()
+
+    fields = [name for name, _ in KNA1_LAYOUT]
+    server = FakeRFCServer(args.rows, latency_s=args.latency)
+
+    print(f'Extracting {args.rows:,} fake KNA1 rows...')
+    legacy = bench_legacy(server, fields)
+    chunked = bench_chunked(server, fields, args.pool, args.chunk)
+    assert legacy['rows'] == chunked['rows'] == args.rows
+
+    print('=' * 60)
+    print(f"  {'':<22} {'legacy':>16} {f'chunked (pool={args.pool})':>18}")
+    for metric in ('wall_s', 'rows_per_s', 'peak_mb'):
+        print(f'  {metric:<22} {legacy[metric]:>16,.2f} {chunked[metric]:>18,.2f}')
+    print(f"  {'speedup':<22} {legacy['wall_s'] / chunked['wall_s']:>35.2f}x")
+    print(f"  {'memory reduction':<22} {legacy['peak_mb'] / chunked['peak_mb']:>35.2f}x")
+    print('=' * 60)
+
+
+if __name__ == '__main__':
+    main()
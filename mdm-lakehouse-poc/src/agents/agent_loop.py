@@ -14,13 +14,48 @@ Architecture:
 This pattern replaces traditional ETL development with autonomous
 code generation — Claude writes production PySpark, dbt, Airflow,
 and Great Expectations code by calling real enterprise data tools.
+
+Tool execution:
+  When one response holds several tool_use blocks, they run
+  concurrently, at most max_tool_workers at a time, each with its
+  own timeout, so an iteration takes as long as its slowest tool instead
+  of the sum. tool_result blocks are returned in the same order as the
+  tool_use blocks, keyed by tool_use_id. max_tool_workers=1 runs them one
+  at a time. A tool that times out gives up its slot, so a hung handler
+  cannot hold back the tools queued behind it.
+
+Context management:
+  The stable prefix (system prompt + tool schemas) and the latest
+  tool results are marked for prompt caching, so each iteration re-reads
+  the history from cache instead of paying for it again. Tool results
+  above MAX_RESULT_CHARS are truncated on arrival. Once the history
+  passes history_token_budget, older tool results are compacted to a
+  short preview. Either way the full payload stays in the Conversation,
+  and Claude can page through it with the recall_tool_result tool.
+  Token usage and the cache hit rate are tracked per iteration in `stats`.
+
+Tool result cache:
+  With a ToolResultCache (tool_cache=...), read-only calls such as
+  profile_data_source, SELECT queries and Delta describe/history are
+  served from local disk, and writes to the same target invalidate them.
+
+Async runtime:
+  run_agent_async is the same loop on the async client, so many agents
+  can share one event loop (see orchestrator.run_dag). Tool calls still
+  run on worker threads, off the event loop. An optional RateLimiter
+  spaces out API requests across all agents sharing it.
 """
 
 import anthropic
+import asyncio
 import json
 import logging
+import queue
+import threading
+import time
 from typing import Optional
 
+from tool_cache import ToolResultCache
 from tool_definitions import ENTERPRISE_DATA_TOOLS
 from tool_handlers import TOOL_HANDLERS
 
@@ -28,6 +63,267 @@ logger = logging.getLogger(__name__)
 
 # Initialize Anthropic client (uses ANTHROPIC_API_KEY env var)
 client = anthropic.Anthropic()
+async_client = anthropic.AsyncAnthropic()
+
+DEFAULT_TOOL_WORKERS = 8
+DEFAULT_TOOL_TIMEOUT_S = 300
+
+# ── Context management ──
+DEFAULT_HISTORY_TOKEN_BUDGET = 60_000   # Estimated history tokens before old results are compacted
+KEEP_RECENT_TOOL_TURNS = 2              # Tool-result turns never compacted
+MAX_RESULT_CHARS = 50_000               # Any single tool result is truncated beyond this
+COMPACT_PREVIEW_CHARS = 800             # Kept from each compacted result
+CHARS_PER_TOKEN = 4                     # Budget estimate; actual counts come from response.usage
+CACHE_CONTROL = {"type": "ephemeral"}
+
+RECALL_TOOL = {
+    "name": "recall_tool_result",
+    "description": "Read a truncated or compacted earlier tool result, by tool_use_id and character offset.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "tool_use_id": {"type": "string"},
+            "offset": {"type": "integer", "default": 0},
+            "length": {"type": "integer", "default": 20000}
+        },
+        "required": ["tool_use_id"]
+    }
+}
+
+
+def _tool_result(block, content: str, is_error: bool = False) -> dict:
+    result = {"type": "tool_result", "tool_use_id": block.id, "content": content}
+    if is_error:
+        result["is_error"] = True
+    return result
+
+
+def execute_tool(block, handlers: Optional[dict] = None) -> dict:
+    """Run one tool_use block through `handlers` (TOOL_HANDLERS) and wrap the outcome as a tool_result."""
+    tool_name = block.name
+    tool_input = block.input
+
+    logger.info(f"  Tool call: {tool_name}({json.dumps(tool_input)[:100]}...)")
+
+    handler = (handlers if handlers is not None else TOOL_HANDLERS).get(tool_name)
+    if not handler:
+        return _tool_result(block, f"ERROR: Unknown tool '{tool_name}'", is_error=True)
+    try:
+        content = json.dumps(handler(**tool_input))
+        logger.info(f"  Tool result: {tool_name} success ({len(content)} chars)")
+        return _tool_result(block, content)
+    except Exception as e:
+        logger.error(f"  Tool error: {tool_name}: {e}")
+        return _tool_result(block, f"ERROR: {str(e)}", is_error=True)
+
+
+def execute_tools(
+    blocks: list,
+    max_workers: int = DEFAULT_TOOL_WORKERS,
+    timeout_s: float = DEFAULT_TOOL_TIMEOUT_S,
+    handlers: Optional[dict] = None,
+) -> tuple:
+    """
+    Run tool_use blocks concurrently, at most `max_workers` at a time.
+
+    Each tool runs on its own daemon thread and gets `timeout_s` from the
+    moment it starts (not from when it was queued). A tool that overruns
+    is reported to Claude as an error result; its thread cannot be
+    interrupted and is left to finish in the background, but it gives up
+    its slot, so queued tools still start and a hung handler cannot
+    stall the iteration.
+
+    Returns:
+        (tool_results in the order of `blocks`,
+         [{"tool", "tool_use_id", "seconds", "status"}] in the same order)
+    """
+    finished = queue.Queue()
+    waiting = list(blocks)
+    running = {}        # tool_use_id → (block, start time)
+    outcomes = {}
+
+    def run(block, started):
+        result = execute_tool(block, handlers)
+        finished.put((block.id, result, time.perf_counter() - started))
+
+    while len(outcomes) < len(blocks):
+        while waiting and len(running) < max(1, max_workers):
+            block = waiting.pop(0)
+            running[block.id] = (block, time.perf_counter())
+            threading.Thread(target=run, args=(block, running[block.id][1]),
+                             name=f"tool-{block.name}", daemon=True).start()
+
+        # Wake up at the earliest deadline among running tools
+        deadline = min(started for _, started in running.values()) + timeout_s
+        try:
+            tool_use_id, result, seconds = finished.get(timeout=max(0.0, deadline - time.perf_counter()))
+            if tool_use_id in running:          # Late results of timed-out tools are dropped
+                del running[tool_use_id]
+                outcomes[tool_use_id] = (result, seconds)
+        except queue.Empty:
+            pass
+
+        now = time.perf_counter()
+        for tool_use_id, (block, started) in list(running.items()):
+            if now - started >= timeout_s:
+                del running[tool_use_id]
+                logger.error(f"  Tool timeout: {block.name} exceeded {timeout_s}s")
+                outcomes[tool_use_id] = (
+                    _tool_result(block, f"ERROR: Tool '{block.name}' timed out after {timeout_s}s",
+                                 is_error=True),
+                    now - started,
+                )
+
+    tool_results, latencies = [], []
+    for block in blocks:
+        result, seconds = outcomes[block.id]
+        tool_results.append(result)
+        latencies.append({
+            "tool": block.name,
+            "tool_use_id": block.id,
+            "seconds": round(seconds, 3),
+            "status": "error" if result.get("is_error") else "success",
+        })
+    return tool_results, latencies
+
+
+class RateLimiter:
+    """Spaces API requests at least 60 / requests_per_minute seconds apart, across coroutines."""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait_s = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait_s > 0:
+            await asyncio.sleep(wait_s)
+
+
+def _to_json(value):
+    return value.model_dump() if hasattr(value, "model_dump") else str(value)
+
+
+class Conversation:
+    """
+    Message history of one agent run: builds cache-marked requests,
+    truncates and compacts tool results, and tracks token usage.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        task: str,
+        tools: list,
+        prompt_caching: bool = True,
+        history_token_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET,
+        stats: Optional[dict] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+    ):
+        self.system_prompt = system_prompt
+        self.tools = tools + [RECALL_TOOL]
+        self.prompt_caching = prompt_caching
+        self.history_token_budget = history_token_budget
+        self.messages = [{"role": "user", "content": task}]
+        self.full_results = {}          # tool_use_id → untruncated content
+        self.tool_cache = tool_cache
+        self.stats = stats if stats is not None else {}
+        for key in ("tools", "iterations"):
+            self.stats.setdefault(key, [])
+        self.stats.setdefault("compactions", 0)
+
+    # ── Requests ──
+    def request(self) -> dict:
+        """system/tools/messages kwargs for messages.create, with cache breakpoints."""
+        if not self.prompt_caching:
+            return {"system": self.system_prompt, "tools": self.tools, "messages": self.messages}
+        # Breakpoints: end of tools + system (stable prefix) and end of the latest tool results
+        messages = list(self.messages)
+        last = messages[-1]
+        if isinstance(last["content"], list) and last["content"]:
+            blocks = list(last["content"])
+            blocks[-1] = dict(blocks[-1], cache_control=CACHE_CONTROL)
+            messages[-1] = dict(last, content=blocks)
+        return {
+            "system": [{"type": "text", "text": self.system_prompt, "cache_control": CACHE_CONTROL}],
+            "tools": self.tools[:-1] + [dict(self.tools[-1], cache_control=CACHE_CONTROL)],
+            "messages": messages,
+        }
+
+    def record_usage(self, response, iteration: int, seconds: float):
+        usage = getattr(response, "usage", None)
+        entry = {
+            "iteration": iteration,
+            "seconds": round(seconds, 3),
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "history_tokens_est": self.estimate_history_tokens(),
+        }
+        self.stats["iterations"].append(entry)
+        totals = {k: sum(i[k] for i in self.stats["iterations"])
+                  for k in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens",
+                            "output_tokens")}
+        prompt = totals["input_tokens"] + totals["cache_creation_input_tokens"] + totals["cache_read_input_tokens"]
+        self.stats["tokens"] = totals
+        self.stats["cache_hit_rate"] = round(totals["cache_read_input_tokens"] / prompt, 3) if prompt else 0.0
+        logger.info(f"  Tokens: {entry['input_tokens']} in, {entry['cache_read_input_tokens']} cache read, "
+                    f"{entry['cache_creation_input_tokens']} cache write, {entry['output_tokens']} out")
+
+    # ── History ──
+    def add_tool_turn(self, assistant_content, tool_results: list, latencies: list, iteration: int):
+        self.messages.append({"role": "assistant", "content": assistant_content})
+        self.messages.append({"role": "user", "content": [self._truncate(r) for r in tool_results]})
+        self.stats["tools"].extend(dict(l, iteration=iteration) for l in latencies)
+        if self.estimate_history_tokens() > self.history_token_budget:
+            self.compact()
+
+    def estimate_history_tokens(self) -> int:
+        return len(json.dumps(self.messages, default=_to_json)) // CHARS_PER_TOKEN
+
+    def _truncate(self, result: dict, limit: int = MAX_RESULT_CHARS) -> dict:
+        content = self.full_results.get(result["tool_use_id"], result["content"])
+        if len(content) <= limit:
+            return result
+        self.full_results[result["tool_use_id"]] = content
+        marker = (f"\n...[truncated: {len(content):,} chars total. Call recall_tool_result with "
+                  f"tool_use_id=\"{result['tool_use_id']}\" and offset={limit} for the rest]")
+        return dict(result, content=content[:limit] + marker)
+
+    def compact(self):
+        """Shrink the tool results of all but the last KEEP_RECENT_TOOL_TURNS turns to a preview."""
+        tool_turns = [m for m in self.messages if m["role"] == "user" and isinstance(m["content"], list)]
+        old_turns = tool_turns[:-KEEP_RECENT_TOOL_TURNS] if KEEP_RECENT_TOOL_TURNS else tool_turns
+        before = self.estimate_history_tokens()
+        for message in old_turns:
+            message["content"] = [self._truncate(r, COMPACT_PREVIEW_CHARS) for r in message["content"]]
+        after = self.estimate_history_tokens()
+        if after < before:
+            self.stats["compactions"] += 1
+            logger.info(f"  Compacted history: ~{before:,} → ~{after:,} tokens")
+
+    def recall(self, tool_use_id: str, offset: int = 0, length: int = 20000) -> dict:
+        """Handler for RECALL_TOOL."""
+        if tool_use_id not in self.full_results:
+            raise KeyError(f"No truncated result for tool_use_id {tool_use_id}")
+        content = self.full_results[tool_use_id]
+        # Cap the page so the recalled text is itself never truncated
+        length = min(length, MAX_RESULT_CHARS // 2)
+        return {"tool_use_id": tool_use_id, "offset": offset, "total_chars": len(content),
+                "content": content[offset:offset + length]}
+
+    def handlers(self) -> dict:
+        handlers = self.tool_cache.wrap(TOOL_HANDLERS) if self.tool_cache is not None else TOOL_HANDLERS
+        return {**handlers, RECALL_TOOL["name"]: self.recall}
+
+
+def _final_text(response) -> str:
+    return "\n".join(b.text for b in response.content if b.type == "text")
 
 
 def run_agent(
@@ -37,6 +333,12 @@ def run_agent(
     model: str = "claude-opus-4-6",
     max_tokens: int = 8192,
     max_iterations: int = 25,
+    max_tool_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_timeout_s: float = DEFAULT_TOOL_TIMEOUT_S,
+    prompt_caching: bool = True,
+    history_token_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET,
+    stats: Optional[dict] = None,
+    tool_cache: Optional[ToolResultCache] = None,
 ) -> str:
     """
     Core agentic loop. Claude decides which tools to call,
@@ -49,76 +351,102 @@ def run_agent(
         model: Claude model to use
         max_tokens: Maximum tokens per API call
         max_iterations: Safety limit on tool-use cycles
+        max_tool_workers: Tool calls of one response run concurrently (1 = one at a time)
+        tool_timeout_s: Per-tool timeout; an overrunning tool becomes an error result
+        prompt_caching: Mark system prompt, tools and latest tool results for caching
+        history_token_budget: Estimated history tokens before old tool results are compacted
+        stats: Optional dict, filled with per-tool latencies ("tools"), per-iteration
+               token usage ("iterations"), totals ("tokens") and "cache_hit_rate"
+        tool_cache: Serve read-only tool calls from this on-disk cache (opt-in)
 
     Returns:
         Final text response from Claude after all tool use is complete
     """
     if tools is None:
         tools = ENTERPRISE_DATA_TOOLS
-
-    messages = [{"role": "user", "content": task}]
+    conversation = Conversation(system_prompt, task, tools, prompt_caching, history_token_budget, stats,
+                                tool_cache)
 
     for iteration in range(max_iterations):
         logger.info(f"Agent iteration {iteration + 1}/{max_iterations}")
 
         # ── Call Claude API ──
-        response = client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system=system_prompt,
-            tools=tools,
-            messages=messages,
-        )
+        t0 = time.perf_counter()
+        response = client.messages.create(model=model, max_tokens=max_tokens, **conversation.request())
+        conversation.record_usage(response, iteration + 1, time.perf_counter() - t0)
 
         # ── Check: is Claude done? ──
         if response.stop_reason == "end_turn":
-            final_texts = [b.text for b in response.content if b.type == "text"]
-            result = "\n".join(final_texts)
             logger.info(f"Agent completed after {iteration + 1} iterations")
-            return result
+            return _final_text(response)
 
         # ── Claude wants to use tools ──
         if response.stop_reason == "tool_use":
-            # Add Claude's response to conversation history
-            messages.append({"role": "assistant", "content": response.content})
-
-            # Execute each tool call
-            tool_results = []
-            for block in response.content:
-                if block.type == "tool_use":
-                    tool_name = block.name
-                    tool_input = block.input
-
-                    logger.info(f"  Tool call: {tool_name}({json.dumps(tool_input)[:100]}...)")
-
-                    handler = TOOL_HANDLERS.get(tool_name)
-                    if handler:
-                        try:
-                            result = handler(**tool_input)
-                            tool_results.append({
-                                "type": "tool_result",
-                                "tool_use_id": block.id,
-                                "content": json.dumps(result),
-                            })
-                            logger.info(f"  Tool result: success ({len(json.dumps(result))} chars)")
-                        except Exception as e:
-                            tool_results.append({
-                                "type": "tool_result",
-                                "tool_use_id": block.id,
-                                "content": f"ERROR: {str(e)}",
-                                "is_error": True,
-                            })
-                            logger.error(f"  Tool error: {e}")
-                    else:
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": block.id,
-                            "content": f"ERROR: Unknown tool '{tool_name}'",
-                            "is_error": True,
-                        })
+            # Execute the tool calls concurrently; results keep tool_use order
+            blocks = [b for b in response.content if b.type == "tool_use"]
+            t0 = time.perf_counter()
+            tool_results, latencies = execute_tools(blocks, max_tool_workers, tool_timeout_s,
+                                                    conversation.handlers())
+            logger.info(f"  {len(blocks)} tool(s) in {time.perf_counter() - t0:.2f}s "
+                        f"(sum of tools {sum(l['seconds'] for l in latencies):.2f}s)")
 
             # Feed results back to Claude
-            messages.append({"role": "user", "content": tool_results})
+            conversation.add_tool_turn(response.content, tool_results, latencies, iteration + 1)
+
+    logger.warning("Max iterations reached")
+    return "Max iterations reached — agent did not complete"
+
+
+async def run_agent_async(
+    system_prompt: str,
+    task: str,
+    tools: Optional[list] = None,
+    model: str = "claude-opus-4-6",
+    max_tokens: int = 8192,
+    max_iterations: int = 25,
+    max_tool_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_timeout_s: float = DEFAULT_TOOL_TIMEOUT_S,
+    prompt_caching: bool = True,
+    history_token_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET,
+    stats: Optional[dict] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    client: Optional[anthropic.AsyncAnthropic] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> str:
+    """
+    run_agent on the async Anthropic client; same arguments and result.
+
+    Args (in addition to run_agent's):
+        client: Async client to use (defaults to the module's async_client)
+        rate_limiter: Shared limiter awaited before every API request
+    """
+    if tools is None:
+        tools = ENTERPRISE_DATA_TOOLS
+    client = client or async_client
+    conversation = Conversation(system_prompt, task, tools, prompt_caching, history_token_budget, stats,
+                                tool_cache)
+
+    for iteration in range(max_iterations):
+        logger.info(f"Agent iteration {iteration + 1}/{max_iterations}")
+
+        # ── Call Claude API ──
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        t0 = time.perf_counter()
+        response = await client.messages.create(model=model, max_tokens=max_tokens, **conversation.request())
+        conversation.record_usage(response, iteration + 1, time.perf_counter() - t0)
+
+        # ── Check: is Claude done? ──
+        if response.stop_reason == "end_turn":
+            logger.info(f"Agent completed after {iteration + 1} iterations")
+            return _final_text(response)
+
+        # ── Claude wants to use tools: run them off the event loop ──
+        if response.stop_reason == "tool_use":
+            blocks = [b for b in response.content if b.type == "tool_use"]
+            tool_results, latencies = await asyncio.to_thread(
+                execute_tools, blocks, max_tool_workers, tool_timeout_s, conversation.handlers())
+            conversation.add_tool_turn(response.content, tool_results, latencies, iteration + 1)
 
     logger.warning("Max iterations reached")
     return "Max iterations reached — agent did not complete"
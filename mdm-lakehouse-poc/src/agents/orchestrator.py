@@ -4,7 +4,10 @@ Meta-Agent Orchestrator
 Runs all 6 specialized Claude agents in dependency order.
 
 Usage:
-    python src/agents/orchestrator.py
+    python src/agents/orchestrator.py                      # run the agents
+    python src/agents/orchestrator.py --dry-run            # schedule only, no API calls
+    python src/agents/orchestrator.py --concurrency 4 --rpm 50
+    python src/agents/orchestrator.py --tool-cache         # share read-only tool results across agents
 
 Agent Pipeline:
     1. ETL Generator    → Profiles sources → generates extraction pipelines
@@ -13,9 +16,27 @@ Agent Pipeline:
     4. dbt Modeler      → Inspects Silver/MDM → generates Gold star schema
     5. DAG Builder      → Reads pipelines → generates Step Functions ASL
     6. Doc Writer       → Reads everything → generates data dictionaries
+
+Scheduling:
+    The agents form a DAG of tasks (build_project_dag): one ETL task per
+    source, all independent; DQ and MDM each need only the ETL output and
+    run side by side; dbt waits for both. run_dag starts every task as
+    soon as its upstream tasks finish, under a global concurrency limit
+    and a shared API rate limit, and returns a timeline of per-task wall
+    times. Each task's prompt carries its upstream tasks' final answers.
 """
 
-from agent_loop import run_agent
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from agent_loop import RateLimiter, run_agent_async
+from tool_cache import DEFAULT_CACHE_DIR, ToolResultCache
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 50
+UPSTREAM_CONTEXT_CHARS = 4000       # Per upstream task, carried into the prompt
 
 # ── Agent system prompts ──
 AGENT_PROMPTS = {
@@ -70,43 +91,167 @@ ENTERPRISE_SOURCES = [
 ]
 
 
-def run_full_project():
-    """Execute all 6 agents in sequence."""
-    print("=" * 60)
-    print("META-AGENT ORCHESTRATOR — Full MDM Lakehouse Generation")
-    print("=" * 60)
+@dataclass
+class AgentTask:
+    """One agent run in the project DAG."""
+    name: str
+    agent: str
+    task: str
+    upstream: list = field(default_factory=list)
+
+
+def build_project_dag() -> list:
+    """The six agents as a task DAG, one ETL task per enterprise source."""
+    etl = [
+        AgentTask(f"etl_{source['type']}", "etl_generator",
+                  f"Generate extraction pipelines for {source['name']} ({source['type']})")
+        for source in ENTERPRISE_SOURCES
+    ]
+    etl_names = [t.name for t in etl]
+    return etl + [
+        AgentTask("dq_engine", "dq_engine", "Generate DQ suites for all layers", etl_names),
+        AgentTask("mdm_matcher", "mdm_matcher", "Create customer matching engine", etl_names),
+        AgentTask("dbt_modeler", "dbt_modeler", "Generate star schema models", ["dq_engine", "mdm_matcher"]),
+        AgentTask("dag_builder", "dag_builder", "Build Step Functions pipeline", ["dbt_modeler"]),
+        AgentTask("doc_writer", "doc_writer", "Generate all documentation", ["dag_builder"]),
+    ]
+
+
+def _with_upstream_context(task: AgentTask, outputs: dict) -> str:
+    if not task.upstream:
+        return task.task
+    context = "\n\n".join(f"## {name}\n{outputs[name][:UPSTREAM_CONTEXT_CHARS]}" for name in task.upstream)
+    return f"{task.task}\n\nOutput of the upstream agents:\n\n{context}"
 
-    # Phase 1: ETL
-    print("\n[1/6] ETL Pipeline Generation")
-    for source in ENTERPRISE_SOURCES:
-        task = f"Generate extraction pipelines for {source['name']} ({source['type']})"
-        print(f"  → {task}")
-        # run_agent(AGENT_PROMPTS["etl_generator"], task)
 
-    # Phase 2: DQ
-    print("\n[2/6] Data Quality Framework")
-    # run_agent(AGENT_PROMPTS["dq_engine"], "Generate DQ suites for all layers")
+async def run_dag(
+    tasks: list,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+    runner=run_agent_async,
+    **agent_kwargs,
+) -> list:
+    """
+    Run `tasks` as soon as their upstream tasks finish, at most
+    `concurrency` at a time, all API requests sharing one rate limit.
+    A failed task marks everything downstream of it as skipped.
 
-    # Phase 3: MDM
-    print("\n[3/6] MDM Matching Engine")
-    # run_agent(AGENT_PROMPTS["mdm_matcher"], "Create customer matching engine")
+    Returns:
+        Timeline entries in start order: {"name", "agent", "status",
+        "start_s", "end_s", "seconds", "tool_calls", "tokens",
+        "cache_hit_rate", "output"|"error"}
+    """
+    by_name = {t.name: t for t in tasks}
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(requests_per_minute)
+    outputs, timeline = {}, []
+    done = {name: asyncio.Event() for name in by_name}
+    started_at = time.perf_counter()
 
-    # Phase 4: dbt
-    print("\n[4/6] Gold Layer dbt Models")
-    # run_agent(AGENT_PROMPTS["dbt_modeler"], "Generate star schema models")
+    async def run_task(task: AgentTask):
+        entry = {"name": task.name, "agent": task.agent}
+        try:
+            for name in task.upstream:
+                await done[name].wait()
+            failed = [name for name in task.upstream if name not in outputs]
+            if failed:
+                entry.update(status="skipped", error=f"upstream failed: {', '.join(failed)}")
+                return
+            async with semaphore:
+                entry["start_s"] = time.perf_counter() - started_at
+                timeline.append(entry)
+                print(f"  → [{entry['start_s']:7.1f}s] {task.name}: {task.task}")
+                stats = {}
+                try:
+                    outputs[task.name] = await runner(
+                        AGENT_PROMPTS[task.agent], _with_upstream_context(task, outputs),
+                        stats=stats, rate_limiter=limiter, **agent_kwargs)
+                    entry.update(status="success", output=outputs[task.name])
+                except Exception as e:
+                    entry.update(status="failed", error=str(e))
+                entry["end_s"] = time.perf_counter() - started_at
+                entry["seconds"] = entry["end_s"] - entry["start_s"]
+                entry["tool_calls"] = len(stats.get("tools", []))
+                entry["tokens"] = stats.get("tokens", {})
+                entry["cache_hit_rate"] = stats.get("cache_hit_rate", 0.0)
+                print(f"  ✓ [{entry['end_s']:7.1f}s] {task.name}: {entry['status']} "
+                      f"({entry['seconds']:.1f}s, {entry['tool_calls']} tool calls)")
+        finally:
+            if "start_s" not in entry:
+                timeline.append(entry)
+            done[task.name].set()
 
-    # Phase 5: DAG
-    print("\n[5/6] Orchestration DAGs")
-    # run_agent(AGENT_PROMPTS["dag_builder"], "Build Step Functions pipeline")
+    await asyncio.gather(*(run_task(t) for t in tasks))
+    return timeline
+
+
+def print_timeline(timeline: list, width: int = 40):
+    """Per-task wall time as a text Gantt chart."""
+    ran = [e for e in timeline if "start_s" in e]
+    total = max((e["end_s"] for e in ran), default=0.0)
+    scale = width / total if total else 0.0
+    print(f"  {'task':<16} {'status':<8} {'start':>7} {'wall_s':>7}  timeline ({total:.1f}s)")
+    for e in ran:
+        offset = int(e["start_s"] * scale)
+        bar = "█" * max(1, int(e["end_s"] * scale) - offset)
+        print(f"  {e['name']:<16} {e['status']:<8} {e['start_s']:>7.1f} {e['seconds']:>7.1f}  "
+              f"{' ' * offset}{bar}")
+    for e in timeline:
+        if "start_s" not in e:
+            print(f"  {e['name']:<16} {e['status']:<8} {e['error']}")
+    busy = sum(e["seconds"] for e in ran)
+    if total:
+        print(f"  Sum of agent wall time {busy:.1f}s over {total:.1f}s elapsed ({busy / total:.1f}x parallelism)")
+    tokens = {k: sum(e.get("tokens", {}).get(k, 0) for e in ran)
+              for k in ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens", "output_tokens")}
+    prompt = tokens["input_tokens"] + tokens["cache_read_input_tokens"] + tokens["cache_creation_input_tokens"]
+    if prompt:
+        print(f"  Tokens: {prompt:,} prompt ({tokens['cache_read_input_tokens'] / prompt:.0%} from cache), "
+              f"{tokens['output_tokens']:,} output")
+
+
+async def _dry_run_agent(system_prompt: str, task: str, stats: dict = None, **_) -> str:
+    return f"(dry run) {task.splitlines()[0]}"
+
+
+def run_full_project(concurrency: int = DEFAULT_CONCURRENCY,
+                     requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                     dry_run: bool = False,
+                     tool_cache_dir: str = None) -> list:
+    """Execute all 6 agents as a DAG; returns the timeline."""
+    tool_cache = ToolResultCache(tool_cache_dir) if tool_cache_dir else None
+    print("=" * 60)
+    print("META-AGENT ORCHESTRATOR — Full MDM Lakehouse Generation")
+    print(f"  concurrency {concurrency}, {requests_per_minute:g} requests/min"
+          f"{', dry run' if dry_run else ''}")
+    print("=" * 60)
 
-    # Phase 6: Docs
-    print("\n[6/6] Documentation")
-    # run_agent(AGENT_PROMPTS["doc_writer"], "Generate all documentation")
+    tasks = build_project_dag()
+    timeline = asyncio.run(run_dag(tasks, concurrency, requests_per_minute,
+                                   runner=_dry_run_agent if dry_run else run_agent_async,
+                                   tool_cache=tool_cache))
 
     print("\n" + "=" * 60)
-    print("COMPLETE: All 6 agents executed successfully")
+    print_timeline(timeline)
+    if tool_cache is not None:
+        print(f"  Tool cache: {tool_cache.stats}")
+    failed = [e["name"] for e in timeline if e["status"] != "success"]
+    if failed:
+        print(f"INCOMPLETE: {len(failed)} of {len(tasks)} tasks did not succeed ({', '.join(failed)})")
+    else:
+        print(f"COMPLETE: All {len(tasks)} agent tasks executed successfully")
     print("=" * 60)
+    return timeline
 
 
 if __name__ == "__main__":
-    run_full_project()
+    parser = argparse.ArgumentParser(description="Run the six MDM Lakehouse agents as a DAG")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Agent tasks running at once")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help="API requests per minute, shared by all agents")
+    parser.add_argument("--dry-run", action="store_true", help="Schedule the DAG without calling the API")
+    parser.add_argument("--tool-cache", nargs="?", const=DEFAULT_CACHE_DIR, metavar="DIR",
+                        help=f"Cache read-only tool results on disk (default dir {DEFAULT_CACHE_DIR})")
+    args = parser.parse_args()
+    run_full_project(args.concurrency, args.rpm, args.dry_run, args.tool_cache)
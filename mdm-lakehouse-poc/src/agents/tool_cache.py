@@ -0,0 +1,258 @@
+"""
+Tool Result Cache
+==================
+Content-addressed on-disk cache for read-only agent tools.
+
+The six agents inspect the same tables over and over (the DQ engine, MDM
+matcher and dbt modeler all profile the Silver customer table). Wrapping
+TOOL_HANDLERS with a ToolResultCache serves repeats from local disk:
+
+  - Key: sha256 of the tool name + canonical input (sorted keys, schema
+    defaults filled in), so {"table": t, "source": s} and
+    {"source": s, "table": t} are one entry.
+  - Opt-in per tool (CACHEABLE_TOOLS → TTL), and per call: only SELECT
+    queries and Delta describe/history are read-only enough to cache.
+  - Each entry is tagged with the targets it reads (table name, path).
+    write_pipeline_code and Delta write/merge/vacuum drop every entry
+    that shares a tag with what they touch.
+  - A read whose targets were invalidated while it was running is not
+    stored: every invalidation bumps a per-tag generation, and put()
+    skips the result if any of its tags moved past the generation seen
+    when the read started. Generations are per process; the orchestrator
+    runs all agents of a project in one process.
+  - Entries expire after their TTL; past max_entries the least recently
+    used ones are evicted (last use = file mtime).
+
+Usage:
+    cache = ToolResultCache()
+    run_agent(prompt, task, tool_cache=cache)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from tool_definitions import ENTERPRISE_DATA_TOOLS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "AGENT_TOOL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mdm-lakehouse", "tool_cache"))
+DEFAULT_MAX_ENTRIES = 2000
+
+# tool name → TTL in seconds
+CACHEABLE_TOOLS = {
+    "profile_data_source": 3600,
+    "query_database": 600,
+    "delta_lake_operation": 3600,
+}
+READ_ONLY_DELTA_OPERATIONS = {"describe", "history"}
+WRITE_DELTA_OPERATIONS = {"write", "merge", "vacuum"}
+READ_ONLY_SQL = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+TABLE_REFERENCE = re.compile(r"\b(?:from|join)\s+([\w.\"`\[\]]+)", re.IGNORECASE)
+
+SCHEMA_DEFAULTS = {
+    tool["name"]: {k: p["default"] for k, p in tool["input_schema"]["properties"].items() if "default" in p}
+    for tool in ENTERPRISE_DATA_TOOLS
+}
+
+
+def canonical_input(tool_name: str, tool_input: dict) -> dict:
+    """Tool input with schema defaults filled in and string values stripped."""
+    merged = {**SCHEMA_DEFAULTS.get(tool_name, {}), **tool_input}
+    return {k: v.strip() if isinstance(v, str) else v for k, v in merged.items()}
+
+
+def cache_key(tool_name: str, tool_input: dict) -> str:
+    payload = json.dumps({"tool": tool_name, "input": canonical_input(tool_name, tool_input)},
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _target_tags(*targets: str) -> set:
+    """A target (path, filename, schema.table) tags itself and its bare table name."""
+    tags = set()
+    for target in targets:
+        if not target:
+            continue
+        target = target.strip().strip("\"`[]").rstrip("/").lower()
+        name = re.split(r"[/.]", re.sub(r"\.(py|sql|json|ya?ml)$", "", target))[-1]
+        tags.update({target, name})
+    return tags
+
+
+def read_tags(tool_name: str, tool_input: dict) -> Optional[set]:
+    """Targets a cacheable call reads, or None if this call must not be cached."""
+    if tool_name == "profile_data_source":
+        return _target_tags(f"{tool_input['source']}.{tool_input['table']}", tool_input["table"])
+    if tool_name == "query_database":
+        if not READ_ONLY_SQL.match(tool_input["sql"]):
+            return None
+        return _target_tags(*TABLE_REFERENCE.findall(tool_input["sql"])) | {f"connection:{tool_input['connection']}"}
+    if tool_name == "delta_lake_operation":
+        if tool_input["operation"] not in READ_ONLY_DELTA_OPERATIONS:
+            return None
+        return _target_tags(tool_input["path"])
+    return None
+
+
+def write_tags(tool_name: str, tool_input: dict) -> set:
+    """Targets a call modifies (empty for read-only calls)."""
+    if tool_name == "write_pipeline_code":
+        return _target_tags(tool_input["filename"])
+    if tool_name == "delta_lake_operation" and tool_input["operation"] in WRITE_DELTA_OPERATIONS:
+        return _target_tags(tool_input["path"])
+    return set()
+
+
+class ToolResultCache:
+    """On-disk result cache for TOOL_HANDLERS; one JSON file per entry under `cache_dir`."""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        tools: Optional[dict] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.tools = CACHEABLE_TOOLS if tools is None else tools
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0, "evicted": 0, "stale_skipped": 0}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._tag_generations = {}      # tag → generation of its last invalidation
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                yield os.path.join(self.cache_dir, name)
+
+    def _load(self, path: str) -> Optional[dict]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _mtime(self, path: str) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:     # Removed by another thread or process meanwhile
+            return 0.0
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def generation(self) -> int:
+        """Current invalidation generation; pass it to put() for a read started now."""
+        with self._lock:
+            return self._generation
+
+    # ── Lookup / store ──
+    def get(self, tool_name: str, tool_input: dict):
+        """(hit, result) for a cacheable call; expired entries count as misses."""
+        path = self._path(cache_key(tool_name, tool_input))
+        entry = self._load(path)
+        if entry is None or time.time() - entry["created"] > self.tools.get(tool_name, 0):
+            self._count("misses")
+            return False, None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        self._count("hits")
+        return True, entry["result"]
+
+    def put(self, tool_name: str, tool_input: dict, result, tags: set, since: Optional[int] = None) -> bool:
+        """
+        Store a read result. With `since` (generation() taken before the
+        read), the result is dropped if any of its tags was invalidated
+        after that, since it may predate the write.
+        """
+        with self._lock:
+            if since is not None and any(self._tag_generations.get(t, 0) > since for t in tags):
+                self.stats["stale_skipped"] += 1
+                return False
+        entry = {"tool": tool_name, "input": canonical_input(tool_name, tool_input),
+                 "tags": sorted(tags), "created": time.time(), "result": result}
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp, self._path(cache_key(tool_name, tool_input)))
+        self._evict()
+        return True
+
+    def _evict(self):
+        with self._lock:
+            paths = list(self._entries())
+            if len(paths) <= self.max_entries:
+                return
+            paths.sort(key=self._mtime)
+            for path in paths[:len(paths) - self.max_entries]:
+                self._remove(path)
+                self.stats["evicted"] += 1
+
+    def invalidate(self, tags: set) -> int:
+        """Drop every entry that reads any of `tags`; returns how many."""
+        dropped = 0
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._tag_generations[tag] = self._generation
+            for path in list(self._entries()):
+                entry = self._load(path)
+                if entry is not None and tags & set(entry["tags"]):
+                    self._remove(path)
+                    dropped += 1
+            self.stats["invalidated"] += dropped
+        return dropped
+
+    def clear(self):
+        for path in list(self._entries()):
+            self._remove(path)
+
+    # ── Handler wrapping ──
+    def wrap(self, handlers: dict) -> dict:
+        """`handlers` with cacheable tools served from the cache and writes invalidating it."""
+        wrapped = dict(handlers)
+        for tool_name, handler in handlers.items():
+            if tool_name in self.tools or tool_name in ("write_pipeline_code", "delta_lake_operation"):
+                wrapped[tool_name] = self._wrap_handler(tool_name, handler)
+        return wrapped
+
+    def _wrap_handler(self, tool_name: str, handler):
+        def cached_handler(**tool_input):
+            tags = read_tags(tool_name, tool_input) if tool_name in self.tools else None
+            if tags is not None:
+                hit, result = self.get(tool_name, tool_input)
+                if hit:
+                    logger.info(f"  Tool cache hit: {tool_name}")
+                    return result
+                started = self.generation()
+            result = handler(**tool_input)
+            touched = write_tags(tool_name, tool_input)
+            if touched:
+                dropped = self.invalidate(touched)
+                if dropped:
+                    logger.info(f"  Tool cache: {tool_name} invalidated {dropped} entries")
+            if tags is not None:
+                self.put(tool_name, tool_input, result, tags, since=started)
+            return result
+        return cached_handler
@@ -8,7 +8,9 @@ Each tool maps to a real handler function (see tool_handlers.py).
 ENTERPRISE_DATA_TOOLS = [
     {
         "name": "query_database",
-        "description": "Execute SQL query against SAP HANA, Oracle, SQL Server, or Snowflake.",
+        "description": "Execute a read-only SQL query (SELECT/WITH) against SAP HANA, Oracle, SQL Server, or Snowflake. "
+                       "Returns column-oriented results ({columns, data}); rows beyond max_rows "
+                       "(at most 10000) or ~256 KB are cut and flagged in 'truncated'.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -2,13 +2,133 @@
 Tool Handlers — Execution layer for Claude agent tool calls.
 Each handler receives the tool input and returns a result dict.
 In production, these connect to real AWS services, databases, and APIs.
+
+query_database:
+  One pooled SQLAlchemy engine per `connection` enum value, URL from
+  AGENT_DB_URL_<CONNECTION> (e.g. AGENT_DB_URL_SNOWFLAKE). Rows are
+  streamed with a server-side cursor and fetched in batches up to
+  max_rows, so a query on a large warehouse table never materializes
+  more than it returns. The result is column-oriented
+  ({"columns": [...], "data": [[col values], ...]}) and capped at
+  MAX_RESULT_BYTES; long cells are clipped to MAX_CELL_CHARS. Every cut
+  is reported in "truncated" so the agent can narrow the query.
+
+  The tool is read-only. Only read statements (SELECT, WITH, SHOW,
+  DESCRIBE, EXPLAIN, VALUES) are executed, each in a transaction that is
+  rolled back, and anything that returns no rows is rejected. SQLite
+  connections are also opened query_only; production connections should
+  use a read-only database role. tool_cache relies on this to cache query
+  results.
 """
 
+import base64
+import datetime
+import decimal
+import json
+import os
+import re
+import threading
+
+from sqlalchemy import create_engine, event, text
+
+# ── query_database limits ──
+MAX_ROWS_LIMIT = 10_000             # Ceiling on the caller's max_rows
+MAX_RESULT_BYTES = 256 * 1024       # Encoded size of the returned data
+MAX_CELL_CHARS = 2_000
+FETCH_BATCH_ROWS = 500
+ENGINE_OPTIONS = {"pool_pre_ping": True, "pool_recycle": 1800}
+READ_STATEMENT = re.compile(r"^[\s(]*(select|with|show|describe|desc|explain|values)\b", re.IGNORECASE)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(connection: str):
+    """Pooled engine for a query_database `connection`, created on first use."""
+    url = os.environ.get(f"AGENT_DB_URL_{connection.upper()}")
+    if not url:
+        raise ValueError(f"No database configured for connection '{connection}' "
+                         f"(set AGENT_DB_URL_{connection.upper()})")
+    with _engines_lock:
+        if (connection, url) not in _engines:
+            engine = create_engine(url, **ENGINE_OPTIONS)
+            if engine.dialect.name == "sqlite":
+                # pysqlite autocommits statements it does not wrap in BEGIN
+                # (DDL, WITH ... DELETE), so rollback alone cannot undo them
+                event.listen(engine, "connect",
+                             lambda dbapi_conn, _: dbapi_conn.execute("PRAGMA query_only = ON"))
+            _engines[(connection, url)] = engine
+        return _engines[(connection, url)]
+
+
+def _json_value(value):
+    """Cell → JSON-safe value (numbers stay numbers where that loses nothing)."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return float(value) if decimal.Decimal(repr(float(value))) == value else str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "base64:" + base64.b64encode(bytes(value)[:MAX_CELL_CHARS]).decode()
+    return str(value)
+
 
 def execute_database_query(connection: str, sql: str, max_rows: int = 1000) -> dict:
     """Execute SQL against target database via SQLAlchemy."""
-    # Production: SQLAlchemy connection pool → execute → return rows
-    return {"status": "success", "connection": connection, "sql": sql, "row_count": max_rows}
+    if not READ_STATEMENT.match(sql):
+        raise ValueError("query_database is read-only; only SELECT/WITH/SHOW/DESCRIBE/EXPLAIN are allowed")
+    max_rows = max(0, min(max_rows, MAX_ROWS_LIMIT))
+    engine = get_engine(connection)
+
+    # Read-only: the transaction is always rolled back, whatever the statement did
+    with engine.connect() as conn, conn.begin() as transaction:
+        result = conn.execution_options(stream_results=True, max_row_buffer=FETCH_BATCH_ROWS).execute(text(sql))
+        if not result.returns_rows:
+            transaction.rollback()
+            raise ValueError("query_database is read-only; only statements that return rows are allowed")
+
+        columns = list(result.keys())
+        data = [[] for _ in columns]
+        row_count, size, truncated, clipped = 0, 0, None, False
+        while truncated is None:
+            batch = result.fetchmany(min(FETCH_BATCH_ROWS, max_rows - row_count + 1))
+            if not batch:
+                break
+            for row in batch:
+                if row_count == max_rows:
+                    truncated = "max_rows"
+                    break
+                values = [_json_value(v) for v in row]
+                long_cells = [i for i, v in enumerate(values) if isinstance(v, str) and len(v) > MAX_CELL_CHARS]
+                for i in long_cells:
+                    values[i] = values[i][:MAX_CELL_CHARS] + f"...[+{len(values[i]) - MAX_CELL_CHARS:,} chars]"
+                row_size = len(json.dumps(values))
+                if size + row_size > MAX_RESULT_BYTES:
+                    truncated = "max_bytes"
+                    break
+                clipped = clipped or bool(long_cells)
+                for column, value in zip(data, values):
+                    column.append(value)
+                row_count += 1
+                size += row_size
+        result.close()      # Discard the rest of the cursor server-side
+        transaction.rollback()
+
+    response = {
+        "status": "success",
+        "connection": connection,
+        "columns": columns,
+        "row_count": row_count,
+        "data": data,
+    }
+    if truncated:
+        limit = f"max_rows={max_rows}" if truncated == "max_rows" else f"{MAX_RESULT_BYTES:,} bytes"
+        response["truncated"] = {"reason": truncated, "has_more_rows": True,
+                                 "note": f"Stopped at {row_count:,} rows ({limit}); add filters or aggregate"}
+    if clipped:
+        response.setdefault("truncated", {})["cells_clipped_at_chars"] = MAX_CELL_CHARS
+    return response
 
 
 def profile_table(source: str, table: str) -> dict:
@@ -5,7 +5,7 @@ Master Data Generation Orchestrator
 Generates the complete MDM Lakehouse dataset across all 11 tables.
 
 Usage:
-    python src/data_generation/generate_all.py
+    python src/data_generation/generate_all.py [--workers 4] [--seed 42]
 
 Output:
     data/bronze/      - Raw source extracts (SAP, Salesforce)
@@ -15,11 +15,27 @@ Output:
     data/pipeline/    - GTM sales deals
     data/fraud/       - Fraud detection alerts
     data/realtime/    - Executive metric snapshots
+
+Execution:
+    Generators form a small dependency DAG (GENERATORS): everything that
+    needs customer UIDs waits for `core`, the rest starts immediately.
+    Ready generators run concurrently in a process pool; `core` hands
+    dim_customer to its dependents in memory instead of via the CSV.
+
+    Each generator seeds `random` and `np.random` from its own stream of
+    --seed (derived from the generator name), so every table is the same
+    whatever the worker count or completion order.
 """
 
+import argparse
+import random
 import sys
 import os
 import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
 
 # Add parent to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
@@ -31,73 +47,111 @@ from generate_pipeline import generate_pipeline
 from generate_fraud import generate_fraud
 from generate_realtime import generate_realtime
 
-import pandas as pd
+DEFAULT_SEED = 42
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# name → (table label, upstream generators)
+GENERATORS = {
+    'core': ('dim_customer + facts + MDM', []),
+    'clickstream': ('fact_clickstream', ['core']),
+    'lifecycle': ('dim_customer_lifecycle', ['core']),
+    'pipeline': ('fact_pipeline', ['core']),
+    'fraud': ('fact_fraud_signals', ['core']),
+    'realtime': ('fact_realtime_metrics', []),
+}
+
+
+def stream_seed(seed: int, name: str) -> int:
+    """Deterministic, independent 32-bit seed for generator `name`."""
+    sequence = np.random.SeedSequence(seed, spawn_key=(zlib.crc32(name.encode()),))
+    return int(sequence.generate_state(1)[0])
+
+
+def run_generator(name: str, seed: int, customers_df=None):
+    """
+    Worker entry point: seed this generator's stream and run it. Returns
+    (dim_customer, rows) for `core`, (None, rows) for the others — large
+    outputs stay in the worker, only what dependents need comes back.
+    """
+    task_seed = stream_seed(seed, name)
+    random.seed(task_seed)
+    np.random.seed(task_seed)
+
+    started = time.perf_counter()
+    if name == 'core':
+        customers_df = generate_core()
+        return customers_df, len(customers_df), time.perf_counter() - started
+
+    customer_uids = customers_df['customer_uid'].tolist() if customers_df is not None else None
+    if name == 'clickstream':
+        df = generate_clickstream(customer_uids)
+    elif name == 'lifecycle':
+        df = generate_lifecycle(customers_df)
+    elif name == 'pipeline':
+        df = generate_pipeline(customer_uids)
+    elif name == 'fraud':
+        df = generate_fraud(customer_uids)
+    elif name == 'realtime':
+        df = generate_realtime()
+    else:
+        raise ValueError(f'Unknown generator: {name}')
+    return None, len(df), time.perf_counter() - started
+
+
+def run_dag(seed: int = DEFAULT_SEED, workers: int = DEFAULT_WORKERS) -> dict:
+    """Run GENERATORS in dependency order, independent ones concurrently; returns per-generator stats."""
+    results = {}
+    customers_df = None
+    pending = dict(GENERATORS)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            ready = [name for name, (_, upstream) in pending.items() if all(u in results for u in upstream)]
+            for name in ready:
+                del pending[name]
+                needs_customers = 'core' in GENERATORS[name][1]
+                running[pool.submit(run_generator, name, seed,
+                                    customers_df if needs_customers else None)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                output, rows, seconds = future.result()
+                if name == 'core':
+                    customers_df = output
+                results[name] = {'table': GENERATORS[name][0], 'rows': rows, 'seconds': round(seconds, 2)}
+    return results
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate the full MDM Lakehouse sample dataset')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Generator processes (output is identical for any value)')
+    args = parser.parse_args()
+
     start = time.time()
 
     print("=" * 70)
     print("  MDM LAKEHOUSE POC — FULL DATA GENERATION")
     print("  Idea to Display | Claude Opus 4.6 | Simultaneous")
+    print(f"  {len(GENERATORS)} generators, {args.workers} workers, seed {args.seed}")
     print("=" * 70)
     print()
 
-    # ── Phase 1: Core data (Bronze → Gold + MDM) ──
-    print("PHASE 1: Core Lakehouse Data")
-    generate_core()
-    print()
-
-    # Load customer UIDs for downstream modules
-    data_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
-    customers_df = pd.read_csv(os.path.join(data_dir, 'gold', 'dim_customer.csv'))
-    customer_uids = customers_df['customer_uid'].tolist()
-
-    # ── Phase 2: Clickstream ──
-    print("PHASE 2: Clickstream Data")
-    generate_clickstream(customer_uids)
-    print()
-
-    # ── Phase 3: Customer Lifecycle ──
-    print("PHASE 3: Customer Lifecycle")
-    generate_lifecycle(customers_df)
-    print()
-
-    # ── Phase 4: GTM Pipeline ──
-    print("PHASE 4: GTM Sales Pipeline")
-    generate_pipeline(customer_uids)
-    print()
-
-    # ── Phase 5: Fraud Tracking ──
-    print("PHASE 5: Fraud Detection")
-    generate_fraud(customer_uids)
-    print()
-
-    # ── Phase 6: Real-Time Metrics ──
-    print("PHASE 6: Real-Time Executive Metrics")
-    generate_realtime()
-    print()
+    results = run_dag(args.seed, args.workers)
 
     # ── Summary ──
     elapsed = time.time() - start
+    print()
     print("=" * 70)
     print("  GENERATION COMPLETE")
-    print(f"  Time: {elapsed:.1f}s")
+    print(f"  Time: {elapsed:.1f}s (sum of generators: {sum(r['seconds'] for r in results.values()):.1f}s)")
     print()
-    print("  Tables generated:")
-    print("    dim_customer             500 golden records")
-    print("    dim_product               80 products")
-    print("    dim_customer_lifecycle   500 lifecycle records")
-    print("    dim_date                 762 calendar days")
-    print("    fact_sales             3,500 order transactions")
-    print("    fact_interactions      6,000 customer touchpoints")
-    print("    fact_clickstream      25,000 web events")
-    print("    fact_pipeline          1,200 GTM deals")
-    print("    fact_realtime_metrics    168 hourly snapshots")
-    print("    fact_fraud_signals       450 fraud alerts")
-    print("    mdm_match_pairs          200 candidate pairs")
-    print("    ─────────────────────────────")
-    print("    TOTAL                 36,650+ records")
+    print("  Generators:")
+    for name in GENERATORS:
+        r = results[name]
+        print(f"    {name:<12} {r['table']:<28} {r['rows']:>7,} rows {r['seconds']:>6.1f}s")
     print("=" * 70)
 
 
@@ -4,13 +4,38 @@ Generate clickstream / web analytics data (fact_clickstream).
 Simulates 25,000 web events including page views, form submissions,
 button clicks, video plays, and conversions across multiple referrer
 sources and UTM campaigns.
+
+Streaming mode (`--events N --output-dir DIR`) generates the same event
+distribution for load tests at 100M+ events: fixed-size batches are
+sampled as NumPy arrays (hour from the cumulative HOURLY_WEIGHTS, page /
+event / device as index arrays) and written as date-partitioned Parquet
+parts, so memory is constant in the event count — see
+generate_clickstream_stream().
+
+Sessionized mode (`--sessions N --output-dir DIR`) simulates visitor
+sessions instead of independent events: each session enters on a page
+from ENTRY_WEIGHTS, walks PAGE_FLOW as a Markov chain until it exits, and
+gets monotonic timestamps from exponential dwell times. Events come out
+sorted by (session_id, event_timestamp) for sessionization / funnel /
+window-query benchmarks — see generate_sessions_stream().
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
 import os
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import vectorized as vg
 
 np.random.seed(42)
 random.seed(42)
@@ -32,6 +57,11 @@ CAMPAIGNS = [None, None, 'spring_launch', 'q4_push', 'partner_webinar',
 
 # Business hours traffic weighting (index = hour)
 HOURLY_WEIGHTS = [1,0,0,0,0,1,2,4,8,10,10,9,8,9,10,10,9,8,6,5,4,3,2,1]
+CONVERSION_PAGES = ['/checkout', '/demo-request', '/free-trial']
+CONVERSION_PAGE_EVENTS = ['page_view', 'form_submit', 'button_click']
+VISITOR_COUNTRIES = ['US', 'US', 'US', 'UK', 'UK', 'DE', 'FR', 'IN', 'CA', 'AU']
+START_DATE = datetime(2024, 7, 1)
+N_DAYS = 580
 
 
 def generate_clickstream(customer_uids: list, n_events: int = 25000):
@@ -83,3 +113,350 @@ def generate_clickstream(customer_uids: list, n_events: int = 25000):
     conversions = df['is_converted'].sum()
     print(f"    Events: {len(df):,} | Conversions: {conversions} ({conversions/len(df)*100:.1f}%)")
     return df
+
+
+# ─── Streaming mode (vectorized, date-partitioned Parquet) ───
+STREAM_CHUNK_EVENTS = 1_000_000
+SESSIONS_PER_EVENT = 8000 / 25000      # Same session / visitor density as the sample
+VISITORS_PER_EVENT = 2000 / 25000
+
+HOURLY_CDF = np.cumsum(HOURLY_WEIGHTS) / sum(HOURLY_WEIGHTS)
+_CONVERSION_PAGE_IDX = np.array([PAGES.index(p) for p in CONVERSION_PAGES])
+_CONVERSION_EVENT_IDX = np.array([EVENTS.index(e) for e in CONVERSION_PAGE_EVENTS])
+_FORM_SUBMIT_IDX = EVENTS.index('form_submit')
+
+
+def sample_cdf(rng, cdf: np.ndarray, n: int) -> np.ndarray:
+    """`n` indices drawn from the distribution with cumulative weights `cdf`."""
+    return np.searchsorted(cdf, rng.random(n), side='right')
+
+
+def clickstream_batch(rng, first_event: int, day_offsets: np.ndarray, customer_uids: pa.Array,
+                      n_sessions: int, n_visitors: int) -> pa.Table:
+    """One batch of events (one per entry of `day_offsets`), numbered from `first_event`."""
+    n = len(day_offsets)
+    seconds = (day_offsets * 86400 + sample_cdf(rng, HOURLY_CDF, n) * 3600
+               + rng.integers(0, 60, n) * 60 + rng.integers(0, 60, n))
+    ts = np.datetime64(START_DATE, 's') + seconds
+
+    page = rng.integers(0, len(PAGES), n)
+    # Conversion-weighted events for key pages
+    key_page = np.isin(page, _CONVERSION_PAGE_IDX)
+    event = np.where(key_page,
+                     _CONVERSION_EVENT_IDX[rng.integers(0, len(_CONVERSION_EVENT_IDX), n)],
+                     rng.integers(0, len(EVENTS), n))
+
+    # 30% anonymous visitors, 70% known customers
+    known = rng.random(n) > 0.3
+    customer = pc.take(customer_uids, pa.array(rng.integers(0, len(customer_uids), n)))
+    visitor = vg.ids('VIS-', rng.integers(1, n_visitors + 1, n), 6)
+
+    return pa.table({
+        'event_id': vg.ids('EVT-', np.arange(first_event + 1, first_event + n + 1), 6),
+        'session_id': vg.ids('SES-', rng.integers(1, n_sessions + 1, n), 6),
+        'customer_uid': pc.if_else(pa.array(known), customer, pa.nulls(n, pa.string())),
+        'visitor_id': pc.if_else(pa.array(known), pa.nulls(n, pa.string()), visitor),
+        'event_timestamp': pa.array(ts, pa.timestamp('s')),
+        'event_date': pa.array(ts.astype('datetime64[D]')),
+        'page_url': vg.take(PAGES, page),
+        'event_type': vg.take(EVENTS, event),
+        'device_type': vg.choice(rng, DEVICES, n),
+        'browser': vg.choice(rng, BROWSERS, n),
+        'referrer_source': vg.choice(rng, REFERRERS, n),
+        'session_duration_sec': rng.integers(5, 1801, n),
+        'page_load_ms': rng.integers(200, 5001, n),
+        'is_converted': (key_page & (event == _FORM_SUBMIT_IDX)).astype(np.int8),
+        'utm_campaign': vg.choice(rng, CAMPAIGNS, n),
+        'country': vg.choice(rng, VISITOR_COUNTRIES, n),
+    })
+
+
+def iter_clickstream_batches(customer_uids: list, n_events: int,
+                             chunk_events: int = STREAM_CHUNK_EVENTS, seed: int = vg.DEFAULT_SEED):
+    """
+    Yield batches of at most `chunk_events` events in date order. Events
+    per day are fixed up front (uniform multinomial over N_DAYS, as
+    `randint(0, 579)` per event); each batch covers a run of consecutive
+    days, so every day lands in one Parquet part unless it alone exceeds
+    a batch.
+    """
+    per_day = vg.chunk_rng(seed, 'fact_clickstream_days').multinomial(n_events, np.full(N_DAYS, 1 / N_DAYS))
+    uids = pa.array(customer_uids, pa.string())
+    n_sessions = max(8000, int(n_events * SESSIONS_PER_EVENT))
+    n_visitors = max(2000, int(n_events * VISITORS_PER_EVENT))
+
+    first_event = 0
+    for batch, days in enumerate(day_batches(per_day, chunk_events)):
+        yield clickstream_batch(vg.chunk_rng(seed, 'fact_clickstream', batch), first_event, days,
+                                uids, n_sessions, n_visitors)
+        first_event += len(days)
+
+
+def day_batches(per_day: np.ndarray, chunk: int):
+    """
+    Split per-day counts into batches of at most `chunk` items over runs
+    of consecutive days; yields the day offset of every item in the batch.
+    """
+    pending, pending_rows = [], 0
+    for day, count in enumerate(per_day):
+        while count:
+            take_rows = min(count, chunk - pending_rows)
+            pending.append((day, take_rows))
+            pending_rows += take_rows
+            count -= take_rows
+            if pending_rows == chunk:
+                yield np.repeat([d for d, _ in pending], [c for _, c in pending])
+                pending, pending_rows = [], 0
+    if pending_rows:
+        yield np.repeat([d for d, _ in pending], [c for _, c in pending])
+
+
+def write_date_partitioned(batch: pa.Table, output_dir: str, part: int,
+                           column: str = 'event_date', sorting_columns=None) -> int:
+    """
+    Write one batch, ordered by the date `column`, as
+    `<column>=YYYY-MM-DD/part-NNNNN.parquet` files, Hive style (the
+    partition column lives in the path); returns files written.
+    """
+    dates = batch[column]
+    run_ends = np.flatnonzero(np.diff(dates.cast(pa.int32()).to_numpy())) + 1
+    bounds = [0, *run_ends.tolist(), batch.num_rows]
+    body = batch.drop_columns([column])
+    sorting = pq.SortingColumn.from_ordering(body.schema, sorting_columns) if sorting_columns else None
+    for start, stop in zip(bounds, bounds[1:]):
+        directory = os.path.join(output_dir, f'{column}={dates[start].as_py().isoformat()}')
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(body.slice(start, stop - start), os.path.join(directory, f'part-{part:05d}.parquet'),
+                       sorting_columns=sorting)
+    return len(bounds) - 1
+
+
+def generate_clickstream_stream(customer_uids: list, n_events: int, output_dir: str,
+                                chunk_events: int = STREAM_CHUNK_EVENTS, seed: int = vg.DEFAULT_SEED) -> dict:
+    """Stream `n_events` events to date-partitioned Parquet under `output_dir`."""
+    print(f"  Streaming {n_events:,} clickstream events ({chunk_events:,} per batch) → {output_dir}")
+    started = time.perf_counter()
+    events = files = conversions = 0
+    for part, batch in enumerate(iter_clickstream_batches(customer_uids, n_events, chunk_events, seed)):
+        files += write_date_partitioned(batch, output_dir, part)
+        events += batch.num_rows
+        conversions += pc.sum(batch['is_converted']).as_py()
+    seconds = time.perf_counter() - started
+    stats = {'events': events, 'files': files, 'conversions': conversions,
+             'seconds': round(seconds, 2), 'events_per_s': round(events / seconds) if seconds else None}
+    print(f"    Events: {events:,} in {files:,} files | {stats['events_per_s']:,} events/s | "
+          f"Conversions: {conversions:,} ({conversions / max(events, 1) * 100:.1f}%)")
+    return stats
+
+
+# ─── Sessionized mode (Markov page flow, ordered sessions) ───
+STREAM_CHUNK_SESSIONS = 200_000
+MAX_SESSION_EVENTS = 60
+DWELL_MEAN_S = 40                   # Mean seconds between consecutive events of a session
+BACKGROUND_WEIGHT = 1               # Weight of every transition not listed in PAGE_FLOW
+
+ENTRY_WEIGHTS = {'/home': 30, '/blog': 15, '/login': 12, '/products': 10, '/pricing': 8, '/docs': 8,
+                 '/case-studies': 5, '/webinar-signup': 4, '/whitepaper': 4, '/careers': 4}
+# page → {next page or 'exit': relative weight}
+PAGE_FLOW = {
+    '/home': {'/products': 25, '/pricing': 15, '/blog': 10, '/login': 10, '/case-studies': 8, '/about': 5, 'exit': 20},
+    '/products': {'/pricing': 25, '/demo-request': 10, '/case-studies': 10, '/docs': 8, '/free-trial': 8, 'exit': 20},
+    '/pricing': {'/demo-request': 18, '/free-trial': 18, '/checkout': 12, '/products': 10, '/contact': 8, 'exit': 25},
+    '/demo-request': {'/case-studies': 5, 'exit': 55},
+    '/free-trial': {'/login': 20, '/docs': 10, 'exit': 45},
+    '/checkout': {'/dashboard': 25, 'exit': 50},
+    '/docs': {'/api-docs': 25, '/docs': 20, '/support': 8, 'exit': 30},
+    '/api-docs': {'/docs': 20, '/api-docs': 20, 'exit': 35},
+    '/blog': {'/blog': 20, '/products': 10, '/whitepaper': 10, '/webinar-signup': 8, 'exit': 40},
+    '/case-studies': {'/demo-request': 15, '/pricing': 15, '/case-studies': 10, 'exit': 35},
+    '/contact': {'/demo-request': 10, 'exit': 60},
+    '/login': {'/dashboard': 70, 'exit': 15},
+    '/dashboard': {'/dashboard': 35, '/support': 10, '/docs': 10, '/checkout': 5, 'exit': 35},
+    '/support': {'/docs': 20, '/contact': 10, 'exit': 45},
+    '/about': {'/careers': 20, '/contact': 10, 'exit': 40},
+    '/careers': {'/about': 10, 'exit': 60},
+    '/whitepaper': {'/webinar-signup': 10, '/demo-request': 8, 'exit': 50},
+    '/webinar-signup': {'/blog': 10, 'exit': 55},
+}
+EXIT = len(PAGES)                   # Absorbing state: column after the last page
+
+
+def transition_cdf() -> np.ndarray:
+    """Row-wise cumulative transition probabilities, shape (pages, pages + exit)."""
+    weights = np.full((len(PAGES), len(PAGES) + 1), float(BACKGROUND_WEIGHT))
+    for page, flows in PAGE_FLOW.items():
+        for target, weight in flows.items():
+            weights[PAGES.index(page), EXIT if target == 'exit' else PAGES.index(target)] = weight
+    cdf = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+    cdf[:, -1] = 1.0
+    return cdf
+
+
+TRANSITION_CDF = transition_cdf()
+ENTRY_CDF = np.cumsum([ENTRY_WEIGHTS.get(p, 0) for p in PAGES]) / sum(ENTRY_WEIGHTS.values())
+
+
+def walk_sessions(rng, n_sessions: int):
+    """
+    Simulate `n_sessions` page walks at once (one vector step per click).
+    Returns (session index, step, page index) per event, ordered by
+    (session, step).
+    """
+    state = sample_cdf(rng, ENTRY_CDF, n_sessions)
+    active = np.arange(n_sessions)
+    sessions, steps, pages = [], [], []
+    for step in range(MAX_SESSION_EVENTS):
+        sessions.append(active)
+        steps.append(np.full(len(active), step))
+        pages.append(state)
+        nxt = (TRANSITION_CDF[state] < rng.random(len(active))[:, None]).sum(axis=1)
+        keep = nxt != EXIT
+        active, state = active[keep], nxt[keep]
+        if not len(active):
+            break
+    session, step, page = np.concatenate(sessions), np.concatenate(steps), np.concatenate(pages)
+    order = np.lexsort((step, session))
+    return session[order], step[order], page[order]
+
+
+def day_session_starts(seed: int, day: int, n_sessions: int) -> np.ndarray:
+    """Sorted start times (seconds since START_DATE) of all `n_sessions` sessions of one day."""
+    rng = vg.chunk_rng(seed, 'fact_clickstream_session_starts', day)
+    return np.sort(day * 86400 + sample_cdf(rng, HOURLY_CDF, n_sessions) * 3600
+                   + rng.integers(0, 3600, n_sessions))
+
+
+def session_batch(rng, first_session: int, first_event: int, start: np.ndarray,
+                  customer_uids: pa.Array, n_visitors: int, id_width: int) -> pa.Table:
+    """
+    Events of one batch of sessions (one per entry of `start`, sorted start
+    times in seconds since START_DATE), sorted by (session_id, event_timestamp).
+    """
+    n_sessions = len(start)
+    session, step, page = walk_sessions(rng, n_sessions)
+    n = len(session)
+    lengths = np.bincount(session, minlength=n_sessions)
+    first_row = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # Monotonic timestamps: cumulative dwell since the session's first event
+    dwell = np.where(step == 0, 0, 1 + rng.exponential(DWELL_MEAN_S, n).astype(np.int64))
+    elapsed = np.cumsum(dwell)
+    elapsed -= np.repeat(elapsed[first_row], lengths)
+    ts = np.datetime64(START_DATE, 's') + start[session] + elapsed
+    duration = elapsed[first_row + lengths - 1]
+
+    key_page = np.isin(page, _CONVERSION_PAGE_IDX)
+    event = np.where(key_page,
+                     _CONVERSION_EVENT_IDX[rng.integers(0, len(_CONVERSION_EVENT_IDX), n)],
+                     rng.integers(0, len(EVENTS), n))
+
+    # Per-session attributes, repeated onto the session's events
+    known = (rng.random(n_sessions) > 0.3)[session]
+    customer = pc.take(customer_uids, pa.array(rng.integers(0, len(customer_uids), n_sessions)[session]))
+    visitor = vg.ids('VIS-', rng.integers(1, n_visitors + 1, n_sessions)[session], 6)
+
+    def per_session(values):
+        return pc.take(vg.choice(rng, values, n_sessions), pa.array(session))
+
+    return pa.table({
+        'event_id': vg.ids('EVT-', np.arange(first_event + 1, first_event + n + 1), 6),
+        'session_id': vg.ids('SES-', first_session + 1 + session, id_width),
+        'customer_uid': pc.if_else(pa.array(known), customer, pa.nulls(n, pa.string())),
+        'visitor_id': pc.if_else(pa.array(known), pa.nulls(n, pa.string()), visitor),
+        'event_timestamp': pa.array(ts, pa.timestamp('s')),
+        'event_date': pa.array(ts.astype('datetime64[D]')),
+        'session_date': pa.array((np.datetime64(START_DATE, 's') + start[session]).astype('datetime64[D]')),
+        'session_step': step,
+        'page_url': vg.take(PAGES, page),
+        'event_type': vg.take(EVENTS, event),
+        'device_type': per_session(DEVICES),
+        'browser': per_session(BROWSERS),
+        'referrer_source': per_session(REFERRERS),
+        'session_duration_sec': duration[session],
+        'page_load_ms': rng.integers(200, 5001, n),
+        'is_converted': (key_page & (event == _FORM_SUBMIT_IDX)).astype(np.int8),
+        'utm_campaign': per_session(CAMPAIGNS),
+        'country': per_session(VISITOR_COUNTRIES),
+    })
+
+
+def iter_session_batches(customer_uids: list, n_sessions: int,
+                         chunk_sessions: int = STREAM_CHUNK_SESSIONS, seed: int = vg.DEFAULT_SEED):
+    """
+    Yield event batches of at most `chunk_sessions` whole sessions, in
+    session start order. Session numbers follow start time across the
+    whole run: a day split over two batches has all its start times drawn
+    and sorted up front, and each batch takes the next slice.
+    """
+    per_day = vg.chunk_rng(seed, 'fact_clickstream_sessions_days').multinomial(
+        n_sessions, np.full(N_DAYS, 1 / N_DAYS))
+    uids = pa.array(customer_uids, pa.string())
+    id_width = max(6, len(str(n_sessions)))      # Fixed width → lexical order = numeric order
+    n_visitors = max(2000, int(n_sessions * VISITORS_PER_EVENT / SESSIONS_PER_EVENT))
+    first_session = first_event = 0
+    day, day_starts, taken = None, None, 0
+    for batch, days in enumerate(day_batches(per_day, chunk_sessions)):
+        start = []
+        for batch_day, count in zip(*np.unique(days, return_counts=True)):
+            if batch_day != day:
+                day, day_starts, taken = batch_day, day_session_starts(seed, batch_day, per_day[batch_day]), 0
+            start.append(day_starts[taken:taken + count])
+            taken += count
+        table = session_batch(vg.chunk_rng(seed, 'fact_clickstream_sessions', batch),
+                              first_session, first_event, np.concatenate(start), uids, n_visitors, id_width)
+        first_session += len(days)
+        first_event += table.num_rows
+        yield table
+
+
+def generate_sessions_stream(customer_uids: list, n_sessions: int, output_dir: str,
+                             chunk_sessions: int = STREAM_CHUNK_SESSIONS, seed: int = vg.DEFAULT_SEED) -> dict:
+    """
+    Stream `n_sessions` sessions to `session_date=YYYY-MM-DD` Parquet parts;
+    each file is sorted by (session_id, event_timestamp) and says so in
+    its Parquet sorting metadata.
+    """
+    print(f"  Streaming {n_sessions:,} clickstream sessions ({chunk_sessions:,} per batch) → {output_dir}")
+    started = time.perf_counter()
+    events = files = 0
+    for part, batch in enumerate(iter_session_batches(customer_uids, n_sessions, chunk_sessions, seed)):
+        files += write_date_partitioned(batch, output_dir, part, column='session_date',
+                                        sorting_columns=[('session_id', 'ascending'),
+                                                         ('event_timestamp', 'ascending')])
+        events += batch.num_rows
+    seconds = time.perf_counter() - started
+    stats = {'sessions': n_sessions, 'events': events, 'files': files, 'seconds': round(seconds, 2),
+             'events_per_s': round(events / seconds) if seconds else None}
+    print(f"    Sessions: {n_sessions:,} | Events: {events:,} ({events / max(n_sessions, 1):.1f}/session) "
+          f"in {files:,} files | {stats['events_per_s']:,} events/s")
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate clickstream events')
+    parser.add_argument('--events', type=int, default=25000)
+    parser.add_argument('--sessions', type=int, help='Sessionized mode: number of visitor sessions')
+    parser.add_argument('--output-dir', help='Streaming mode: date-partitioned Parquet here')
+    parser.add_argument('--customers', type=int,
+                        help='Use N scale-mode customer keys (generate_core_data --scale) '
+                             'instead of data/gold/dim_customer.csv')
+    parser.add_argument('--chunk-events', type=int, default=STREAM_CHUNK_EVENTS)
+    parser.add_argument('--chunk-sessions', type=int, default=STREAM_CHUNK_SESSIONS,
+                        help='Sessionized mode: sessions per batch')
+    parser.add_argument('--seed', type=int, default=vg.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    if args.customers:
+        from generate_core_data import customer_uids as scaled_customer_uids
+        uids = scaled_customer_uids(np.arange(args.customers)).to_pylist()
+    else:
+        uids = pd.read_csv(os.path.join(OUTPUT_DIR, '..', 'gold', 'dim_customer.csv'))['customer_uid'].tolist()
+
+    if args.sessions:
+        if not args.output_dir:
+            parser.error('--sessions needs --output-dir')
+        generate_sessions_stream(uids, args.sessions, args.output_dir, args.chunk_sessions, args.seed)
+    elif args.output_dir:
+        generate_clickstream_stream(uids, args.events, args.output_dir, args.chunk_events, args.seed)
+    else:
+        generate_clickstream(uids, args.events)
@@ -10,14 +10,30 @@ Produces:
   - gold/fact_sales.csv          (3,500 order transactions)
   - gold/fact_interactions.csv   (6,000 customer touchpoints)
   - mdm/match_pairs.csv          (200 MDM candidate pairs)
+
+Scale-factor mode (`--scale N`) generates the same tables at N× the row
+counts (products and dates stay fixed) with NumPy-vectorized sampling
+and chunked Parquet/CSV output — see generate_scaled().
+
+Usage:
+  python generate_core_data.py                                   # sample CSVs in data/
+  python generate_core_data.py --scale 1000 --output-dir /tmp/core_1000x
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
-import uuid
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import vectorized as vg
 
 # Reproducible randomness
 np.random.seed(42)
@@ -32,7 +48,8 @@ OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
 
 # ─── Helpers ───
 def uid():
-    return str(uuid.uuid4())[:12]
+    # uuid4-shaped ('xxxxxxxx-xxx') but drawn from the seeded `random` stream
+    return f'{random.getrandbits(32):08x}-{random.getrandbits(12):03x}'
 
 def rand_date(start, end):
     delta = end - start
@@ -240,8 +257,238 @@ def generate_mdm(customers):
     print(f"    Match pairs: {len(df)} ({df['match_tier'].value_counts().to_dict()})")
 
 
+# ─── Scale-factor mode (vectorized, chunked) ───
+# Same columns and distributions as the row-wise generators above; each
+# table is built chunk by chunk from its own RNG stream (vectorized.py).
+SCALED_OUTPUT_DIR = os.path.join(OUTPUT_DIR, 'scaled')
+STATUS_WEIGHTS = [60, 10, 15, 15]
+SOURCE_SYSTEM_COMBOS = ['SAP+Salesforce', 'SAP+Oracle', 'Salesforce+Oracle',
+                        'SAP', 'Salesforce', 'SAP+Salesforce+Oracle']
+SUBCATEGORIES = ['Basic', 'Pro', 'Enterprise', 'Ultimate']
+RECURRING_CATEGORIES = ['Software License', 'Cloud Platform', 'Support & Maintenance']
+DISCOUNTS = [0, 0, 0, 5, 10, 15, 20]
+INTERACTION_TYPES = ['Inquiry', 'Support Ticket', 'Demo Request',
+                     'Renewal', 'Complaint', 'Feedback', 'Upsell Opportunity']
+SENTIMENTS = ['Positive', 'Neutral', 'Negative']
+CSAT_SCORES = [None, None, 1, 2, 3, 3, 4, 4, 4, 5, 5, 5, 5]
+MATCH_TIERS = ['AUTO_MERGE', 'REVIEW', 'NO_MATCH']
+N_MATCH_PAIRS = 200
+CUSTOMER_UID_SALT = 1
+SFDC_ID_SALT = 2
+
+
+def customer_uids(index: np.ndarray):
+    """dim_customer.customer_uid of the customers at `index` (0-based)."""
+    return vg.surrogate_ids('CUST-', index, CUSTOMER_UID_SALT)
+
+
+def _sap_chunk(rng, start, stop, ingestion_ts):
+    n = stop - start
+    number = np.arange(start + 1, stop + 1)
+    return pa.table({
+        'KUNNR': vg.ids('KNA', number, 6),
+        'NAME1': pc.if_else(pa.array((number - 1) % 10 != 0),
+                            vg.concat('Customer_', number), vg.concat('Acme Corp Variant ', number - 1)),
+        'LAND1': vg.choice(rng, COUNTRIES, n),
+        'ORT01': vg.choice(rng, CITIES, n),
+        'PSTLZ': vg.as_string(rng.integers(10000, 100000, n)),
+        'TELF1': vg.phones(rng, n),
+        'SMTP_ADDR': vg.concat('contact_', number, '@company', number, '.com'),
+        '_source_system': pa.repeat('SAP_ECC', n),
+        '_ingestion_ts': pa.repeat(ingestion_ts, n),
+    })
+
+
+def _sfdc_chunk(rng, start, stop, n_overlap, ingestion_ts):
+    n = stop - start
+    number = np.arange(start + 1, stop + 1)
+    return pa.table({
+        'Id': vg.surrogate_ids('001', np.arange(start, stop), SFDC_ID_SALT),
+        'Name': pc.if_else(pa.array(number <= n_overlap),
+                           vg.concat('Customer_', number), vg.concat('NewCo_', number)),
+        'BillingCountry': vg.choice(rng, COUNTRIES, n),
+        'BillingCity': vg.choice(rng, CITIES, n),
+        'Phone': vg.phones(rng, n),
+        'Website': vg.concat('https://company', number, '.com'),
+        'Industry': vg.choice(rng, INDUSTRIES, n),
+        'AnnualRevenue': np.round(rng.uniform(100000, 50000000, n), 2),
+        'NumberOfEmployees': rng.integers(10, 50001, n),
+        '_source_system': pa.repeat('SALESFORCE', n),
+        '_ingestion_ts': pa.repeat(ingestion_ts, n),
+    })
+
+
+def _customer_chunk(rng, start, stop, country_index):
+    n = stop - start
+    number = np.arange(start + 1, stop + 1)
+    # Kept (1 byte per customer) so fact_sales.region can follow the customer
+    country_index[start:stop] = vg.sample_index(rng, len(COUNTRIES), n)
+    has_score = rng.random(n) > 0.3
+    return pa.table({
+        'customer_uid': customer_uids(np.arange(start, stop)),
+        'full_name': vg.concat('Customer ', number, ' Corp'),
+        'email': vg.concat('contact@customer', number, '.com'),
+        'phone': vg.phones(rng, n),
+        'country': vg.take(COUNTRIES, country_index[start:stop]),
+        'city': vg.choice(rng, CITIES, n),
+        'segment': vg.choice(rng, SEGMENTS, n),
+        'industry': vg.choice(rng, INDUSTRIES, n),
+        'status': vg.choice(rng, STATUSES, n, STATUS_WEIGHTS),
+        'source_systems': vg.choice(rng, SOURCE_SYSTEM_COMBOS, n),
+        'match_score': pa.array(np.round(rng.uniform(0.75, 1.0, n), 3), mask=~has_score),
+        'lifetime_value': np.round(rng.uniform(5000, 2000000, n), 2),
+        'employee_count': rng.integers(10, 50001, n),
+        'annual_revenue': np.round(rng.uniform(100000, 50000000, n), 2),
+        'created_date': vg.dates(rng, '2020-01-01', '2024-06-01', n),
+        'last_activity_date': vg.dates(rng, '2025-06-01', '2026-01-31', n),
+        'is_current': pa.repeat(True, n),
+    })
+
+
+def _products(rng):
+    """dim_product columns as arrays (80 rows; facts index into them)."""
+    n = N_PRODUCTS
+    category = vg.sample_index(rng, len(CATEGORIES), n)
+    unit_price = np.round(rng.uniform(99, 250000, n), 2)
+    cost_price = np.round(rng.uniform(50, np.minimum(unit_price * 0.7, unit_price - 1)), 2)
+    tier = np.where(rng.random(n) > 0.5, 'Premium', 'Standard')
+    return {
+        'product_id': vg.ids('PROD-', np.arange(1, n + 1), 4),
+        'product_name': vg.concat(vg.take(CATEGORIES, category), ' ', tier, ' v', rng.integers(1, 6, n)),
+        'category': vg.take(CATEGORIES, category),
+        'subcategory': vg.choice(rng, SUBCATEGORIES, n),
+        'unit_price': unit_price,
+        'cost_price': cost_price,
+        'margin_pct': np.round((unit_price - cost_price) / unit_price * 100, 1),
+        'is_recurring': np.isin(np.array(CATEGORIES)[category], RECURRING_CATEGORIES),
+        'launch_date': vg.dates(rng, '2020-01-01', '2025-06-01', n),
+        'is_active': rng.random(n) > 0.1,
+    }
+
+
+def _dim_date():
+    dates = pd.date_range('2024-01-01', '2026-01-31', freq='D')
+    return pa.Table.from_pandas(pd.DataFrame({
+        'date_key': dates.strftime('%Y-%m-%d'),
+        'year': dates.year,
+        'quarter': dates.quarter,
+        'month': dates.month,
+        'month_name': dates.strftime('%b'),
+        'week': dates.isocalendar().week.values.astype('int64'),
+        'day_of_week': dates.strftime('%A'),
+        'is_weekend': dates.dayofweek >= 5,
+    }), preserve_index=False)
+
+
+def _sales_chunk(rng, start, stop, products, country_index):
+    n = stop - start
+    customer = rng.integers(0, len(country_index), n)
+    product = rng.integers(0, N_PRODUCTS, n)
+    unit_price = products['unit_price'][product]
+    cost = products['cost_price'][product]
+    qty = rng.integers(1, 51, n)
+    discount = np.array(DISCOUNTS)[vg.sample_index(rng, len(DISCOUNTS), n)]
+    line_total = np.round(qty * unit_price * (1 - discount / 100), 2)
+    return pa.table({
+        'order_id': vg.ids('ORD-', np.arange(start + 1, stop + 1), 6),
+        'customer_uid': customer_uids(customer),
+        'product_id': pc.take(products['product_id'], pa.array(product)),
+        'order_date': vg.dates(rng, '2024-01-01', '2026-01-31', n),
+        'quantity': qty,
+        'unit_price': unit_price,
+        'discount_pct': discount,
+        'line_total': line_total,
+        'cost_total': np.round(qty * cost, 2),
+        'profit': np.round(line_total - qty * cost, 2),
+        'order_source': vg.choice(rng, SOURCES, n),
+        'region': vg.take(COUNTRIES, country_index[customer]),
+        'sales_rep': vg.concat('Rep_', rng.integers(1, 26, n)),
+    })
+
+
+def _interactions_chunk(rng, start, stop, n_customers):
+    n = stop - start
+    return pa.table({
+        'interaction_id': vg.ids('INT-', np.arange(start + 1, stop + 1), 6),
+        'customer_uid': customer_uids(rng.integers(0, n_customers, n)),
+        'interaction_date': vg.dates(rng, '2024-01-01', '2026-01-31', n),
+        'channel': vg.choice(rng, CHANNELS, n),
+        'interaction_type': vg.choice(rng, INTERACTION_TYPES, n),
+        'sentiment': vg.choice(rng, SENTIMENTS, n, [50, 35, 15]),
+        'resolution_hours': np.round(rng.uniform(0.5, 72, n), 1),
+        'csat_score': vg.choice(rng, CSAT_SCORES, n),
+    })
+
+
+def _match_pairs_chunk(rng, start, stop, n_customers):
+    n = stop - start
+    return pa.table({
+        'pair_id': vg.ids('MP-', np.arange(start + 1, stop + 1), 4),
+        'customer_a': customer_uids(rng.integers(0, n_customers, n)),
+        'customer_b': customer_uids(rng.integers(0, n_customers, n)),
+        'match_score': np.round(rng.uniform(0.65, 1.0, n), 3),
+        'match_tier': vg.choice(rng, MATCH_TIERS, n, [60, 25, 15]),
+        'name_similarity': np.round(rng.uniform(0.5, 1.0, n), 3),
+        'email_match': rng.random(n) < 0.5,
+        'phone_match': rng.random(n) < 0.5,
+        'address_similarity': np.round(rng.uniform(0.3, 1.0, n), 3),
+    })
+
+
+def generate_scaled(scale: int, output_dir: str = None, fmt: str = 'parquet',
+                    chunk_rows: int = vg.DEFAULT_CHUNK_ROWS, seed: int = vg.DEFAULT_SEED) -> dict:
+    """
+    Core tables at `scale`× the sample row counts, written chunk by chunk
+    to `output_dir/<layer>/<table>.<fmt>`. Returns rows, seconds and
+    rows/s per table. Memory is bounded by `chunk_rows` plus one byte per
+    customer (the country code fact_sales.region is drawn from).
+    """
+    output_dir = output_dir or os.path.join(SCALED_OUTPUT_DIR, f'{scale}x')
+    n_customers = N_CUSTOMERS * scale
+    n_sfdc = int(N_CUSTOMERS * 0.8) * scale
+    n_overlap = int(N_CUSTOMERS * 0.6) * scale
+    ingestion_ts = datetime.now().isoformat()
+
+    def out(layer, table):
+        return os.path.join(output_dir, layer, table)
+
+    def build(table, chunk_fn, *args):
+        return lambda index, start, stop: chunk_fn(vg.chunk_rng(seed, table, index), start, stop, *args)
+
+    print(f"  Generating core tables at {scale}x ({fmt}, {chunk_rows:,} rows per chunk)...")
+    report = {}
+    report['sap_kna1'] = vg.write_table(out('bronze', 'sap_kna1'), fmt, n_customers,
+                                        build('sap_kna1', _sap_chunk, ingestion_ts), chunk_rows)
+    report['sfdc_accounts'] = vg.write_table(out('bronze', 'sfdc_accounts'), fmt, n_sfdc,
+                                             build('sfdc_accounts', _sfdc_chunk, n_overlap, ingestion_ts),
+                                             chunk_rows)
+
+    country_index = np.empty(n_customers, dtype=np.int8)
+    report['dim_customer'] = vg.write_table(out('gold', 'dim_customer'), fmt, n_customers,
+                                            build('dim_customer', _customer_chunk, country_index), chunk_rows)
+
+    # Fixed-size tables: built once, each chunk writes its slice
+    products = _products(vg.chunk_rng(seed, 'dim_product'))
+    dim_product = pa.table(products)
+    report['dim_product'] = vg.write_table(out('gold', 'dim_product'), fmt, dim_product.num_rows,
+                                           lambda _, start, stop: dim_product.slice(start, stop - start),
+                                           chunk_rows)
+    dim_date = _dim_date()
+    report['dim_date'] = vg.write_table(out('gold', 'dim_date'), fmt, dim_date.num_rows,
+                                        lambda _, start, stop: dim_date.slice(start, stop - start), chunk_rows)
+
+    report['fact_sales'] = vg.write_table(out('gold', 'fact_sales'), fmt, N_ORDERS * scale,
+                                          build('fact_sales', _sales_chunk, products, country_index), chunk_rows)
+    report['fact_interactions'] = vg.write_table(out('gold', 'fact_interactions'), fmt, N_INTERACTIONS * scale,
+                                                 build('fact_interactions', _interactions_chunk, n_customers),
+                                                 chunk_rows)
+    report['match_pairs'] = vg.write_table(out('mdm', 'match_pairs'), fmt, N_MATCH_PAIRS * scale,
+                                           build('match_pairs', _match_pairs_chunk, n_customers), chunk_rows)
+    return report
+
+
 def main():
-    """Generate all core data."""
+    """Generate all core data; returns dim_customer for the downstream generators."""
     print("=" * 60)
     print("CORE DATA GENERATION — Bronze → Silver → MDM → Gold")
     print("=" * 60)
@@ -256,7 +503,18 @@ def main():
 
     print("\n✅ Core data generation complete!")
     print(f"   Output: {OUTPUT_DIR}")
+    return pd.DataFrame(customers)
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Generate the core Lakehouse tables')
+    parser.add_argument('--scale', type=int, help='Vectorized mode: N× the sample row counts')
+    parser.add_argument('--output-dir', help='Scale mode output (default: data/scaled/<N>x)')
+    parser.add_argument('--format', default='parquet', choices=['parquet', 'csv'])
+    parser.add_argument('--chunk-rows', type=int, default=vg.DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=vg.DEFAULT_SEED)
+    args = parser.parse_args()
+    if args.scale:
+        generate_scaled(args.scale, args.output_dir, args.format, args.chunk_rows, args.seed)
+    else:
+        main()
@@ -12,18 +12,140 @@ Lifecycle Stages:
   At-Risk   → 45-90 day activity gap
   Dormant   → 90+ day activity gap
   Churned   → Cancelled / lost customers
+
+The scoring is vectorized (`score_lifecycle`): datetime64 column
+arithmetic, np.select over STAGE_RULES, and one batched draw per random
+column. It is a pure function of a dim_customer DataFrame and an RNG, so
+the same logic runs here, over a real dim_customer, or as a Spark Gold
+job via `lifecycle_map_in_pandas` (mapInPandas).
 """
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
 import os
 
 np.random.seed(42)
-random.seed(42)
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'gold')
+REF_DATE = np.datetime64('2026-02-01', 'D')
+
+# ── Stage rules, first match wins: (stage, churn_risk low, high) ──
+# Conditions are built in score_lifecycle; Growing is the default.
+STAGE_RULES = [
+    ('Churned', 1.0, 1.0),          # status == 'Churned'
+    ('Onboarding', 0.05, 0.25),     # status == 'New' and tenure < 3 months
+    ('Activated', 0.05, 0.25),      # status == 'New'
+    ('Dormant', 0.60, 0.95),        # 90+ days since last activity
+    ('At-Risk', 0.30, 0.65),        # 45+ days since last activity
+    ('Champion', 0.01, 0.10),       # tenure > 24 months
+    ('Loyal', 0.05, 0.20),          # tenure > 12 months
+]
+DEFAULT_STAGE = ('Growing', 0.10, 0.35)
+NPS_CHOICES = [np.nan] + list(range(0, 11))
+
+LIFECYCLE_SCHEMA = (
+    'customer_uid string, cohort_month string, cohort_quarter string, tenure_days bigint, '
+    'tenure_months bigint, lifecycle_stage string, churn_risk_score double, churn_risk_tier string, '
+    'total_orders bigint, repeat_orders bigint, is_repeat_customer boolean, first_order_date string, '
+    'last_order_date string, days_since_last_order bigint, avg_order_frequency_days double, '
+    'predicted_ltv_12mo double, nps_score double, health_score double'
+)
+
+
+def _days(values) -> np.ndarray:
+    """Date strings / datetimes → datetime64[D]."""
+    return pd.to_datetime(values).to_numpy().astype('datetime64[D]')
+
+
+def _iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days, unit='D')
+
+
+def score_lifecycle(customers: pd.DataFrame, rng: np.random.Generator = None,
+                    ref_date=REF_DATE) -> pd.DataFrame:
+    """
+    Lifecycle rows for `customers` (needs customer_uid, status,
+    created_date, last_activity_date, lifetime_value).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n = len(customers)
+    ref_date = np.datetime64(ref_date, 'D')
+    created = _days(customers['created_date'])
+    last_activity = _days(customers['last_activity_date'])
+    status = customers['status'].to_numpy()
+
+    tenure_days = (ref_date - created).astype(np.int64)
+    tenure_months = tenure_days // 30
+    days_since_activity = (ref_date - last_activity).astype(np.int64)
+
+    # ── Lifecycle stage assignment logic ──
+    churned = status == 'Churned'
+    new = status == 'New'
+    conditions = [
+        churned,
+        new & (tenure_months < 3),
+        new,
+        days_since_activity > 90,
+        days_since_activity > 45,
+        tenure_months > 24,
+        tenure_months > 12,
+    ]
+    stage = np.select(conditions, [r[0] for r in STAGE_RULES], DEFAULT_STAGE[0])
+    low = np.select(conditions, [r[1] for r in STAGE_RULES], DEFAULT_STAGE[1])
+    high = np.select(conditions, [r[2] for r in STAGE_RULES], DEFAULT_STAGE[2])
+    churn_risk = np.round(rng.uniform(low, high), 3)
+    risk_tier = np.select([churn_risk >= 0.5, churn_risk >= 0.2], ['High', 'Medium'], 'Low')
+
+    # ── Order behavior ──
+    total_orders = np.where(churned, rng.integers(1, 6, n), rng.integers(1, 31, n))
+    repeat_orders = np.maximum(0, total_orders - 1)
+
+    first_order = created + rng.integers(1, np.maximum(np.minimum(90, tenure_days), 1) + 1)
+    last_order = np.maximum(last_activity - rng.integers(0, 61, n), first_order)
+
+    health_score = np.clip(np.round(100 - churn_risk * 100 + rng.uniform(-5, 5, n), 1), 0, 100)
+
+    # Cohort labels are formatted once per distinct month, not per row
+    months, cohort = np.unique(created.astype('datetime64[M]'), return_inverse=True)
+    month_index = months.astype(np.int64)
+    quarter_labels = [f'Q{m % 12 // 3 + 1} {m // 12 + 1970}' for m in month_index]
+
+    return pd.DataFrame({
+        'customer_uid': customers['customer_uid'].to_numpy(),
+        'cohort_month': np.datetime_as_string(months, unit='M')[cohort],
+        'cohort_quarter': np.array(quarter_labels, dtype=object)[cohort],
+        'tenure_days': tenure_days,
+        'tenure_months': tenure_months,
+        'lifecycle_stage': stage,
+        'churn_risk_score': churn_risk,
+        'churn_risk_tier': risk_tier,
+        'total_orders': total_orders,
+        'repeat_orders': repeat_orders,
+        'is_repeat_customer': repeat_orders > 0,
+        'first_order_date': _iso(first_order),
+        'last_order_date': _iso(last_order),
+        'days_since_last_order': (ref_date - last_order).astype(np.int64),
+        'avg_order_frequency_days': np.round(tenure_days / np.maximum(total_orders, 1), 1),
+        'predicted_ltv_12mo': np.round(customers['lifetime_value'].to_numpy(dtype=float)
+                                       * rng.uniform(0.8, 1.4, n), 2),
+        'nps_score': np.array(NPS_CHOICES)[rng.integers(0, len(NPS_CHOICES), n)],
+        'health_score': health_score,
+    })
+
+
+def lifecycle_map_in_pandas(seed: int = 42, ref_date=REF_DATE):
+    """
+    score_lifecycle as a mapInPandas function, one RNG stream per partition:
+
+        dim_customer.mapInPandas(lifecycle_map_in_pandas(), LIFECYCLE_SCHEMA)
+    """
+    def score_partition(batches):
+        from pyspark import TaskContext
+        context = TaskContext.get()
+        rng = np.random.default_rng([seed, context.partitionId() if context else 0])
+        for batch in batches:
+            yield score_lifecycle(batch, rng, ref_date)
+    return score_partition
 
 
 def generate_lifecycle(customers_df: pd.DataFrame):
@@ -31,73 +153,8 @@ def generate_lifecycle(customers_df: pd.DataFrame):
     print("  Generating customer lifecycle data...")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    records = []
-    ref_date = datetime(2026, 2, 1)
-
-    for _, c in customers_df.iterrows():
-        created = datetime.strptime(c['created_date'], '%Y-%m-%d')
-        last_activity = datetime.strptime(c['last_activity_date'], '%Y-%m-%d')
-        tenure_days = (ref_date - created).days
-        tenure_months = tenure_days // 30
-        days_since_activity = (ref_date - last_activity).days
-
-        # ── Lifecycle stage assignment logic ──
-        if c['status'] == 'Churned':
-            stage = 'Churned'
-            churn_risk = 1.0
-        elif c['status'] == 'New':
-            stage = 'Onboarding' if tenure_months < 3 else 'Activated'
-            churn_risk = round(random.uniform(0.05, 0.25), 3)
-        elif days_since_activity > 90:
-            stage = 'Dormant'
-            churn_risk = round(random.uniform(0.60, 0.95), 3)
-        elif days_since_activity > 45:
-            stage = 'At-Risk'
-            churn_risk = round(random.uniform(0.30, 0.65), 3)
-        elif tenure_months > 24:
-            stage = 'Champion'
-            churn_risk = round(random.uniform(0.01, 0.10), 3)
-        elif tenure_months > 12:
-            stage = 'Loyal'
-            churn_risk = round(random.uniform(0.05, 0.20), 3)
-        else:
-            stage = 'Growing'
-            churn_risk = round(random.uniform(0.10, 0.35), 3)
-
-        # ── Order behavior ──
-        total_orders = random.randint(1, 30) if c['status'] != 'Churned' else random.randint(1, 5)
-        repeat_orders = max(0, total_orders - 1)
-
-        first_order = created + timedelta(days=random.randint(1, min(90, tenure_days)))
-        last_order = last_activity - timedelta(days=random.randint(0, 60))
-        if last_order < first_order:
-            last_order = first_order
-
-        health_score = round(100 - (churn_risk * 100) + random.uniform(-5, 5), 1)
-        health_score = max(0, min(100, health_score))
-
-        records.append({
-            'customer_uid': c['customer_uid'],
-            'cohort_month': created.strftime('%Y-%m'),
-            'cohort_quarter': f"Q{(created.month - 1) // 3 + 1} {created.year}",
-            'tenure_days': tenure_days,
-            'tenure_months': tenure_months,
-            'lifecycle_stage': stage,
-            'churn_risk_score': churn_risk,
-            'churn_risk_tier': 'High' if churn_risk >= 0.5 else 'Medium' if churn_risk >= 0.2 else 'Low',
-            'total_orders': total_orders,
-            'repeat_orders': repeat_orders,
-            'is_repeat_customer': repeat_orders > 0,
-            'first_order_date': first_order.strftime('%Y-%m-%d'),
-            'last_order_date': last_order.strftime('%Y-%m-%d'),
-            'days_since_last_order': (ref_date - last_order).days,
-            'avg_order_frequency_days': round(tenure_days / max(total_orders, 1), 1),
-            'predicted_ltv_12mo': round(c['lifetime_value'] * random.uniform(0.8, 1.4), 2),
-            'nps_score': random.choice([None] + list(range(0, 11))),
-            'health_score': health_score,
-        })
-
-    df = pd.DataFrame(records)
+    # Seeded from the global stream, so generate_all's per-generator seed applies
+    df = score_lifecycle(customers_df, np.random.default_rng(np.random.randint(2**31)))
     df.to_csv(os.path.join(OUTPUT_DIR, 'dim_customer_lifecycle.csv'), index=False)
 
     print(f"    Stages: {df['lifecycle_stage'].value_counts().to_dict()}")
@@ -0,0 +1,145 @@
+"""
+Vectorized generation helpers for the scale-factor generators.
+
+  - NumPy sampling straight into Arrow arrays: strings (ids, phones,
+    dates) are assembled by Arrow compute kernels, never row by row in
+    Python.
+  - Deterministic RNG streams per (seed, table, chunk), so each chunk's
+    output is reproducible on its own: the result does not depend on
+    which process generates it or in what order.
+  - ChunkedTableWriter streams chunks to one Parquet or CSV file per
+    table, so memory is bounded by the chunk size, not the row count.
+"""
+
+import os
+import time
+import zlib
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_ROWS = 1_000_000
+UID_SPACE = 10**12                 # 12-digit surrogate keys
+UID_MULTIPLIER = 2_654_435_761     # Odd and not a multiple of 5 → bijection mod 10**12
+
+
+# ─── Randomness ───
+def chunk_rng(seed: int, table: str, chunk: int = 0) -> np.random.Generator:
+    """Independent, reproducible stream for one chunk of one table."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(zlib.crc32(table.encode()), chunk)))
+
+
+def iter_chunks(n_rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """(chunk index, first row, end row) covering range(n_rows)."""
+    for index, start in enumerate(range(0, n_rows, chunk_rows)):
+        yield index, start, min(start + chunk_rows, n_rows)
+
+
+def sample_index(rng, k: int, n: int, weights=None) -> np.ndarray:
+    """`n` draws from range(k), uniform or by relative `weights` (random.choice/choices)."""
+    if weights is None:
+        return rng.integers(0, k, n)
+    p = np.asarray(weights, dtype=float)
+    return rng.choice(k, size=n, p=p / p.sum())
+
+
+def take(values: list, index: np.ndarray) -> pa.Array:
+    """values[index] as an Arrow array (None entries become nulls)."""
+    return pc.take(pa.array(values), pa.array(index))
+
+
+def choice(rng, values: list, n: int, weights=None) -> pa.Array:
+    return take(values, sample_index(rng, len(values), n, weights))
+
+
+# ─── Formatting (Arrow kernels) ───
+def as_string(values) -> pa.Array:
+    return pc.cast(pa.array(values) if isinstance(values, np.ndarray) else values, pa.string())
+
+
+def concat(*parts) -> pa.Array:
+    """Element-wise string concatenation of literals, NumPy and Arrow arrays."""
+    return pc.binary_join_element_wise(*[p if isinstance(p, str) else as_string(p) for p in parts], '')
+
+
+def zero_pad(numbers, width: int) -> pa.Array:
+    return pc.utf8_lpad(as_string(numbers), width=width, padding='0')
+
+
+def ids(prefix: str, numbers, width: int) -> pa.Array:
+    """prefix + zero-padded number, e.g. ids('ORD-', 1, 6) → 'ORD-000001'."""
+    return concat(prefix, zero_pad(numbers, width))
+
+
+def surrogate_ids(prefix: str, index: np.ndarray, salt: int = 0) -> pa.Array:
+    """
+    Unique 12-digit keys derived from the row index (a bijection, so no
+    lookup table is kept and other tables can re-derive the key of any
+    row from its index alone).
+    """
+    scrambled = (index.astype(np.uint64) * np.uint64(UID_MULTIPLIER) + np.uint64(salt)) % np.uint64(UID_SPACE)
+    return ids(prefix, scrambled, 12)
+
+
+def dates(rng, start: str, end: str, n: int) -> pa.Array:
+    """Uniform calendar days in [start, end] as 'YYYY-MM-DD' strings (rand_date)."""
+    first = np.datetime64(start, 'D')
+    span = int((np.datetime64(end, 'D') - first).astype(int))
+    return as_string(first + rng.integers(0, span + 1, n))
+
+
+def phones(rng, n: int) -> pa.Array:
+    """'+1-AAA-BBB-CCCC' with the same digit ranges as the row-wise generators."""
+    return concat('+1-', rng.integers(200, 1000, n), '-', rng.integers(100, 1000, n),
+                  '-', rng.integers(1000, 10000, n))
+
+
+# ─── Output ───
+class ChunkedTableWriter:
+    """Stream Arrow chunks of one table into `<path>.parquet` (a row group per chunk) or `<path>.csv`."""
+
+    def __init__(self, path: str, fmt: str = 'parquet'):
+        if fmt not in ('parquet', 'csv'):
+            raise ValueError(f'Unknown format: {fmt}')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = f'{path}.{fmt}'
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+
+    def write(self, table: pa.Table):
+        if self._writer is None:
+            self._writer = (pq.ParquetWriter(self.path, table.schema) if self.fmt == 'parquet'
+                            else pacsv.CSVWriter(self.path, table.schema))
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(path: str, fmt: str, n_rows: int, build_chunk, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    Generate `n_rows` rows with `build_chunk(chunk_index, start, stop)` → pa.Table
+    and stream them to `path`; returns {'rows', 'seconds', 'rows_per_s', 'path'}.
+    """
+    started = time.perf_counter()
+    with ChunkedTableWriter(path, fmt) as writer:
+        for index, start, stop in iter_chunks(n_rows, chunk_rows):
+            writer.write(build_chunk(index, start, stop))
+    seconds = time.perf_counter() - started
+    stats = {'rows': writer.rows, 'seconds': round(seconds, 3),
+             'rows_per_s': round(writer.rows / seconds) if seconds else None, 'path': writer.path}
+    print(f"    {os.path.basename(path):<22} {stats['rows']:>13,} rows  {stats['rows_per_s'] or 0:>12,} rows/s")
+    return stats
@@ -0,0 +1,222 @@
+"""
+Delta Table Layout & Maintenance
+==================================
+Physical layout for the Bronze / Silver / MDM Delta tables, and the job
+that keeps it healthy.
+
+Layout choices (TABLE_LAYOUTS):
+  - Partition only where a column is both low-cardinality and evenly
+    spread. Bronze KNA1 moves from `LAND1` (most customers are US) to
+    `_ingestion_date`: append-only, even by construction, and it prunes
+    the incremental Silver read.
+    Existing tables are migrated with `--relayout`; the SAP extraction
+    refuses to append to Bronze KNA1 until that has run.
+  - Everything else is unpartitioned and Z-ordered on its lookup/join
+    key, so Delta data skipping turns point lookups and MERGE joins into
+    a handful of files (`name_soundex` for the match input, `id_a`/`id_b`
+    for match pairs, ...).
+
+Maintenance (`main`):
+  OPTIMIZE ... ZORDER BY bin-packs the small files left by appends and
+  MERGE rewrites, and re-clusters the data. For every table the report
+  records file count, table bytes and the bytes scanned by a
+  point-lookup probe on the Z-order key, before and after.
+  `--compact-cdc-hours` also merges the per-invocation Salesforce CDC
+  objects of closed hour partitions into one object each.
+"""
+
+import argparse
+
+from pyspark.sql.functions import col
+from delta.tables import DeltaTable
+
+from run_report import new_run_report, write_run_report
+from spark_session import LAKEHOUSE_ROOT, get_spark, job_group, job_group_metrics
+
+RUN_REPORT_PREFIX = f'{LAKEHOUSE_ROOT}/_maintenance/run_reports/'
+
+# OPTIMIZE output file size (Delta's default of 1 GB is too coarse for these tables)
+OPTIMIZE_MAX_FILE_BYTES = 256 * 2**20
+
+TABLE_LAYOUTS = {
+    'bronze_sap_kna1': {
+        'path': f'{LAKEHOUSE_ROOT}/bronze/sap/kna1/',
+        'partition_by': ['_ingestion_date'],
+        'zorder_by': ['KUNNR'],
+    },
+    'silver_customer_master': {
+        'path': f'{LAKEHOUSE_ROOT}/silver/customer/customer_master/',
+        'partition_by': [],
+        'zorder_by': ['name_soundex'],
+    },
+    'mdm_block_index': {
+        'path': f'{LAKEHOUSE_ROOT}/mdm/customer/block_index/',
+        'partition_by': [],
+        'zorder_by': ['customer_id'],
+    },
+    'mdm_match_pairs': {
+        'path': f'{LAKEHOUSE_ROOT}/mdm/customer/match_pairs/',
+        'partition_by': [],
+        'zorder_by': ['id_a', 'id_b'],
+    },
+    'mdm_crosswalk': {
+        'path': f'{LAKEHOUSE_ROOT}/mdm/customer/crosswalk/',
+        'partition_by': [],
+        'zorder_by': ['customer_id'],
+    },
+    'mdm_golden_records': {
+        'path': f'{LAKEHOUSE_ROOT}/mdm/customer/golden_records/',
+        'partition_by': [],
+        'zorder_by': ['customer_uid'],
+    },
+}
+
+
+def partition_columns(table: str) -> list:
+    """Partition columns writers should use for `table`."""
+    return TABLE_LAYOUTS[table]['partition_by']
+
+
+# ═══════════════════════════════════════
+# Measurements
+# ═══════════════════════════════════════
+
+def table_detail(spark, path: str) -> dict:
+    detail = spark.sql(f'DESCRIBE DETAIL delta.`{path}`').first()
+    return {'files': detail['numFiles'], 'bytes': detail['sizeInBytes'],
+            'partition_columns': list(detail['partitionColumns'])}
+
+
+def bytes_scanned(spark, df, label: str) -> int:
+    """Input bytes read by fully evaluating `df`, from the Spark status REST API."""
+    group = f'layout-probe-{label}'
+    with job_group(spark, group):
+        df.write.format('noop').mode('overwrite').save()
+    return job_group_metrics(spark, group)['input_bytes']
+
+
+def probe_lookup(spark, path: str, zorder_by: list, label: str, value=None):
+    """Bytes scanned by an equality lookup on the first Z-order column; returns (bytes, value)."""
+    df = spark.read.format('delta').load(path)
+    key = zorder_by[0]
+    if value is None:
+        row = df.select(key).where(col(key).isNotNull()).limit(1).first()
+        if row is None:
+            return 0, None
+        value = row[0]
+    return bytes_scanned(spark, df.filter(col(key) == value), label), value
+
+
+# ═══════════════════════════════════════
+# Layout changes
+# ═══════════════════════════════════════
+
+def apply_partitioning(spark, table: str) -> bool:
+    """
+    Rewrite `table` if its partitioning differs from TABLE_LAYOUTS (one-off
+    migration, e.g. Bronze KNA1 from LAND1 to _ingestion_date). Returns
+    True when the table was rewritten.
+    """
+    layout = TABLE_LAYOUTS[table]
+    current = table_detail(spark, layout['path'])['partition_columns']
+    if current == layout['partition_by']:
+        return False
+
+    df = spark.read.format('delta').load(layout['path'])
+    if '_ingestion_date' in layout['partition_by'] and '_ingestion_date' not in df.columns:
+        df = df.withColumn('_ingestion_date', col('_ingestion_ts').cast('date'))
+    print(f"Repartitioning {table}: {current} → {layout['partition_by']}")
+    (df.write.format('delta').mode('overwrite')
+     .option('overwriteSchema', 'true')
+     .partitionBy(*layout['partition_by'])
+     .save(layout['path']))
+    return True
+
+
+def require_partitioning(table: str, current: list):
+    """Raise if an existing table's partition columns differ from the registry."""
+    expected = partition_columns(table)
+    if list(current) != expected:
+        raise RuntimeError(
+            f"{table} at {TABLE_LAYOUTS[table]['path']} is partitioned by {list(current)}, "
+            f"but writers now use {expected}. Run `delta_layout.py --relayout --tables {table}` "
+            f"first; appends with the new partitioning fail until then.")
+
+
+def check_partitioning(spark, table: str):
+    """require_partitioning() against the table on disk; a table that does not exist yet passes."""
+    path = TABLE_LAYOUTS[table]['path']
+    if DeltaTable.isDeltaTable(spark, path):
+        require_partitioning(table, table_detail(spark, path)['partition_columns'])
+
+
+def optimize_table(spark, table: str) -> dict:
+    """OPTIMIZE + ZORDER one table; returns before/after files, bytes and probe scan."""
+    layout = TABLE_LAYOUTS[table]
+    path = layout['path']
+
+    before = table_detail(spark, path)
+    probe_before, value = probe_lookup(spark, path, layout['zorder_by'], f'{table}-before')
+
+    optimizer = DeltaTable.forPath(spark, path).optimize()
+    if layout['zorder_by']:
+        result = optimizer.executeZOrderBy(*layout['zorder_by'])
+    else:
+        result = optimizer.executeCompaction()
+    metrics = result.select('metrics.numFilesAdded', 'metrics.numFilesRemoved').first().asDict()
+
+    after = table_detail(spark, path)
+    probe_after, _ = probe_lookup(spark, path, layout['zorder_by'], f'{table}-after', value)
+
+    return {
+        'zorder_by': layout['zorder_by'],
+        'files_before': before['files'],
+        'files_after': after['files'],
+        'bytes_before': before['bytes'],
+        'bytes_after': after['bytes'],
+        'probe': {'column': layout['zorder_by'][0], 'value': value,
+                  'bytes_scanned_before': probe_before, 'bytes_scanned_after': probe_after},
+        **metrics,
+    }
+
+
+# ═══════════════════════════════════════
+# Main
+# ═══════════════════════════════════════
+
+def main(tables: list = None, relayout: bool = False, compact_cdc_hours: int = 0) -> dict:
+    spark = get_spark('delta-layout-maintenance')
+    spark.conf.set('spark.databricks.delta.optimize.maxFileSize', str(OPTIMIZE_MAX_FILE_BYTES))
+    report = new_run_report('delta-layout-maintenance', tables={})
+
+    for table in tables or TABLE_LAYOUTS:
+        path = TABLE_LAYOUTS[table]['path']
+        if not DeltaTable.isDeltaTable(spark, path):
+            print(f'Skipping {table}: no Delta table at {path}')
+            continue
+        if relayout and apply_partitioning(spark, table):
+            report['tables'].setdefault(table, {})['repartitioned'] = True
+        stats = optimize_table(spark, table)
+        report['tables'].setdefault(table, {}).update(stats)
+        print(f"{table}: files {stats['files_before']} → {stats['files_after']}, "
+              f"probe scan {stats['probe']['bytes_scanned_before']:,} → "
+              f"{stats['probe']['bytes_scanned_after']:,} bytes")
+
+    if compact_cdc_hours:
+        # Salesforce CDC lands as JSON-lines objects, not Delta: merge closed hours
+        from sfdc_extraction import compact_cdc
+        report['cdc_compaction'] = compact_cdc(hours_back=compact_cdc_hours)
+
+    write_run_report(report, f"{RUN_REPORT_PREFIX}{report['run_id']}.json")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OPTIMIZE / Z-ORDER the lakehouse Delta tables')
+    parser.add_argument('--tables', nargs='*', choices=list(TABLE_LAYOUTS), help='Default: all tables')
+    parser.add_argument('--relayout', action='store_true',
+                        help='Rewrite tables whose partitioning differs from TABLE_LAYOUTS first')
+    parser.add_argument('--compact-cdc-hours', type=int, default=0,
+                        help='Also compact Salesforce CDC objects of the last N closed hours')
+    args = parser.parse_args()
+    main(tables=args.tables, relayout=args.relayout, compact_cdc_hours=args.compact_cdc_hours)
@@ -0,0 +1,185 @@
+"""
+Local Medallion Pipeline
+==========================
+Bronze → Silver → MDM matching → golden records in one Spark driver
+against a local directory, for development and benchmarking without
+Glue or S3.
+
+  1. Load the sample Bronze extracts (data/bronze/*.csv) into the same
+     layout the extraction jobs write: SAP KNA1 as a Delta table
+     partitioned by `_ingestion_date`, Salesforce Accounts as Parquet
+     parts under one batch prefix.
+     With `scale` > 1 each sample row is replicated into a larger
+     synthetic population (see `scale_sample`).
+  2. silver_transform (full) → mdm_matching → mdm_golden_record, all in
+     the one session from spark_session.get_spark(local=True).
+
+Every stage runs in its own Spark job group, so the returned stage
+results carry wall time plus input / shuffle bytes and peak execution
+memory (benchmarks/bench_medallion.py builds on this).
+
+The job modules read LAKEHOUSE_ROOT when imported, so this module sets it
+first and imports them lazily.
+
+Usage:
+  python local_pipeline.py --root /tmp/lakehouse [--scoring-mode spark_sql]
+"""
+
+import argparse
+import importlib
+import math
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SAMPLE_BRONZE_DIR = os.path.join(REPO_ROOT, 'data', 'bronze')
+DEFAULT_LOCAL_ROOT = os.path.join(REPO_ROOT, 'lakehouse_local')
+
+SAMPLE_SOURCES = {
+    # csv: sample file, layout: delta_layout table (None = Parquet parts),
+    # id / name / contact / phone: columns perturbed when scaling up
+    'SAP_ECC': {'csv': 'sap_kna1.csv', 'layout': 'bronze_sap_kna1',
+                'id': 'KUNNR', 'name': 'NAME1', 'contact': 'SMTP_ADDR', 'phone': 'TELF1'},
+    'SALESFORCE': {'csv': 'sfdc_accounts.csv', 'layout': None,
+                   'id': 'Id', 'name': 'Name', 'contact': 'Website', 'phone': 'Phone'},
+}
+LOCAL_BATCH_ID = 'batch_local'
+
+# ── Scale-factor synthesis ──
+DUPLICATE_PCT = 10                 # Share of synthetic copies that are near-duplicates
+COPIES_PER_PARTITION = 50          # Output partitioning of the replicated sample
+NAME_SYLLABLES = ['AL', 'BRO', 'CA', 'DEN', 'EV', 'FOR', 'GAL', 'HAR', 'IN', 'JO', 'KEN', 'LOR', 'MAR',
+                  'NOR', 'OS', 'PAR', 'QUIN', 'ROS', 'SAL', 'TOR', 'UL', 'VAN', 'WES', 'XAN', 'YOR', 'ZEL']
+
+
+def configure_local(root: str):
+    """Point every job module at `root`; must run before any of them is imported."""
+    root = os.path.abspath(root)
+    loaded = sys.modules.get('spark_session')
+    if loaded is not None and loaded.LAKEHOUSE_ROOT != root:
+        raise RuntimeError(f'spark_session already imported with LAKEHOUSE_ROOT={loaded.LAKEHOUSE_ROOT}')
+    os.environ['LAKEHOUSE_ROOT'] = root
+    os.environ['PIPELINE_LOCAL'] = '1'
+    return root
+
+
+def _required_columns(mapping: dict) -> list:
+    """
+    Bronze column names a source mapping reads directly. SQL expressions
+    and alternative-name tuples (resolved against the schema) are excluded.
+    """
+    return [source for source, _ in mapping['columns'].values()
+            if isinstance(source, str) and source.isidentifier()]
+
+
+def scale_sample(df, roles: dict, scale: int):
+    """
+    `scale` copies of a sample source. Copy 0 is the original row; of the
+    others, DUPLICATE_PCT % are near-duplicates (last name character
+    dropped, same contact details) and the rest are new entities with a
+    synthetic name prefix and their own id, contact and phone — so
+    blocking and scoring see a growing population with a steady share of
+    true matches rather than `scale` identical clusters.
+    """
+    from pyspark.sql.functions import (
+        abs as abs_, array, col, concat, concat_ws, element_at, expr, floor, lit, lpad, when, xxhash64,
+    )
+
+    if scale <= 1:
+        return df
+    replica = col('_replica')
+    draw = abs_(xxhash64(col(roles['id']), replica))
+    duplicate = (replica > 0) & (draw % 100 < DUPLICATE_PCT)
+    new_entity = (replica > 0) & ~duplicate
+
+    syllables = array(*[lit(s) for s in NAME_SYLLABLES])
+    n = len(NAME_SYLLABLES)
+    prefix = concat(*[element_at(syllables, (floor(draw / n ** i) % n + 1).cast('int')) for i in range(3)])
+
+    id_col, name, contact, phone = roles['id'], roles['name'], roles['contact'], roles['phone']
+    return (df.crossJoin(df.sparkSession.range(scale).withColumnRenamed('id', '_replica'))
+            .repartition(math.ceil(scale / COPIES_PER_PARTITION))
+            .withColumn(id_col, when(replica == 0, col(id_col))
+                        .otherwise(concat_ws('-', col(id_col), replica.cast('string'))))
+            .withColumn(name, when(new_entity, concat_ws(' ', prefix, col(name)))
+                        .when(duplicate, expr(f'substring({name}, 1, length({name}) - 1)'))
+                        .otherwise(col(name)))
+            .withColumn(contact, when(new_entity, concat(replica.cast('string'), lit('.'), col(contact)))
+                        .otherwise(col(contact)))
+            .withColumn(phone, when(new_entity, concat(col(phone), lpad((draw % 1000).cast('string'), 3, '0')))
+                        .otherwise(col(phone)))
+            .drop('_replica'))
+
+
+def load_sample_bronze(spark, data_dir: str = SAMPLE_BRONZE_DIR, scale: int = 1) -> dict:
+    """Write the sample CSVs (× `scale`) to the local Bronze paths; returns rows per source."""
+    from pyspark.sql.functions import col, lit, to_date
+    from silver_mappings import SOURCE_MAPPINGS
+    from delta_layout import partition_columns
+
+    loaded = {}
+    for source_system, roles in SAMPLE_SOURCES.items():
+        mapping = SOURCE_MAPPINGS[source_system]
+        layout = roles['layout']
+        df = (spark.read.option('header', 'true').csv(os.path.join(data_dir, roles['csv']))
+              .withColumn('_ingestion_ts', col('_ingestion_ts').cast('timestamp')))
+        df = scale_sample(df, roles, scale)
+        # The samples omit some columns the extraction jobs land (STRAS, BillingStreet)
+        for name in _required_columns(mapping):
+            if name not in df.columns:
+                df = df.withColumn(name, lit(None).cast('string'))
+        df = df.withColumn('_batch_id', lit(LOCAL_BATCH_ID))
+
+        if mapping['format'] == 'delta':
+            df = df.withColumn('_ingestion_date', to_date('_ingestion_ts'))
+            (df.write.format('delta').mode('overwrite')
+             .option('overwriteSchema', 'true')
+             .partitionBy(*partition_columns(layout))
+             .save(mapping['path']))
+        else:
+            df.write.mode('overwrite').parquet(f"{mapping['path']}{LOCAL_BATCH_ID}/")
+        loaded[source_system] = df.count()
+        print(f"Bronze {source_system}: {loaded[source_system]} rows → {mapping['path']}")
+    return loaded
+
+
+def run_local_pipeline(root: str = DEFAULT_LOCAL_ROOT, data_dir: str = SAMPLE_BRONZE_DIR,
+                       scoring_mode: str = 'spark_sql', scale: int = 1) -> dict:
+    """
+    Run the whole medallion flow locally. Returns, per stage, wall time,
+    the Spark stage metrics of its job group and the job's own result.
+    """
+    configure_local(root)
+    from spark_session import get_spark, job_group, job_group_metrics
+    spark = get_spark('mdm-local-pipeline', local=True)
+
+    stages = {}
+
+    def timed(stage, fn, *args, **kwargs):
+        group = f'local-pipeline-{stage}'
+        started = time.perf_counter()
+        with job_group(spark, group):
+            result = fn(*args, **kwargs)
+        stages[stage] = {'seconds': round(time.perf_counter() - started, 2),
+                         **job_group_metrics(spark, group), 'result': result}
+        print(f"── {stage}: {stages[stage]['seconds']}s, "
+              f"shuffle write {stages[stage]['shuffle_write_bytes']:,} bytes")
+        return result
+
+    timed('bronze', load_sample_bronze, spark, data_dir, scale)
+    timed('silver', importlib.import_module('silver_transform').transform_customer_silver, incremental=False)
+    timed('matching', importlib.import_module('mdm_matching').main, scoring_mode=scoring_mode)
+    timed('golden', importlib.import_module('mdm_golden_record').main)
+    return stages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run Bronze → Silver → MDM → golden records locally')
+    parser.add_argument('--root', default=DEFAULT_LOCAL_ROOT, help='Local lakehouse directory')
+    parser.add_argument('--data-dir', default=SAMPLE_BRONZE_DIR, help='Directory with the sample Bronze CSVs')
+    parser.add_argument('--scoring-mode', default='spark_sql',
+                        choices=['vectorized', 'spark_sql', 'spark_sql_levenshtein', 'python_udf'])
+    parser.add_argument('--scale', type=int, default=1, help='Replicate the sample Bronze N times')
+    args = parser.parse_args()
+    run_local_pipeline(args.root, args.data_dir, args.scoring_mode, args.scale)
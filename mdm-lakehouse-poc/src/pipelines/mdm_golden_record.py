@@ -0,0 +1,205 @@
+"""
+MDM Entity Resolution & Golden Record Survivorship
+====================================================
+Turns pairwise AUTO_MERGE decisions into entity clusters and builds one
+golden record per cluster (input to the dbt `dim_customer` model).
+
+Stage 1: Clustering (connected components)
+  AUTO_MERGE pairs are edges; every Silver record is a vertex. Components
+  are found with the alternating Large-Star / Small-Star algorithm
+  (Kiveris et al., 2014), which converges in O(log² n) rounds and runs
+  entirely as DataFrame joins — edges never reach the driver. Each
+  cluster gets a deterministic `customer_uid` derived from its smallest
+  member id. Re-runs keep the key only while that member stays the
+  smallest in its cluster: merging two clusters, or losing the smallest
+  member, re-keys the cluster.
+
+Stage 2: Survivorship
+  Each golden attribute picks its value from the cluster member ranked
+  first by the configured rule (first non-null wins):
+    most_recent      → latest `_ingestion_ts`
+    most_complete    → most populated contact fields, then most recent
+    source_priority  → SOURCE_PRIORITY order, then most recent
+"""
+
+import argparse
+
+from pyspark.sql import DataFrame, Window
+from pyspark.sql.functions import (
+    col, lit, least, when, concat, sha2, substring, first, min as min_, max as max_,
+    avg, count, collect_set, array_join, array_sort, to_date,
+    coalesce,
+)
+
+from spark_session import LAKEHOUSE_ROOT, get_spark
+
+SILVER_PATH = f'{LAKEHOUSE_ROOT}/silver/customer/customer_master/'
+MATCH_PAIRS_PATH = f'{LAKEHOUSE_ROOT}/mdm/customer/match_pairs/'
+CROSSWALK_PATH = f'{LAKEHOUSE_ROOT}/mdm/customer/crosswalk/'
+GOLDEN_RECORDS_PATH = f'{LAKEHOUSE_ROOT}/mdm/customer/golden_records/'
+
+MAX_CC_ITERATIONS = 30
+
+# ── Survivorship configuration ──
+SOURCE_PRIORITY = ['SAP_ECC', 'SALESFORCE', 'ORACLE_CRM', 'ECOMMERCE']
+COMPLETENESS_FIELDS = ['full_name', 'email', 'phone', 'country', 'city', 'street_address']
+SURVIVORSHIP_RULES = {
+    'full_name': 'source_priority',
+    'email': 'most_recent',
+    'phone': 'most_recent',
+    'country': 'source_priority',
+    'city': 'most_complete',
+    'street_address': 'most_complete',
+}
+
+
+# ═══════════════════════════════════════
+# Stage 1: Connected components
+# ═══════════════════════════════════════
+
+def _large_star(edges: DataFrame) -> DataFrame:
+    """Connect every larger neighbour of u to the minimum of u's neighbourhood."""
+    both = edges.unionByName(edges.select(col('v').alias('u'), col('u').alias('v')))
+    mins = both.groupBy('u').agg(min_('v').alias('m')).withColumn('m', least('u', 'm'))
+    return (both.join(mins, 'u')
+            .filter(col('v') > col('u'))
+            .select(col('v').alias('u'), col('m').alias('v'))
+            .distinct())
+
+
+def _small_star(edges: DataFrame) -> DataFrame:
+    """Connect u and its smaller neighbours to the minimum of that set."""
+    mins = edges.groupBy('u').agg(min_('v').alias('m'))
+    linked = (edges.join(mins, 'u').select(col('v').alias('u'), col('m').alias('v'))
+              .unionByName(mins.select('u', col('m').alias('v'))))
+    return (linked.filter(col('u') != col('v'))
+            .select(when(col('u') > col('v'), col('u')).otherwise(col('v')).alias('u'),
+                    least('u', 'v').alias('v'))
+            .distinct())
+
+
+def connected_components(pairs: DataFrame, max_iterations: int = MAX_CC_ITERATIONS) -> DataFrame:
+    """
+    Map each vertex appearing in `pairs` (id_a, id_b) to its component's
+    smallest id. Returns (customer_id, component_id).
+    """
+    # Canonical undirected edges: u > v
+    edges = (pairs
+             .filter(col('id_a') != col('id_b'))
+             .select(when(col('id_a') > col('id_b'), col('id_a')).otherwise(col('id_b')).alias('u'),
+                     least('id_a', 'id_b').alias('v'))
+             .distinct()
+             .localCheckpoint())
+
+    for iteration in range(max_iterations):
+        updated = _small_star(_large_star(edges)).localCheckpoint()
+        converged = (updated.exceptAll(edges).isEmpty()
+                     and edges.exceptAll(updated).isEmpty())
+        edges = updated
+        if converged:
+            print(f'Connected components converged after {iteration + 1} iterations')
+            break
+    else:
+        raise RuntimeError(f'Connected components did not converge in {max_iterations} iterations')
+
+    # Converged graph is a set of stars: every non-root points at its root
+    members = edges.select(col('u').alias('customer_id'), col('v').alias('component_id'))
+    roots = edges.select(col('v').alias('customer_id'), col('v').alias('component_id'))
+    return members.unionByName(roots).groupBy('customer_id').agg(min_('component_id').alias('component_id'))
+
+
+def assign_clusters(customers: DataFrame, pairs: DataFrame) -> DataFrame:
+    """
+    Crosswalk of every Silver record to a `customer_uid` (hash of its
+    cluster's smallest customer_id; changes if that member changes).
+    """
+    components = connected_components(pairs.filter(col('match_tier') == 'AUTO_MERGE'))
+    return (customers.select('customer_id')
+            .join(components, 'customer_id', 'left')
+            .withColumn('component_id', coalesce('component_id', 'customer_id'))
+            .withColumn('customer_uid', concat(lit('CUST-'), substring(sha2(col('component_id'), 256), 1, 12)))
+            .select('customer_id', 'customer_uid'))
+
+
+# ═══════════════════════════════════════
+# Stage 2: Survivorship
+# ═══════════════════════════════════════
+
+def _rule_ordering(rule: str) -> list:
+    """Window ordering that ranks the surviving record first."""
+    most_recent = col('_ingestion_ts').desc_nulls_last()
+    if rule == 'most_recent':
+        return [most_recent]
+    if rule == 'most_complete':
+        return [col('_completeness').desc(), most_recent]
+    if rule == 'source_priority':
+        return [col('_source_rank').asc(), most_recent]
+    raise ValueError(f'Unknown survivorship rule: {rule}')
+
+
+def build_golden_records(customers: DataFrame, crosswalk: DataFrame, pairs: DataFrame,
+                         rules: dict = None) -> DataFrame:
+    """Apply survivorship rules per cluster; one row per customer_uid."""
+    if rules is None:
+        rules = SURVIVORSHIP_RULES
+
+    completeness = sum(when(col(c).isNotNull() & (col(c) != ''), 1).otherwise(0)
+                       for c in COMPLETENESS_FIELDS)
+    source_rank = coalesce(*[when(col('_source_system') == s, lit(rank))
+                             for rank, s in enumerate(SOURCE_PRIORITY, 1)],
+                           lit(len(SOURCE_PRIORITY) + 1))
+    records = (customers.join(crosswalk, 'customer_id')
+               .withColumn('_completeness', completeness)
+               .withColumn('_source_rank', source_rank))
+
+    # One window per distinct rule; every attribute under that rule shares it
+    survived = records
+    for rule in set(rules.values()):
+        window = (Window.partitionBy('customer_uid').orderBy(*_rule_ordering(rule))
+                  .rowsBetween(Window.unboundedPreceding, Window.unboundedFollowing))
+        for attr, attr_rule in rules.items():
+            if attr_rule == rule:
+                survived = survived.withColumn(f'_g_{attr}', first(attr, ignorenulls=True).over(window))
+    primary = (Window.partitionBy('customer_uid').orderBy(*_rule_ordering('source_priority'))
+               .rowsBetween(Window.unboundedPreceding, Window.unboundedFollowing))
+    survived = survived.withColumn('_g_primary_source_id', first('source_id').over(primary))
+
+    scores = (pairs.filter(col('match_tier') == 'AUTO_MERGE')
+              .join(crosswalk.withColumnRenamed('customer_id', 'id_a'), 'id_a')
+              .groupBy('customer_uid').agg(avg('match_score').alias('match_score')))
+
+    golden_cols = [first(f'_g_{attr}').alias(attr) for attr in rules]
+    return (survived.groupBy('customer_uid')
+            .agg(*golden_cols,
+                 first('_g_primary_source_id').alias('primary_source_id'),
+                 array_join(array_sort(collect_set('_source_system')), '+').alias('source_systems'),
+                 count('*').alias('source_count'),
+                 to_date(min_('_ingestion_ts')).alias('created_date'),
+                 to_date(max_('_ingestion_ts')).alias('last_activity_date'))
+            .join(scores, 'customer_uid', 'left'))
+
+
+def main(pairs_path: str = MATCH_PAIRS_PATH) -> dict:
+    spark = get_spark('mdm-golden-record', input_paths=[SILVER_PATH, pairs_path])
+
+    customers = spark.read.format('delta').load(SILVER_PATH)
+    pairs = spark.read.format('delta').load(pairs_path)
+
+    # ── Cluster + crosswalk ──
+    crosswalk = assign_clusters(customers, pairs).cache()
+    crosswalk.write.format('delta').mode('overwrite').save(CROSSWALK_PATH)
+
+    # ── Golden records (feeds dbt dim_customer via mdm_golden_records) ──
+    golden = build_golden_records(customers, crosswalk, pairs)
+    golden.write.format('delta').mode('overwrite').save(GOLDEN_RECORDS_PATH)
+
+    stats = (spark.read.format('delta').load(GOLDEN_RECORDS_PATH)
+             .agg(count('*').alias('golden'), max_('source_count').alias('largest')).first())
+    print(f'Golden records: {stats["golden"]} (largest cluster: {stats["largest"]} records)')
+    return {'golden_records': stats['golden'], 'largest_cluster': stats['largest']}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MDM clustering and golden record survivorship')
+    parser.add_argument('--pairs-path', default=MATCH_PAIRS_PATH)
+    main(parser.parse_args().pairs_path)
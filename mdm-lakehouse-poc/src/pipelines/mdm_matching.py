@@ -3,7 +3,7 @@ MDM Customer Matching Engine
 ==============================
 Generated by Claude MDM Agent.
 Implements weighted fuzzy matching with Jaro-Winkler similarity,
-Soundex blocking, and three-tier match classification.
+multi-pass blocking (see blocking.py), and three-tier match classification.
 
 Match Tiers:
   AUTO_MERGE  (≥ 0.92) → Automatically merged into Golden Record
@@ -16,102 +16,255 @@ Weighting:
   Phone:   20% (Last 10 digits match)
   Address: 15% (Jaro-Winkler similarity)
   Source:  10% (Bonus for cross-system matches)
+
+Scoring modes:
+  vectorized   → Arrow-batched pandas_udf over the NumPy engine (match_scoring.py)
+  spark_sql    → Pure Spark SQL Jaro-Winkler, no Python workers (spark_similarity.py)
+  spark_sql_levenshtein → Code-generated levenshtein similarity (approximate)
+  python_udf   → Legacy row-at-a-time UDF, kept for benchmarking
+
+Run modes:
+  full         → Score every blocked pair, overwrite match_pairs + block_index
+  incremental  → Score only Silver rows whose _row_hash is new or changed
+                 against the persisted block index, MERGE into match_pairs
 """
 
-from pyspark.sql import SparkSession
+import argparse
+import json
+
+from pyspark import StorageLevel
+from pyspark.sql import DataFrame
 from pyspark.sql.functions import (
     udf, col, upper, trim, regexp_replace, lower,
-    soundex, when, lit, current_timestamp
+    soundex, when, lit, current_timestamp,
+    count, floor, least, sum as sum_,
 )
 from pyspark.sql.types import FloatType
-from jellyfish import jaro_winkler_similarity
+from delta.tables import DeltaTable
 
+from blocking import (
+    build_block_keys, cap_blocks, candidate_pairs, incremental_candidate_pairs,
+    blocking_report,
+)
+from match_scoring import (
+    composite_match_score_udf, composite_match_score_row,
+    AUTO_MERGE_THRESHOLD, REVIEW_THRESHOLD,
+)
+from spark_similarity import composite_match_score_sql
+from run_report import new_run_report, summarize_match_groups, write_run_report, SCORE_BUCKET_WIDTH
+from spark_session import LAKEHOUSE_ROOT, get_spark
 
-def main():
-    spark = SparkSession.builder.appName('mdm-customer-matching').getOrCreate()
 
-    # ── Load Silver customer data from all sources ──
-    customers = spark.read.format('delta').load(
-        's3://company-mdm-lakehouse-prod/silver/customer/customer_master/'
-    )
+SILVER_PATH = f'{LAKEHOUSE_ROOT}/silver/customer/customer_master/'
+MATCH_PAIRS_PATH = f'{LAKEHOUSE_ROOT}/mdm/customer/match_pairs/'
+BLOCK_INDEX_PATH = f'{LAKEHOUSE_ROOT}/mdm/customer/block_index/'
+RUN_REPORT_PREFIX = f'{LAKEHOUSE_ROOT}/mdm/customer/run_reports/'
+
+MATCH_PAIR_COLUMNS = ['id_a', 'id_b', 'block_passes', 'match_score', 'match_tier', '_matched_ts']
+
 
-    # ── Normalize fields for matching ──
-    customers = (customers
+def normalize_customers(customers: DataFrame) -> DataFrame:
+    """Normalize fields for matching."""
+    return (customers
         .withColumn('norm_name', upper(trim(regexp_replace('full_name', r'[^A-Za-z\s]', ''))))
         .withColumn('norm_email', lower(trim(col('email'))))
         .withColumn('norm_phone', regexp_replace('phone', r'[^0-9]', ''))
         .withColumn('name_soundex', soundex('norm_name')))
 
-    # ── Blocking: compare only records with same Soundex ──
-    # This reduces O(n²) to manageable candidate pairs
-    blocked = customers.alias('a').join(
-        customers.alias('b'),
-        (col('a.name_soundex') == col('b.name_soundex')) &
-        (col('a.customer_id') < col('b.customer_id')),  # Avoid self-joins + duplicates
-        'inner'
-    )
-
-    # ── Weighted composite matching score ──
-    @udf(FloatType())
-    def composite_match_score(name_a, name_b, email_a, email_b,
-                              phone_a, phone_b, addr_a, addr_b):
-        score = 0.0
 
-        # Name: 30% weight — Jaro-Winkler handles typos, abbreviations
-        if name_a and name_b:
-            score += 0.30 * jaro_winkler_similarity(name_a, name_b)
+def score_pairs(pairs: DataFrame, customers: DataFrame, scoring_mode: str = 'vectorized') -> DataFrame:
+    """Attach both sides of each (id_a, id_b) pair, score and classify."""
+    blocked = (pairs
+        .join(customers.alias('a'), col('id_a') == col('a.customer_id'))
+        .join(customers.alias('b'), col('id_b') == col('b.customer_id')))
 
-        # Email: 25% weight — exact match on normalized email
-        if email_a and email_b:
-            score += 0.25 * (1.0 if email_a == email_b else 0.0)
-
-        # Phone: 20% weight — last 10 digits match
-        if phone_a and phone_b:
-            score += 0.20 * (1.0 if phone_a[-10:] == phone_b[-10:] else 0.0)
-
-        # Address: 15% weight — Jaro-Winkler on street address
-        if addr_a and addr_b:
-            score += 0.15 * jaro_winkler_similarity(addr_a, addr_b)
-
-        # Source diversity bonus: 10% if from different source systems
-        score += 0.10  # Applied when cross-system
-
-        return float(score)
+    # ── Weighted composite matching score ──
+    # Vectorized: pairs reach Python as Arrow batches (see match_scoring.py).
+    # spark_sql: evaluated in the JVM, no Python worker on the executors.
+    # 'python_udf' keeps the original row-at-a-time UDF for benchmarking.
+    score_args = ['a.norm_name', 'b.norm_name', 'a.norm_email', 'b.norm_email',
+                  'a.norm_phone', 'b.norm_phone', 'a.street_address', 'b.street_address']
+    if scoring_mode == 'vectorized':
+        score = composite_match_score_udf()(*[col(c) for c in score_args])
+    elif scoring_mode == 'spark_sql':
+        score = composite_match_score_sql(*score_args)
+    elif scoring_mode == 'spark_sql_levenshtein':
+        score = composite_match_score_sql(*score_args, similarity='levenshtein')
+    elif scoring_mode == 'python_udf':
+        score = udf(composite_match_score_row, FloatType())(*[col(c) for c in score_args])
+    else:
+        raise ValueError(f'Unknown scoring_mode: {scoring_mode}')
 
     # ── Apply matching ──
-    match_pairs = blocked.withColumn(
-        'match_score',
-        composite_match_score(
-            col('a.norm_name'), col('b.norm_name'),
-            col('a.norm_email'), col('b.norm_email'),
-            col('a.norm_phone'), col('b.norm_phone'),
-            col('a.street_address'), col('b.street_address'),
-        )
-    )
+    match_pairs = blocked.withColumn('match_score', score)
 
     # ── Classify match tiers ──
     match_pairs = match_pairs.withColumn(
         'match_tier',
-        when(col('match_score') >= 0.92, 'AUTO_MERGE')
-        .when(col('match_score') >= 0.75, 'REVIEW')
+        when(col('match_score') >= AUTO_MERGE_THRESHOLD, 'AUTO_MERGE')
+        .when(col('match_score') >= REVIEW_THRESHOLD, 'REVIEW')
         .otherwise('NO_MATCH')
     )
+    return match_pairs.withColumn('_matched_ts', current_timestamp()).select(*MATCH_PAIR_COLUMNS)
+
+
+def block_index(customers: DataFrame) -> DataFrame:
+    """Blocking keys tagged with the record hash they were built from."""
+    return (build_block_keys(customers)
+            .join(customers.select('customer_id', '_row_hash'), 'customer_id'))
+
+
+def summarize_matches(match_pairs: DataFrame) -> dict:
+    """
+    Tier counts, score histogram and per-pass statistics in ONE aggregation.
+
+    Groups on (block_passes, match_tier, score_bucket) — a few hundred
+    rows at most — and folds them on the driver.
+    """
+    bucket = least(floor(col('match_score') / SCORE_BUCKET_WIDTH) * SCORE_BUCKET_WIDTH,
+                   lit(1.0 - SCORE_BUCKET_WIDTH))
+    rows = (match_pairs
+            .groupBy('block_passes', 'match_tier', bucket.alias('score_bucket'))
+            .agg(count('*').alias('pairs'), sum_('match_score').alias('score_sum'))
+            .collect())
+    return summarize_match_groups([r.asDict() for r in rows])
 
-    # ── Write match pairs to MDM layer ──
+
+def run_full(spark, customers: DataFrame, scoring_mode: str, report: dict) -> DataFrame:
+    """Block and score the whole population; rebuild the persisted index."""
+    # ── Blocking: multi-pass index (Soundex, email domain, phone, name q-grams) ──
+    # Oversized blocks are capped; pairs proposed by several passes are scored once
+    block_keys = block_index(customers).cache()
+    pairs = candidate_pairs(cap_blocks(block_keys)).persist(StorageLevel.MEMORY_AND_DISK)
+    report['blocking'] = blocking_report(block_keys, pairs, customers.count())
+
+    # Persisted so the write and the summary share one scoring pass
+    match_pairs = score_pairs(pairs, customers, scoring_mode).persist(StorageLevel.MEMORY_AND_DISK)
+
+    # ── Write match pairs + block index to MDM layer ──
     match_pairs.filter(col('match_tier') != 'NO_MATCH') \
         .write.format('delta').mode('overwrite') \
-        .save('s3://company-mdm-lakehouse-prod/mdm/customer/match_pairs/')
+        .save(MATCH_PAIRS_PATH)
+    block_keys.write.format('delta').mode('overwrite').save(BLOCK_INDEX_PATH)
+
+    # match_pairs is materialized by the write above; its inputs can go
+    pairs.unpersist()
+    block_keys.unpersist()
+    return match_pairs
+
+
+def incremental_updates(customers: DataFrame, changed: DataFrame, index_keys: DataFrame,
+                        stored_pairs: DataFrame, scoring_mode: str = 'vectorized'):
+    """
+    Block keys and match_pairs changes for the `changed` records.
+
+    `index_keys` is the persisted block index as of the last run; it is
+    not modified here, the changed records' keys are swapped in on the
+    fly. Returns (changed_keys, match_pairs, stale): the new index rows,
+    the re-scored pairs and the stored pairs of changed records that
+    were not re-proposed (to delete).
+    """
+    changed_ids = changed.select('customer_id')
+    changed_keys = block_index(changed)
+
+    # Index as it will look once refreshed: stale keys of changed records replaced
+    refreshed = (index_keys.join(changed_ids, 'customer_id', 'left_anti')
+                 .select(*changed_keys.columns)
+                 .unionByName(changed_keys))
+    pairs = incremental_candidate_pairs(changed_keys, refreshed)
+    match_pairs = score_pairs(pairs, customers, scoring_mode)
+
+    touched = stored_pairs.join(changed_ids.withColumnRenamed('customer_id', 'id_a'), 'id_a', 'left_semi') \
+        .unionByName(stored_pairs.join(changed_ids.withColumnRenamed('customer_id', 'id_b'), 'id_b', 'left_semi'))
+    stale = (touched.join(match_pairs.select('id_a', 'id_b'), ['id_a', 'id_b'], 'left_anti')
+             .dropDuplicates(['id_a', 'id_b'])
+             .select(*MATCH_PAIR_COLUMNS))
+    return changed_keys, match_pairs, stale
+
+
+def run_incremental(spark, customers: DataFrame, scoring_mode: str, report: dict) -> DataFrame:
+    """
+    Score only new/changed Silver rows and MERGE the result.
+
+    A record is "changed" when its (customer_id, _row_hash) is absent
+    from the persisted block index. Its pairs are re-scored against the
+    index with its keys swapped in, and pairs it no longer produces (or
+    that fell to NO_MATCH) are deleted from match_pairs.
+
+    The block index is only refreshed after the match_pairs MERGE has
+    committed. A run that dies in between leaves the records "changed",
+    and the next run re-applies the same (idempotent) MERGE.
+    """
+    if not DeltaTable.isDeltaTable(spark, BLOCK_INDEX_PATH):
+        print('No block index found — falling back to full run')
+        report['mode'] = 'full'
+        return run_full(spark, customers, scoring_mode, report)
+
+    index = DeltaTable.forPath(spark, BLOCK_INDEX_PATH)
+    index_keys = index.toDF()
+    known = index_keys.select('customer_id', '_row_hash').distinct()
+    # Checkpoint before the index is mutated below, so `changed` stays fixed
+    changed = customers.join(known, ['customer_id', '_row_hash'], 'left_anti').localCheckpoint()
+    n_changed = changed.count()
+    report['changed_records'] = n_changed
+    if n_changed == 0:
+        return None
+
+    stored = spark.read.format('delta').load(MATCH_PAIRS_PATH)
+    changed_keys, match_pairs, stale = incremental_updates(
+        customers, changed, index_keys, stored, scoring_mode)
+    changed_keys = changed_keys.cache()
+    match_pairs = match_pairs.withColumn('_delete', lit(False)).persist(StorageLevel.MEMORY_AND_DISK)
+
+    # ── MERGE into match_pairs ──
+    (DeltaTable.forPath(spark, MATCH_PAIRS_PATH).alias('t')
+        .merge(match_pairs.unionByName(stale.withColumn('_delete', lit(True))).alias('s'),
+               't.id_a = s.id_a AND t.id_b = s.id_b')
+        .whenMatchedDelete(condition="s._delete OR s.match_tier = 'NO_MATCH'")
+        .whenMatchedUpdate(set={c: f's.{c}' for c in MATCH_PAIR_COLUMNS})
+        .whenNotMatchedInsert(condition="NOT s._delete AND s.match_tier != 'NO_MATCH'",
+                              values={c: f's.{c}' for c in MATCH_PAIR_COLUMNS})
+        .execute())
+
+    # ── Refresh the index: drop stale keys of changed records, add new ones ──
+    index.alias('t').merge(
+        changed.select('customer_id').alias('c'), 't.customer_id = c.customer_id'
+    ).whenMatchedDelete().execute()
+    changed_keys.write.format('delta').mode('append').save(BLOCK_INDEX_PATH)
+    changed_keys.unpersist()
+    return match_pairs
+
+
+def main(scoring_mode: str = 'vectorized', incremental: bool = False) -> dict:
+    spark = get_spark('mdm-customer-matching', input_paths=[SILVER_PATH])
+    report = new_run_report('mdm-customer-matching',
+                            mode='incremental' if incremental else 'full',
+                            scoring_mode=scoring_mode)
+
+    # ── Load Silver customer data from all sources ──
+    customers = normalize_customers(spark.read.format('delta').load(SILVER_PATH))
+
+    if incremental:
+        match_pairs = run_incremental(spark, customers, scoring_mode, report)
+    else:
+        match_pairs = run_full(spark, customers, scoring_mode, report)
 
-    # ── Summary ──
-    total = match_pairs.count()
-    auto = match_pairs.filter(col('match_tier') == 'AUTO_MERGE').count()
-    review = match_pairs.filter(col('match_tier') == 'REVIEW').count()
+    # ── Summary: one aggregation over the persisted scores ──
+    if match_pairs is not None:
+        try:
+            report['matching'] = summarize_matches(match_pairs)
+        finally:
+            match_pairs.unpersist()
 
-    print(f'MDM Matching Complete:')
-    print(f'  Total pairs: {total}')
-    print(f'  AUTO_MERGE:  {auto} ({auto/total*100:.1f}%)')
-    print(f'  REVIEW:      {review} ({review/total*100:.1f}%)')
+    write_run_report(report, f"{RUN_REPORT_PREFIX}{report['run_id']}.json")
+    print(json.dumps(report, default=str))
+    return report
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='MDM customer matching')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only score new/changed Silver records and MERGE the result')
+    parser.add_argument('--scoring-mode', default='vectorized', choices=['vectorized', 'spark_sql', 'spark_sql_levenshtein', 'python_udf'])
+    args = parser.parse_args()
+    main(scoring_mode=args.scoring_mode, incremental=args.incremental)
@@ -0,0 +1,91 @@
+"""
+Pipeline Run Reports
+=====================
+Structured (JSON) run reports for the pipeline jobs, replacing ad-hoc
+print summaries. Reports are plain dicts; `write_run_report` persists
+them to S3 (`s3://bucket/key`) or a local path.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+# Score histogram resolution for match summaries
+SCORE_BUCKET_WIDTH = 0.05
+
+
+def new_run_report(job: str, **fields) -> dict:
+    """Skeleton report with job name, run id and start time."""
+    started = datetime.now(timezone.utc)
+    return {
+        'job': job,
+        'run_id': f"{job}_{started.strftime('%Y%m%d_%H%M%S')}",
+        'started_at': started.isoformat(),
+        **fields,
+    }
+
+
+def new_batch_id() -> str:
+    """Unique, sortable `_batch_id` for one ingestion run: batch_YYYYMMDD_HHMMSS_<6 hex>."""
+    return f"batch_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def summarize_match_groups(rows) -> dict:
+    """
+    Fold pre-aggregated match groups into tier counts, histogram and
+    per-pass statistics.
+
+    `rows` is the (small) collected result of one groupBy over the scored
+    pairs on (block_passes, match_tier, score_bucket), each carrying
+    `pairs` and `score_sum`. A pair found by several passes counts once
+    in the totals and once under each of its passes.
+    """
+    tiers = {'AUTO_MERGE': 0, 'REVIEW': 0, 'NO_MATCH': 0}
+    histogram = {}
+    per_pass = {}
+    total = 0
+    score_sum = 0.0
+
+    for r in rows:
+        n = r['pairs']
+        total += n
+        score_sum += r['score_sum']
+        tiers[r['match_tier']] = tiers.get(r['match_tier'], 0) + n
+        bucket = f"{r['score_bucket']:.2f}"
+        histogram[bucket] = histogram.get(bucket, 0) + n
+        for p in r['block_passes'] or []:
+            stats = per_pass.setdefault(p, {'pairs': 0, 'AUTO_MERGE': 0, 'REVIEW': 0, 'score_sum': 0.0})
+            stats['pairs'] += n
+            stats['score_sum'] += r['score_sum']
+            if r['match_tier'] in ('AUTO_MERGE', 'REVIEW'):
+                stats[r['match_tier']] += n
+
+    for stats in per_pass.values():
+        stats['avg_score'] = round(stats.pop('score_sum') / stats['pairs'], 4) if stats['pairs'] else None
+
+    return {
+        'total_pairs': total,
+        'tiers': tiers,
+        'tier_pct': {t: round(c / total * 100, 2) if total else 0.0 for t, c in tiers.items()},
+        'avg_score': round(score_sum / total, 4) if total else None,
+        'score_histogram': dict(sorted(histogram.items())),
+        'per_pass': per_pass,
+    }
+
+
+def write_run_report(report: dict, uri: str) -> str:
+    """Write the report as JSON to `uri` (s3:// or local path); returns the uri."""
+    report.setdefault('finished_at', datetime.now(timezone.utc).isoformat())
+    body = json.dumps(report, indent=2, default=str)
+
+    if uri.startswith('s3://'):
+        import boto3
+        bucket, _, key = uri[len('s3://'):].partition('/')
+        boto3.client('s3').put_object(Bucket=bucket, Key=key, Body=body.encode('utf-8'),
+                                      ServerSideEncryption='aws:kms')
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(uri)), exist_ok=True)
+        with open(uri, 'w') as f:
+            f.write(body)
+    return uri
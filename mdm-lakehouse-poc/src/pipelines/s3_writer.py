@@ -0,0 +1,192 @@
+"""
+Streaming S3 Writers
+=====================
+File-like S3 sinks for landing large extracts in Bronze without holding
+them in memory.
+
+  S3MultipartWriter    → write()-able object backed by an S3 multipart
+                         upload; buffers at most one upload part.
+  RollingParquetWriter → Parquet parts (part-00000.parquet, ...) under a
+                         prefix, rolled over at a target object size;
+                         every write_table() call becomes a row group.
+                         On error every part written so far is deleted.
+  concat_objects       → Stream several objects into one (small-file
+                         compaction of gzip / JSON-lines objects).
+
+All take a boto3 S3 client, so they run unchanged against moto.
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MULTIPART_CHUNK_BYTES = 8 * 2**20    # S3 minimum part size is 5 MiB
+PART_TARGET_BYTES = 128 * 2**20      # Roll to a new Parquet object past this size
+
+
+class S3MultipartWriter:
+    """
+    Minimal binary file object over an S3 multipart upload.
+
+    Small objects (never reaching one chunk) are sent with a single
+    put_object on close. `put_kwargs` (e.g. ServerSideEncryption) apply to
+    whichever request creates the object.
+    """
+
+    def __init__(self, s3, bucket: str, key: str,
+                 chunk_bytes: int = MULTIPART_CHUNK_BYTES, **put_kwargs):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.chunk_bytes = chunk_bytes
+        self.put_kwargs = put_kwargs
+        self.closed = False
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._position = 0
+
+    # ── file protocol (enough for pyarrow / json / gzip) ──
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError(f'write to closed S3 object s3://{self.bucket}/{self.key}')
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.chunk_bytes:
+            self._upload_part(bytes(self._buffer[:self.chunk_bytes]))
+            del self._buffer[:self.chunk_bytes]
+        return len(data)
+
+    def _upload_part(self, body: bytes):
+        if self._upload_id is None:
+            self._upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, **self.put_kwargs)['UploadId']
+        number = len(self._parts) + 1
+        resp = self.s3.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                   PartNumber=number, Body=body)
+        self._parts.append({'ETag': resp['ETag'], 'PartNumber': number})
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._upload_id is None:
+            self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), **self.put_kwargs)
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                              MultipartUpload={'Parts': self._parts})
+        self._buffer = bytearray()
+
+    def abort(self):
+        """Discard everything written; no object is created."""
+        self.closed = True
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def concat_objects(s3, bucket: str, keys: list, dest_key: str,
+                   chunk_bytes: int = MULTIPART_CHUNK_BYTES, **put_kwargs) -> int:
+    """
+    Byte-concatenate `keys` into `dest_key`, streaming through one
+    multipart upload; returns bytes written. Concatenated gzip members
+    form a valid gzip stream, so .jsonl.gz objects compact losslessly.
+    """
+    with S3MultipartWriter(s3, bucket, dest_key, chunk_bytes, **put_kwargs) as sink:
+        for key in keys:
+            body = s3.get_object(Bucket=bucket, Key=key)['Body']
+            for block in iter(lambda: body.read(chunk_bytes), b''):
+                sink.write(block)
+    return sink.tell()
+
+
+class RollingParquetWriter:
+    """Stream Arrow tables into size-bounded Parquet objects under `prefix`."""
+
+    def __init__(self, s3, bucket: str, prefix: str, schema: pa.Schema,
+                 target_bytes: int = PART_TARGET_BYTES, chunk_bytes: int = MULTIPART_CHUNK_BYTES,
+                 compression: str = 'snappy', **put_kwargs):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.schema = schema
+        self.target_bytes = target_bytes
+        self.chunk_bytes = chunk_bytes
+        self.compression = compression
+        self.put_kwargs = put_kwargs
+        self.objects = []          # [{'key', 'rows', 'bytes'}] of completed parts
+        self._sink = None
+        self._writer = None
+        self._rows = 0
+
+    def _open(self):
+        key = f'{self.prefix}part-{len(self.objects):05d}.parquet'
+        self._sink = S3MultipartWriter(self.s3, self.bucket, key, self.chunk_bytes, **self.put_kwargs)
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression=self.compression)
+        self._rows = 0
+
+    def _finish_part(self):
+        self._writer.close()
+        self._sink.close()
+        self.objects.append({'key': self._sink.key, 'rows': self._rows, 'bytes': self._sink.tell()})
+        self._writer = self._sink = None
+
+    def write_table(self, table: pa.Table):
+        if table.num_rows == 0:
+            return
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(table)
+        self._rows += table.num_rows
+        if self._sink.tell() >= self.target_bytes:
+            self._finish_part()
+
+    def close(self) -> list:
+        if self._writer is not None:
+            self._finish_part()
+        return self.objects
+
+    def abort(self):
+        """Discard the part in progress and delete the parts already completed."""
+        if self._sink is not None:
+            self._sink.abort()
+            self._writer = self._sink = None
+        keys = [o['key'] for o in self.objects]
+        for start in range(0, len(keys), 1000):     # delete_objects takes at most 1000 keys
+            self.s3.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': k} for k in keys[start:start + 1000]], 'Quiet': True})
+        self.objects = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -5,20 +5,50 @@ Generated by Claude ETL Agent.
 Connects to SAP via PyRFC, extracts customer master (KNA1),
 and writes to S3 Bronze layer as Delta Lake.
 
+KNA1 is read in ROWSKIPS/ROWCOUNT pages over a small pool of RFC
+connections (see sap_rfc_reader.py). Pages are written to a Parquet
+staging prefix as they arrive, so the driver never holds the full table.
+
+Change detection:
+  - Every run computes `_row_hash` per KUNNR and appends only rows whose
+    hash differs from the last one recorded in the row-hash state table,
+    so Bronze grows with actual change volume, not table size.
+  - The state table is updated after the Bronze append. A run that dies
+    in between leaves Bronze batches newer than the state; the next run
+    folds those into the state first (reconcile_row_hash_state), so the
+    overlap window it re-reads is not appended twice.
+  - `--incremental` additionally restricts the SAP read to customers with
+    change documents (CDHDR, object class DEBI) since the persisted
+    per-table watermark; without a watermark it falls back to a full read.
+
 AWS Glue Job Configuration:
   - Worker type: G.1X
   - Number of workers: 4
   - Glue version: 4.0
-  - Additional python modules: pyrfc, delta-spark
+  - Additional python modules: pyrfc, delta-spark, pyarrow
+  - Extra python files: sap_rfc_reader.py, run_report.py, delta_layout.py,
+    spark_session.py
 """
 
+import argparse
 import boto3
 import json
-import pyrfc
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import lit, current_timestamp, sha2, concat_ws
+import os
+from datetime import datetime, timedelta, timezone
+
+from pyspark.sql import DataFrame, Window
+from pyspark.sql.functions import (
+    col, lit, current_timestamp, sha2, concat_ws, row_number, to_date, max as max_,
+)
 from delta.tables import DeltaTable
 
+from sap_rfc_reader import (
+    RFCConnectionPool, delete_staging, iter_table_chunks, key_in_partitions, write_parquet_chunks,
+)
+from run_report import new_batch_id, new_run_report, write_run_report
+from delta_layout import check_partitioning, partition_columns
+from spark_session import LAKEHOUSE_ROOT, get_spark
+
 
 def get_sap_credentials():
     """Retrieve SAP credentials from AWS Secrets Manager."""
@@ -27,62 +57,257 @@ def get_sap_credentials():
     return json.loads(response['SecretString'])
 
 
-def extract_sap_table(conn, table_name: str, fields: list) -> list:
-    """Extract table via RFC_READ_TABLE."""
-    result = conn.call(
-        'RFC_READ_TABLE',
-        QUERY_TABLE=table_name,
-        FIELDS=fields,
-        ROWCOUNT=0  # All rows
+def sap_connection(creds: dict):
+    """New RFC connection; pyrfc (and the SAP NW RFC SDK) is only needed here."""
+    import pyrfc
+    return pyrfc.Connection(
+        ashost=creds['host'],
+        sysnr=creds['sysnr'],
+        client=creds['client'],
+        user=creds['user'],
+        passwd=creds['pass'],
     )
-    # Parse RFC flat-string result into list of dicts
-    field_names = [f['FIELDNAME'] for f in result['FIELDS']]
-    rows = [
-        dict(zip(field_names, [v.strip() for v in row['WA'].split('|')]))
-        for row in result['DATA']
-    ]
-    return rows
 
 
-def main():
+# ── Extraction tuning ──
+RFC_POOL_SIZE = 4            # Concurrent RFC sessions (keep within the SAP dialog quota)
+RFC_CHUNK_SIZE = 50_000      # Rows per RFC_READ_TABLE page (ROWCOUNT)
+BRONZE_KNA1_PATH = f'{LAKEHOUSE_ROOT}/bronze/sap/kna1/'
+STAGING_PREFIX = f'{LAKEHOUSE_ROOT}/bronze/_staging/sap/kna1/'
+
+# ── Incremental state ──
+WATERMARK_URI = f'{LAKEHOUSE_ROOT}/bronze/_state/sap/watermarks/kna1.json'
+ROW_HASH_STATE_PATH = f'{LAKEHOUSE_ROOT}/bronze/_state/sap/kna1_row_hash/'
+RUN_REPORT_PREFIX = f'{LAKEHOUSE_ROOT}/bronze/_state/sap/run_reports/'
+CHANGE_DOC_OBJECT_CLASS = 'DEBI'   # Customer master change documents
+WATERMARK_OVERLAP_DAYS = 1         # Re-read a day back; row hashes drop the duplicates
+
+KNA1_FIELDS = ['KUNNR', 'NAME1', 'NAME2', 'LAND1', 'ORT01',
+               'PSTLZ', 'STRAS', 'TELF1', 'SMTP_ADDR', 'KTOKD']
+
+
+# ═══════════════════════════════════════
+# Watermarks & change documents
+# ═══════════════════════════════════════
+
+def _local_path(uri: str) -> str:
+    return uri[len('file://'):] if uri.startswith('file://') else uri
+
+
+def read_watermark(uri: str = WATERMARK_URI):
+    """Last persisted watermark for the table (s3:// or local path), or None on the first run."""
+    if not uri.startswith('s3://'):
+        try:
+            with open(_local_path(uri)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+    bucket, _, key = uri[len('s3://'):].partition('/')
+    s3 = boto3.client('s3')
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(body)
+
+
+def write_watermark(state: dict, uri: str = WATERMARK_URI):
+    body = json.dumps(state)
+    if not uri.startswith('s3://'):
+        path = _local_path(uri)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(body)
+        return
+    bucket, _, key = uri[len('s3://'):].partition('/')
+    boto3.client('s3').put_object(Bucket=bucket, Key=key, Body=body.encode('utf-8'),
+                                  ServerSideEncryption='aws:kms')
+
+
+def changed_customers(pool: RFCConnectionPool, since: str) -> set:
+    """KUNNRs with customer master change documents on or after `since` (YYYYMMDD)."""
+    where = f"OBJECTCLAS = '{CHANGE_DOC_OBJECT_CLASS}' AND UDATE >= '{since}'"
+    keys = set()
+    for _, _, chunk in iter_table_chunks(pool, 'CDHDR', ['OBJECTID'],
+                                         chunk_size=RFC_CHUNK_SIZE, partitions=[where]):
+        keys.update(chunk['OBJECTID'])
+    return keys
+
+
+# ═══════════════════════════════════════
+# Row-hash change detection
+# ═══════════════════════════════════════
+
+def add_bronze_metadata(df: DataFrame, batch_id: str) -> DataFrame:
+    """Bronze metadata columns plus the `_row_hash` change detection compares."""
+    return (df
+            .withColumn('_ingestion_ts', current_timestamp())
+            .withColumn('_ingestion_date', to_date('_ingestion_ts'))
+            .withColumn('_source_system', lit('SAP_ECC'))
+            .withColumn('_batch_id', lit(batch_id))
+            .withColumn('_row_hash', sha2(concat_ws('|', *KNA1_FIELDS), 256)))
+
+
+def new_or_changed(df: DataFrame, known: DataFrame) -> DataFrame:
+    """Rows of `df` whose (KUNNR, _row_hash) is not the last one recorded in `known`."""
+    if known is None:
+        return df
+    return df.join(known.select('KUNNR', '_row_hash'), ['KUNNR', '_row_hash'], 'left_anti')
+
+
+def latest_per_key(bronze: DataFrame) -> DataFrame:
+    """(KUNNR, _row_hash, _batch_id) of the most recent Bronze row per KUNNR."""
+    latest = Window.partitionBy('KUNNR').orderBy(col('_ingestion_ts').desc(), col('_batch_id').desc())
+    return (bronze
+            .withColumn('_rn', row_number().over(latest))
+            .filter(col('_rn') == 1)
+            .select('KUNNR', '_row_hash', '_batch_id'))
+
+
+def unrecorded_row_hashes(bronze: DataFrame, state: DataFrame) -> DataFrame:
+    """
+    Latest hashes from Bronze batches newer than any batch in `state`:
+    appended by a run that died before updating the state. Batch ids sort
+    by time (see run_report.new_batch_id).
+    """
+    last = state.agg(max_('_batch_id').alias('b')).first()['b']
+    if last is None:
+        return latest_per_key(bronze)
+    # One batch id per file, so Delta's min/max stats skip the older files
+    return latest_per_key(bronze.filter(col('_batch_id') > last))
+
+
+def latest_row_hashes(spark):
+    """(KUNNR, _row_hash, _batch_id) last written to Bronze, or None before the first load."""
+    if DeltaTable.isDeltaTable(spark, ROW_HASH_STATE_PATH):
+        return spark.read.format('delta').load(ROW_HASH_STATE_PATH)
+    if DeltaTable.isDeltaTable(spark, BRONZE_KNA1_PATH):
+        # One-off bootstrap from the append-only history
+        return latest_per_key(spark.read.format('delta').load(BRONZE_KNA1_PATH))
+    return None
+
+
+def _merge_row_hashes(spark, hashes: DataFrame):
+    (DeltaTable.forPath(spark, ROW_HASH_STATE_PATH).alias('s')
+     .merge(hashes.select('KUNNR', '_row_hash', '_batch_id').alias('c'), 's.KUNNR = c.KUNNR')
+     .whenMatchedUpdateAll()
+     .whenNotMatchedInsertAll()
+     .execute())
+
+
+def reconcile_row_hash_state(spark) -> int:
+    """Fold Bronze batches the state is missing into it; returns rows folded in."""
+    if not (DeltaTable.isDeltaTable(spark, ROW_HASH_STATE_PATH)
+            and DeltaTable.isDeltaTable(spark, BRONZE_KNA1_PATH)):
+        return 0
+    pending = unrecorded_row_hashes(spark.read.format('delta').load(BRONZE_KNA1_PATH),
+                                    spark.read.format('delta').load(ROW_HASH_STATE_PATH)).localCheckpoint()
+    n = pending.count()
+    if n:
+        print(f'Row-hash state was behind Bronze: recording {n} hashes from unrecorded batches')
+        _merge_row_hashes(spark, pending)
+    return n
+
+
+def update_row_hash_state(spark, changed: DataFrame):
+    """Record the hashes just appended, keyed by KUNNR."""
+    if not DeltaTable.isDeltaTable(spark, ROW_HASH_STATE_PATH):
+        # First run with state: seed it from Bronze, which already holds this batch
+        latest_row_hashes(spark).write.format('delta').mode('overwrite').save(ROW_HASH_STATE_PATH)
+        return
+    _merge_row_hashes(spark, changed)
+
+
+# ═══════════════════════════════════════
+# Main
+# ═══════════════════════════════════════
+
+def main(incremental: bool = False, partitions: list = None) -> dict:
+    """
+    Page KNA1 out of SAP in RFC_CHUNK_SIZE chunks over RFC_POOL_SIZE
+    connections, landing each chunk as a Parquet part in staging, then
+    append the rows whose `_row_hash` changed to Bronze in a single Delta
+    commit.
+
+    `partitions` optionally splits a full read into key ranges, e.g.
+    ["KUNNR < '0000500000'", "KUNNR >= '0000500000'"]; each range is paged
+    independently, which keeps ROWSKIPS offsets small on large tables.
+    """
+    batch_id = new_batch_id()
+    started = datetime.now(timezone.utc)
+    report = new_run_report('sap-kna1-extraction', batch_id=batch_id,
+                            mode='incremental' if incremental else 'full')
+
     # ── Get credentials ──
     sap_creds = get_sap_credentials()
 
-    # ── Connect to SAP ──
-    conn = pyrfc.Connection(
-        ashost=sap_creds['host'],
-        sysnr=sap_creds['sysnr'],
-        client=sap_creds['client'],
-        user=sap_creds['user'],
-        passwd=sap_creds['pass'],
-    )
+    # ── Bounded pool of SAP connections ──
+    pool = RFCConnectionPool(lambda: sap_connection(sap_creds), size=RFC_POOL_SIZE)
+
+    # ── Extract KNA1 (Customer Master), streaming chunks to staging ──
+    staging_uri = f'{STAGING_PREFIX}{batch_id}/'
+    try:
+        watermark = read_watermark() if incremental else None
+        if incremental and watermark is None:
+            print('No watermark yet — running a full extraction')
+            report['mode'] = 'full'
+        if watermark is not None:
+            keys = changed_customers(pool, watermark['change_date'])
+            report['watermark_from'] = watermark['change_date']
+            report['changed_keys'] = len(keys)
+            print(f"{len(keys)} customers with change documents since {watermark['change_date']}")
+            partitions = key_in_partitions('KUNNR', keys)
+        if partitions == []:
+            staged = {'rows': 0, 'parts': 0}
+        else:
+            chunks = iter_table_chunks(pool, 'KNA1', KNA1_FIELDS,
+                                       chunk_size=RFC_CHUNK_SIZE, partitions=partitions)
+            staged = write_parquet_chunks(chunks, staging_uri, KNA1_FIELDS)
+    finally:
+        pool.close()
+    report['extracted_rows'] = staged['rows']
+    print(f"Staged {staged['rows']} KNA1 rows in {staged['parts']} parts")
+
+    report['appended_rows'] = 0
+    if staged['rows']:
+        # ── Read staged parts with Spark (distributed, not via the driver) ──
+        spark = get_spark('sap-kna1-extraction', input_paths=[staging_uri])
+        # A LAND1-partitioned table must be migrated (delta_layout --relayout) before appending
+        check_partitioning(spark, 'bronze_sap_kna1')
+        df = add_bronze_metadata(spark.read.parquet(staging_uri), batch_id)
 
-    # ── Extract KNA1 (Customer Master) ──
-    kna1_fields = ['KUNNR', 'NAME1', 'NAME2', 'LAND1', 'ORT01',
-                   'PSTLZ', 'STRAS', 'TELF1', 'SMTP_ADDR', 'KTOKD']
-    rows = extract_sap_table(conn, 'KNA1', kna1_fields)
+        # ── Keep only new or changed customers ──
+        # Catch the state up first if a previous run died after its Bronze append
+        report['reconciled_hashes'] = reconcile_row_hash_state(spark)
+        changed = new_or_changed(df, latest_row_hashes(spark)).localCheckpoint()
+        report['appended_rows'] = changed.count()
 
-    # ── Create Spark DataFrame ──
-    spark = SparkSession.builder.appName('sap-kna1-extraction').getOrCreate()
-    df = spark.createDataFrame(rows)
+        # ── Write to S3 Bronze as Delta Lake ──
+        if report['appended_rows']:
+            changed.write \
+                .format('delta') \
+                .mode('append') \
+                .partitionBy(*partition_columns('bronze_sap_kna1')) \
+                .save(BRONZE_KNA1_PATH)
+            update_row_hash_state(spark, changed)
 
-    # ── Add Bronze metadata columns ──
-    df = (df
-          .withColumn('_ingestion_ts', current_timestamp())
-          .withColumn('_source_system', lit('SAP_ECC'))
-          .withColumn('_batch_id', lit('batch_20260207_001'))
-          .withColumn('_row_hash', sha2(concat_ws('|', *df.columns), 256)))
+    # ── Staged parts are only needed until Bronze is committed ──
+    if staged['parts']:
+        delete_staging(staging_uri)
 
-    # ── Write to S3 Bronze as Delta Lake ──
-    df.write \
-        .format('delta') \
-        .mode('append') \
-        .partitionBy('LAND1') \
-        .save('s3://company-mdm-lakehouse-prod/bronze/sap/kna1/')
+    # ── Advance the watermark only after Bronze is committed ──
+    change_date = (started - timedelta(days=WATERMARK_OVERLAP_DAYS)).strftime('%Y%m%d')
+    write_watermark({'table': 'KNA1', 'change_date': change_date,
+                     'batch_id': batch_id, 'updated_at': datetime.now(timezone.utc).isoformat()})
+    report['watermark_to'] = change_date
 
-    print(f'Extracted {df.count()} rows from SAP KNA1 to Bronze')
-    conn.close()
+    print(f"Appended {report['appended_rows']} new/changed of {staged['rows']} extracted SAP KNA1 rows to Bronze")
+    write_run_report(report, f"{RUN_REPORT_PREFIX}{batch_id}.json")
+    return report
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='SAP KNA1 extraction to Bronze')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only read customers with change documents since the last watermark')
+    main(incremental=parser.parse_args().incremental)
@@ -2,13 +2,38 @@
 Salesforce Account Extraction Pipeline
 ========================================
 Two patterns: Batch (Bulk API 2.0) and Real-time (CDC via EventBridge).
+
+Batch results are streamed page by page (Bulk 2.0 locators) into
+size-bounded Parquet parts via S3 multipart upload, so memory stays flat
+regardless of account count.
+
+CDC events are written as one gzip JSON-lines object per invocation
+(one row per changed record), keyed by the Lambda request id.
 """
 
+import gzip
+import io
 import boto3
 import json
-from datetime import datetime
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from simple_salesforce import Salesforce
 
+from s3_writer import RollingParquetWriter, PART_TARGET_BYTES, concat_objects
+from run_report import new_batch_id
+
+BRONZE_BUCKET = 'company-mdm-lakehouse-prod'
+BRONZE_ACCOUNT_PREFIX = 'bronze/salesforce/account/'
+BULK_PAGE_SIZE = 50_000      # Records per Bulk 2.0 result page (locator)
+
+ACCOUNT_FIELDS = ['Id', 'Name', 'BillingCountry', 'BillingCity', 'BillingStreet',
+                  'Phone', 'Website', 'Industry', 'AnnualRevenue', 'NumberOfEmployees',
+                  'OwnerId', 'CreatedDate', 'LastModifiedDate']
+
 
 def get_sfdc_credentials():
     """Retrieve Salesforce credentials from Secrets Manager."""
@@ -21,7 +46,56 @@ def get_sfdc_credentials():
 # PATTERN 1: Batch Extraction (Bulk API)
 # ═══════════════════════════════════════
 
-def extract_accounts_batch(last_modified_after: str = None):
+def parse_bulk_page(page: str, fields: list) -> pa.Table:
+    """
+    One Bulk 2.0 CSV result page → Arrow table of strings (empty → null).
+    Quoted values may span lines (e.g. BillingStreet).
+    """
+    return pa_csv.read_csv(
+        io.BytesIO(page.encode('utf-8')),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={f: pa.string() for f in fields},
+            include_columns=fields,
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def write_bulk_pages(pages, s3, bucket: str, prefix: str, fields: list, batch_id: str,
+                     target_bytes: int = PART_TARGET_BYTES) -> dict:
+    """
+    Stream Bulk 2.0 result pages into Parquet parts under s3://bucket/prefix.
+
+    Only the current page is held in memory: it is parsed to Arrow,
+    stamped with Bronze metadata and written as one row group, then
+    dropped. Parts roll over at `target_bytes` and are uploaded with
+    multipart upload.
+    """
+    # _ingestion_ts is a real timestamp so Silver's watermark filter prunes row groups
+    metadata = [
+        pa.field('_source_system', pa.string()),
+        pa.field('_batch_id', pa.string()),
+        pa.field('_ingestion_ts', pa.timestamp('us', tz='UTC')),
+    ]
+    values = {'_source_system': 'SALESFORCE', '_batch_id': batch_id,
+              '_ingestion_ts': datetime.now(timezone.utc)}
+    schema = pa.schema([pa.field(f, pa.string()) for f in fields] + metadata)
+
+    records = n_pages = 0
+    with RollingParquetWriter(s3, bucket, prefix, schema, target_bytes=target_bytes,
+                              ServerSideEncryption='aws:kms') as writer:
+        for page in pages:
+            table = parse_bulk_page(page, fields)
+            for field in metadata:
+                table = table.append_column(field, pa.array([values[field.name]] * table.num_rows, field.type))
+            writer.write_table(table)
+            records += table.num_rows
+            n_pages += 1
+    return {'records': records, 'pages': n_pages, 'objects': writer.objects}
+
+
+def extract_accounts_batch(last_modified_after: str = None) -> dict:
     """
     Incremental batch extraction via Salesforce Bulk API 2.0.
     Runs daily via AWS Glue schedule.
@@ -34,67 +108,175 @@ def extract_accounts_batch(last_modified_after: str = None):
         domain='login',
     )
 
-    soql = """
-        SELECT Id, Name, BillingCountry, BillingCity, BillingStreet,
-               Phone, Website, Industry, AnnualRevenue, NumberOfEmployees,
-               OwnerId, CreatedDate, LastModifiedDate
+    soql = f"""
+        SELECT {', '.join(ACCOUNT_FIELDS)}
         FROM Account
     """
     if last_modified_after:
         soql += f" WHERE LastModifiedDate > {last_modified_after}"
 
-    # Bulk API 2.0 for large volumes
-    results = sf.bulk2.Account.query(soql, max_records=100000)
+    # Bulk API 2.0 for large volumes: a generator of CSV pages, one per locator
+    pages = sf.bulk2.Account.query(soql, max_records=BULK_PAGE_SIZE)
 
-    # Write to S3 Bronze as JSON lines
-    s3 = boto3.client('s3')
-    batch_id = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-    key = f'bronze/salesforce/account/batch_{batch_id}.json'
+    # Stream pages to S3 Bronze as Parquet parts
+    batch_id = new_batch_id()
+    prefix = f'{BRONZE_ACCOUNT_PREFIX}{batch_id}/'
+    stats = write_bulk_pages(pages, boto3.client('s3'), BRONZE_BUCKET, prefix, ACCOUNT_FIELDS, batch_id)
 
-    s3.put_object(
-        Bucket='company-mdm-lakehouse-prod',
-        Key=key,
-        Body=json.dumps(results),
-        ServerSideEncryption='aws:kms',
-    )
-    print(f'Extracted {len(results)} accounts → s3://.../bronze/salesforce/account/')
+    print(f"Extracted {stats['records']} accounts in {stats['pages']} pages "
+          f"→ {len(stats['objects'])} objects under s3://{BRONZE_BUCKET}/{prefix}")
+    return stats
 
 
 # ═══════════════════════════════════════
 # PATTERN 2: Real-time CDC (EventBridge)
 # ═══════════════════════════════════════
 
+CDC_PREFIX = 'bronze/salesforce/cdc/'
+CDC_METRICS_NAMESPACE = 'MDM/SalesforceCDC'
+
+# Created on first use and reused across warm invocations
+_s3_client = None
+
+
+def _s3():
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+def _change_events(event: dict):
+    """
+    Yield (header, payload) for every change event in the invocation.
+
+    Accepts a single EventBridge event, or an SQS batch (`Records`) whose
+    bodies are EventBridge events — the SQS batching window is what turns
+    a trickle of changes into one micro-batch per invocation.
+    """
+    if 'Records' in event:
+        for record in event['Records']:
+            yield from _change_events(json.loads(record['body']))
+        return
+    payload = event.get('detail', {}).get('payload', {})
+    headers = payload.get('ChangeEventHeader', [])
+    for header in headers if isinstance(headers, list) else [headers]:
+        yield header, payload
+
+
+def cdc_rows(event: dict, ingestion_ts: datetime):
+    """One Bronze row per (change event, record id); multi-record changes are not collapsed."""
+    for header, payload in _change_events(event):
+        changed = {f: payload[f] for f in header.get('changedFields', []) if f in payload}
+        for record_id in header.get('recordIds', []) or [None]:
+            yield {
+                'record_id': record_id,
+                'change_type': header.get('changeType', 'UNKNOWN'),
+                'entity_name': header.get('entityName', 'Account'),
+                'changed_fields': header.get('changedFields', []),
+                'changed_values': changed,
+                'commit_timestamp': header.get('commitTimestamp'),
+                'transaction_key': header.get('transactionKey'),
+                'sequence_number': header.get('sequenceNumber'),
+                '_source_system': 'SALESFORCE_CDC',
+                '_ingestion_ts': ingestion_ts.isoformat(),
+            }
+
+
+def write_cdc_batch(rows, s3, bucket: str, ingestion_ts: datetime, batch_key: str) -> list:
+    """
+    Write all rows as one gzip JSON-lines object in the ingestion-hour
+    partition. `batch_key` (the Lambda request id) makes keys unique, so
+    concurrent invocations never overwrite each other.
+    """
+    buffer = io.BytesIO()
+    count = 0
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as gz:
+        for row in rows:
+            gz.write(json.dumps(row, default=str).encode('utf-8') + b'\n')
+            count += 1
+    if not count:
+        return []
+
+    hour = ingestion_ts.strftime('%Y/%m/%d/%H')
+    key = f"{CDC_PREFIX}{hour}/{ingestion_ts.strftime('%Y%m%dT%H%M%S')}_{batch_key}.jsonl.gz"
+    body = buffer.getvalue()
+    s3.put_object(Bucket=bucket, Key=key, Body=body, ContentType='application/x-ndjson',
+                  ContentEncoding='gzip', ServerSideEncryption='aws:kms')
+    return [{'key': key, 'rows': count, 'bytes': len(body)}]
+
+
+def compact_cdc_hour(s3, bucket: str, hour_prefix: str) -> dict:
+    """
+    Merge the per-invocation objects of one closed hour partition into a
+    single compacted object, then delete the originals. Readers tolerate
+    the brief overlap because every row carries its own event identity.
+    """
+    listing = s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=hour_prefix)
+    objects = [o for page in listing for o in page.get('Contents', [])
+               if o['Key'].endswith('.jsonl.gz')]
+    stats = {'objects_before': len(objects), 'bytes_before': sum(o['Size'] for o in objects)}
+    if len(objects) < 2:
+        return {**stats, 'objects_after': len(objects), 'bytes_after': stats['bytes_before']}
+
+    keys = sorted(o['Key'] for o in objects)
+    dest = f"{hour_prefix}compacted_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+    written = concat_objects(s3, bucket, keys, dest, ServerSideEncryption='aws:kms',
+                             ContentType='application/x-ndjson', ContentEncoding='gzip')
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': k} for k in keys[i:i + 1000]]})
+    return {**stats, 'objects_after': 1, 'bytes_after': written}
+
+
+def compact_cdc(hours_back: int = 24, bucket: str = BRONZE_BUCKET) -> dict:
+    """Compact every closed CDC hour partition in the last `hours_back` hours."""
+    now = datetime.now(timezone.utc)
+    results = {}
+    for h in range(1, hours_back + 1):   # h=0 is the open hour, still receiving writes
+        hour_prefix = f"{CDC_PREFIX}{(now - timedelta(hours=h)).strftime('%Y/%m/%d/%H')}/"
+        results[hour_prefix] = compact_cdc_hour(_s3(), bucket, hour_prefix)
+    return results
+
+
+def _emit_metrics(metrics: dict):
+    """Log metrics in CloudWatch Embedded Metric Format (no PutMetricData call)."""
+    units = {'LatencyMs': 'Milliseconds', 'Bytes': 'Bytes'}
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(datetime.now(timezone.utc).timestamp() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': CDC_METRICS_NAMESPACE,
+                'Dimensions': [[]],
+                'Metrics': [{'Name': name, 'Unit': units.get(name, 'Count')} for name in metrics],
+            }],
+        },
+        **metrics,
+    }))
+
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler for Salesforce CDC events.
-    Triggered by EventBridge rule matching AccountChangeEvent.
+    Triggered by EventBridge rule matching AccountChangeEvent (directly or
+    via an SQS queue with a batching window).
+
+    All change events of one invocation land in a single compressed
+    JSON-lines object; any S3 error fails the invocation so the whole
+    batch is retried.
     """
-    s3 = boto3.client('s3')
-
-    for record in event.get('detail', {}).get('payload', {}).get('ChangeEventHeader', []):
-        change_type = record.get('changeType', 'UNKNOWN')
-        entity_name = record.get('entityName', 'Account')
-        record_ids = record.get('recordIds', [])
-
-        cdc_payload = {
-            'change_type': change_type,
-            'entity_name': entity_name,
-            'record_ids': record_ids,
-            'changed_fields': record.get('changedFields', []),
-            'commit_timestamp': record.get('commitTimestamp'),
-            '_source_system': 'SALESFORCE_CDC',
-            '_ingestion_ts': datetime.utcnow().isoformat(),
-        }
-
-        # Write CDC event to S3 Bronze
-        ts = datetime.utcnow().strftime('%Y/%m/%d/%H')
-        key = f'bronze/salesforce/cdc/{ts}/{record_ids[0] if record_ids else "unknown"}.json'
-
-        s3.put_object(
-            Bucket='company-mdm-lakehouse-prod',
-            Key=key,
-            Body=json.dumps(cdc_payload),
-            ServerSideEncryption='aws:kms',
-        )
-
-    return {'statusCode': 200, 'body': f'Processed {len(event.get("detail", {}))} CDC events'}
+    started = time.perf_counter()
+    ingestion_ts = datetime.now(timezone.utc)
+    batch_key = getattr(context, 'aws_request_id', None) or uuid.uuid4().hex
+
+    events = sum(1 for _ in _change_events(event))
+    objects = write_cdc_batch(cdc_rows(event, ingestion_ts), _s3(), BRONZE_BUCKET, ingestion_ts, batch_key)
+
+    metrics = {
+        'ChangeEvents': events,
+        'Records': sum(o['rows'] for o in objects),
+        'Objects': len(objects),
+        'Bytes': sum(o['bytes'] for o in objects),
+        'LatencyMs': round((time.perf_counter() - started) * 1000, 2),
+    }
+    _emit_metrics(metrics)
+    return {'statusCode': 200, 'body': json.dumps(metrics)}
@@ -0,0 +1,160 @@
+"""
+Source → Silver Mapping Registry
+==================================
+Declarative conformance of every Bronze customer source to the Silver
+`customer_master` schema. Each entry in SOURCE_MAPPINGS says where the
+Bronze data lives, which expression feeds each Silver column, and which
+normalizer from NORMALIZERS to apply — adding a source is a dict entry,
+not another hand-written select block.
+
+`compile_sources` turns the registry into one logical plan:
+  - each source becomes a single projection over its Bronze scan, reading
+    only the referenced columns (column pruning),
+  - row filters and the incremental `_ingestion_ts` watermark are applied
+    on the raw scan, so they push down into Delta/Parquet file skipping,
+  - all projections are combined with one `unionByName`, so the whole
+    conformance runs as one job alongside the Silver dedupe.
+
+Normalizers are native Column expressions, not Python UDFs: Catalyst
+compiles them once per plan and no rows leave the JVM.
+"""
+
+from pyspark.sql import Column, DataFrame
+from pyspark.sql.functions import col, expr, lit, lower, regexp_replace, to_date, trim, upper
+
+from spark_session import LAKEHOUSE_ROOT
+
+BRONZE_ROOT = f'{LAKEHOUSE_ROOT}/bronze'
+
+SILVER_COLUMNS = ['source_id', 'full_name', 'email', 'phone', 'country', 'city', 'street_address']
+
+# ── Normalization library (shared by every source) ──
+NORMALIZERS = {
+    'id': lambda c: trim(c.cast('string')),
+    'name': lambda c: trim(upper(c)),
+    'email': lambda c: lower(trim(c)),
+    'phone': lambda c: regexp_replace(c, r'[^0-9+]', ''),
+    'country': lambda c: upper(trim(c)),
+    'text': lambda c: trim(c),
+}
+
+# ── Registry ──
+# columns: Silver column → (source expression, normalizer). The expression
+# is a Bronze column name, a SQL expression, or a tuple of alternative
+# column names (first one present in the Bronze schema wins).
+SOURCE_MAPPINGS = {
+    'SAP_ECC': {
+        'path': f'{BRONZE_ROOT}/sap/kna1/',
+        'format': 'delta',
+        'ingestion_date_column': '_ingestion_date',   # partition column (see delta_layout)
+        'columns': {
+            'source_id': ('KUNNR', 'id'),
+            'full_name': ('NAME1', 'name'),
+            'email': ('SMTP_ADDR', 'email'),
+            'phone': ('TELF1', 'phone'),
+            'country': ('LAND1', 'country'),
+            'city': ('ORT01', 'text'),
+            'street_address': ('STRAS', 'text'),
+        },
+    },
+    'SALESFORCE': {
+        # Parquet parts, one prefix per extraction batch
+        'path': f'{BRONZE_ROOT}/salesforce/account/',
+        'format': 'parquet',
+        'columns': {
+            'source_id': ('Id', 'id'),
+            'full_name': ('Name', 'name'),
+            'email': (('Email', 'Website'), 'email'),
+            'phone': ('Phone', 'phone'),
+            'country': ('BillingCountry', 'country'),
+            'city': ('BillingCity', 'text'),
+            'street_address': ('BillingStreet', 'text'),
+        },
+    },
+    'ORACLE_CRM': {
+        'path': f'{BRONZE_ROOT}/oracle/customers/',
+        'format': 'delta',
+        'columns': {
+            'source_id': ('CUSTOMER_ID', 'id'),
+            'full_name': ("concat_ws(' ', CUST_FIRST_NAME, CUST_LAST_NAME)", 'name'),
+            'email': ('CUST_EMAIL', 'email'),
+            'phone': ('PHONE_NUMBER', 'phone'),
+            'country': ('COUNTRY_ID', 'country'),
+            'city': ('CITY', 'text'),
+            'street_address': ('STREET_ADDRESS', 'text'),
+        },
+    },
+    'ECOMMERCE': {
+        # Customers as embedded in /orders API responses; latest order wins in the dedupe
+        'path': f'{BRONZE_ROOT}/ecommerce/orders/',
+        'format': 'parquet',
+        'filter': 'customer.id IS NOT NULL',
+        'columns': {
+            'source_id': ('customer.id', 'id'),
+            'full_name': ('customer.name', 'name'),
+            'email': ('customer.email', 'email'),
+            'phone': ('customer.phone', 'phone'),
+            'country': ('shipping_address.country_code', 'country'),
+            'city': ('shipping_address.city', 'text'),
+            'street_address': ('shipping_address.line1', 'text'),
+        },
+    },
+}
+
+
+def _source_expr(source, columns: list) -> Column:
+    if isinstance(source, tuple):
+        present = [c for c in source if c in columns]
+        return col(present[0]) if present else lit(None).cast('string')
+    return expr(source)
+
+
+def compile_source(raw: DataFrame, source_system: str, mapping: dict, watermark=None) -> DataFrame:
+    """One Bronze scan → one filtered projection in the Silver schema."""
+    if mapping.get('filter'):
+        raw = raw.filter(mapping['filter'])
+    if watermark is not None:
+        raw = raw.filter(col('_ingestion_ts') > lit(watermark))
+        if mapping.get('ingestion_date_column'):
+            # Same bound on the date partition column → partition pruning
+            raw = raw.filter(col(mapping['ingestion_date_column']) >= to_date(lit(watermark)))
+
+    projection = [NORMALIZERS[normalizer](_source_expr(source, raw.columns)).alias(target)
+                  for target, (source, normalizer) in mapping['columns'].items()]
+    return raw.select(
+        *projection,
+        lit(source_system).alias('_source_system'),
+        col('_ingestion_ts').cast('timestamp').alias('_ingestion_ts'),
+    )
+
+
+def read_bronze(spark, mapping: dict) -> DataFrame:
+    reader = spark.read.format(mapping['format'])
+    if mapping['format'] == 'parquet':
+        reader = reader.option('recursiveFileLookup', 'true')
+    return reader.load(mapping['path'])
+
+
+def bronze_exists(spark, path: str) -> bool:
+    """Whether anything has landed under `path` yet (sources are onboarded over time)."""
+    jvm = spark.sparkContext._jvm
+    hadoop_path = jvm.org.apache.hadoop.fs.Path(path)
+    return hadoop_path.getFileSystem(spark.sparkContext._jsc.hadoopConfiguration()).exists(hadoop_path)
+
+
+def compile_sources(spark, watermarks: dict = None, mappings: dict = None) -> DataFrame:
+    """Union of all registered sources with Bronze data, as a single plan."""
+    watermarks = watermarks or {}
+    mappings = mappings if mappings is not None else SOURCE_MAPPINGS
+
+    conformed = None
+    for source_system, mapping in mappings.items():
+        if not bronze_exists(spark, mapping['path']):
+            print(f"Skipping {source_system}: no Bronze data at {mapping['path']}")
+            continue
+        projected = compile_source(read_bronze(spark, mapping), source_system, mapping,
+                                   watermarks.get(source_system))
+        conformed = projected if conformed is None else conformed.unionByName(projected)
+    if conformed is None:
+        raise RuntimeError('No Bronze customer sources found')
+    return conformed
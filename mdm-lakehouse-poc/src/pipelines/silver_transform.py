@@ -2,71 +2,146 @@
 Silver Layer Transformation
 =============================
 Bronze → Silver: Schema enforcement, deduplication, type casting, null handling.
+
+Per-source conformance is declared in silver_mappings.SOURCE_MAPPINGS
+(SAP ECC, Salesforce, Oracle CRM, E-Commerce) and compiled into a single
+union plan; this module owns dedupe, metadata and the Silver write.
+
+Modes:
+  full         → Conform all Bronze history, keep the latest row per
+                 (source_id, _source_system) and overwrite Silver.
+  incremental  → Read only Bronze rows ingested after the Silver watermark,
+                 deduplicate that slice, and MERGE on
+                 (source_id, _source_system). Rows are rewritten only when
+                 their content `_row_hash` changed, so the nightly job
+                 scales with the day's changes, not total history.
+
+The watermark is the latest `_ingestion_ts` read from Bronze per source,
+kept in a small Delta state table and advanced only after the MERGE
+commits. It moves even when every row of the slice was unchanged (and
+the MERGE wrote nothing); a run that fails before recording it re-reads
+the same slice, which the MERGE applies idempotently.
 """
 
-from pyspark.sql import SparkSession
+import argparse
+
+from pyspark.sql import DataFrame
 from pyspark.sql.functions import (
-    col, trim, upper, lower, regexp_replace, when, coalesce,
-    row_number, current_timestamp, sha2, concat_ws
+    col, row_number, current_timestamp, sha2, concat_ws, max as max_,
+    soundex, upper, trim, regexp_replace,
 )
 from pyspark.sql.window import Window
+from delta.tables import DeltaTable
 
+from silver_mappings import SILVER_COLUMNS, SOURCE_MAPPINGS, compile_sources
+from spark_session import LAKEHOUSE_ROOT, get_spark
 
-def transform_customer_silver():
-    """Clean and conform customer records from all Bronze sources."""
-    spark = SparkSession.builder.appName('silver-customer-transform').getOrCreate()
-
-    # ── Load Bronze sources ──
-    sap = spark.read.format('delta').load('s3://lakehouse/bronze/sap/kna1/')
-    sfdc = spark.read.format('delta').load('s3://lakehouse/bronze/salesforce/account/')
-
-    # ── Conform SAP to common schema ──
-    sap_clean = sap.select(
-        col('KUNNR').alias('source_id'),
-        trim(upper(col('NAME1'))).alias('full_name'),
-        lower(trim(col('SMTP_ADDR'))).alias('email'),
-        regexp_replace('TELF1', r'[^0-9+]', '').alias('phone'),
-        upper(trim(col('LAND1'))).alias('country'),
-        trim(col('ORT01')).alias('city'),
-        trim(col('STRAS')).alias('street_address'),
-        col('_source_system'),
-        col('_ingestion_ts'),
-    )
-
-    # ── Conform Salesforce ──
-    sfdc_clean = sfdc.select(
-        col('Id').alias('source_id'),
-        trim(upper(col('Name'))).alias('full_name'),
-        lower(trim(col('Email'))).alias('email') if 'Email' in sfdc.columns else col('Website').alias('email'),
-        regexp_replace('Phone', r'[^0-9+]', '').alias('phone'),
-        upper(trim(col('BillingCountry'))).alias('country'),
-        trim(col('BillingCity')).alias('city'),
-        trim(col('BillingStreet')).alias('street_address'),
-        col('_source_system'),
-        col('_ingestion_ts'),
-    )
-
-    # ── Union + deduplicate ──
-    combined = sap_clean.unionByName(sfdc_clean, allowMissingColumns=True)
-
-    # Deduplicate within each source (keep most recent ingestion)
+SILVER_PATH = f'{LAKEHOUSE_ROOT}/silver/customer/customer_master/'
+WATERMARK_STATE_PATH = f'{LAKEHOUSE_ROOT}/silver/_state/customer_master_watermarks/'
+
+
+def max_ingestion_ts(df: DataFrame) -> dict:
+    """Latest `_ingestion_ts` per `_source_system` in `df`."""
+    rows = df.groupBy('_source_system').agg(max_('_ingestion_ts').alias('ts')).collect()
+    return {r['_source_system']: r['ts'] for r in rows}
+
+
+def advance_watermarks(watermarks: dict, read: dict) -> dict:
+    """Per-source max of the previous watermarks and the `_ingestion_ts` just read."""
+    advanced = dict(watermarks)
+    for source, ts in read.items():
+        if ts is not None and (advanced.get(source) is None or ts > advanced[source]):
+            advanced[source] = ts
+    return advanced
+
+
+def silver_watermarks(spark) -> dict:
+    """Per-source Bronze watermark ({} before the first load)."""
+    if DeltaTable.isDeltaTable(spark, WATERMARK_STATE_PATH):
+        return {r['_source_system']: r['watermark_ts']
+                for r in spark.read.format('delta').load(WATERMARK_STATE_PATH).collect()}
+    if DeltaTable.isDeltaTable(spark, SILVER_PATH):
+        # Bootstrap for tables loaded before the state table existed
+        return max_ingestion_ts(spark.read.format('delta').load(SILVER_PATH))
+    return {}
+
+
+def record_watermarks(spark, watermarks: dict):
+    """Replace the watermark state (one row per source) in a single commit."""
+    (spark.createDataFrame(list(watermarks.items()), '_source_system string, watermark_ts timestamp')
+     .write.format('delta').mode('overwrite').save(WATERMARK_STATE_PATH))
+
+
+def dedupe_latest(conformed: DataFrame) -> DataFrame:
+    """Keep the most recent ingestion per (source_id, _source_system) and add Silver metadata."""
+    # `_row_hash` covers only the conformed business columns, so re-ingesting
+    # an unchanged record never rewrites its Silver row
     window = Window.partitionBy('source_id', '_source_system').orderBy(col('_ingestion_ts').desc())
-    deduped = (combined
+    deduped = (conformed
                .withColumn('_row_num', row_number().over(window))
                .filter(col('_row_num') == 1)
                .drop('_row_num'))
 
     # ── Add Silver metadata ──
-    silver = (deduped
-              .withColumn('_silver_ts', current_timestamp())
-              .withColumn('_row_hash', sha2(concat_ws('|', *deduped.columns), 256)))
+    return (deduped
+            .withColumn('customer_id', concat_ws(':', '_source_system', 'source_id'))
+            # Same key as mdm_matching.normalize_customers; Silver is Z-ordered on it
+            .withColumn('name_soundex', soundex(upper(trim(regexp_replace('full_name', r'[^A-Za-z\s]', '')))))
+            .withColumn('_silver_ts', current_timestamp())
+            .withColumn('_row_hash', sha2(concat_ws('|', *SILVER_COLUMNS, '_source_system'), 256)))
+
+
+def _last_operation_metrics(spark) -> dict:
+    """Row counts of the Silver commit just made, from the Delta log (no recount)."""
+    metrics = DeltaTable.forPath(spark, SILVER_PATH).history(1).first()['operationMetrics']
+    return {k: int(v) for k, v in metrics.items()
+            if k in ('numOutputRows', 'numTargetRowsInserted', 'numTargetRowsUpdated', 'numSourceRows')}
+
+
+def transform_customer_silver(incremental: bool = False) -> dict:
+    """Clean and conform customer records from all Bronze sources."""
+    spark = get_spark('silver-customer-transform',
+                      input_paths=[m['path'] for m in SOURCE_MAPPINGS.values()])
+
+    if incremental and not DeltaTable.isDeltaTable(spark, SILVER_PATH):
+        print('No Silver table yet — running a full load')
+        incremental = False
+
+    if not incremental:
+        # ── Full rebuild ──
+        silver = dedupe_latest(compile_sources(spark))
+        silver.write.format('delta').mode('overwrite') \
+            .option('overwriteSchema', 'true') \
+            .save(SILVER_PATH)
+        metrics = _last_operation_metrics(spark)
+        # Silver keeps the latest row per key, so its max per source is the max read
+        record_watermarks(spark, max_ingestion_ts(spark.read.format('delta').load(SILVER_PATH)))
+        print(f"Silver customer_master: {metrics.get('numOutputRows')} records (full)")
+        return metrics
+
+    # ── Incremental: only the slice past each source's watermark ──
+    watermarks = silver_watermarks(spark)
+    print(f'Silver watermarks: {watermarks}')
+    # Checkpointed so the MERGE and the new watermark see the same slice
+    updates = dedupe_latest(compile_sources(spark, watermarks)).localCheckpoint()
+    read = max_ingestion_ts(updates)   # dedupe keeps each key's latest row, so this is the slice max
 
-    # ── Write to Silver ──
-    silver.write.format('delta').mode('overwrite') \
-        .save('s3://lakehouse/silver/customer/customer_master/')
+    (DeltaTable.forPath(spark, SILVER_PATH).alias('s')
+     .merge(updates.alias('u'), 's.source_id = u.source_id AND s._source_system = u._source_system')
+     # Out-of-order Bronze rows never overwrite a newer Silver version
+     .whenMatchedUpdateAll(condition='s._row_hash <> u._row_hash AND u._ingestion_ts >= s._ingestion_ts')
+     .whenNotMatchedInsertAll()
+     .execute())
 
-    print(f'Silver customer_master: {silver.count()} records')
+    metrics = _last_operation_metrics(spark)
+    record_watermarks(spark, advance_watermarks(watermarks, read))
+    print(f"Silver customer_master MERGE: {metrics.get('numSourceRows')} changed Bronze keys → "
+          f"{metrics.get('numTargetRowsInserted')} inserted, {metrics.get('numTargetRowsUpdated')} updated")
+    return metrics
 
 
 if __name__ == '__main__':
-    transform_customer_silver()
+    parser = argparse.ArgumentParser(description='Bronze → Silver customer conformance')
+    parser.add_argument('--incremental', action='store_true',
+                        help='MERGE only Bronze rows ingested since the last Silver load')
+    transform_customer_silver(incremental=parser.parse_args().incremental)
@@ -0,0 +1,180 @@
+"""
+Shared Spark Session & Lakehouse Root
+=======================================
+One place for the Spark configuration every pipeline job runs with,
+instead of each job calling `SparkSession.builder...getOrCreate()` with
+defaults.
+
+  - Adaptive Query Execution with partition coalescing and skew-join
+    splitting (the Soundex self-join in blocking is the usual offender).
+  - Shuffle partitions sized from the job's input bytes
+    (TARGET_PARTITION_BYTES each); AQE coalesces any excess at runtime.
+  - Arrow for pandas interop (pandas_udf scoring, toPandas).
+  - Delta extensions plus merge / write tuning.
+
+`LAKEHOUSE_ROOT` (env var, default the production bucket) prefixes every
+table path, so the same jobs can run against a local directory. With
+`local=True` (or PIPELINE_LOCAL=1) the session runs in-process with the
+Delta jars resolved by delta-spark — see local_pipeline.py.
+
+`job_group` / `job_group_metrics` attribute Spark work to a named block
+of driver code and total its stage metrics (input, shuffle, peak
+execution memory) from the status REST API — used by the layout probes
+and the medallion benchmark.
+"""
+
+import json
+import math
+import os
+import urllib.request
+from contextlib import contextmanager
+
+from pyspark.sql import SparkSession
+
+LAKEHOUSE_ROOT = os.environ.get('LAKEHOUSE_ROOT', 's3://company-mdm-lakehouse-prod').rstrip('/')
+PIPELINES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ── Shuffle sizing ──
+TARGET_PARTITION_BYTES = 128 * 2**20
+MIN_SHUFFLE_PARTITIONS = 8
+MAX_SHUFFLE_PARTITIONS = 4000
+DEFAULT_SHUFFLE_PARTITIONS = 200   # When the input size is unknown
+
+BASE_CONFIG = {
+    # Adaptive execution + skew handling
+    'spark.sql.adaptive.enabled': 'true',
+    'spark.sql.adaptive.coalescePartitions.enabled': 'true',
+    'spark.sql.adaptive.advisoryPartitionSizeInBytes': str(TARGET_PARTITION_BYTES),
+    'spark.sql.adaptive.skewJoin.enabled': 'true',
+    'spark.sql.adaptive.skewJoin.skewedPartitionFactor': '4',
+    'spark.sql.adaptive.skewJoin.skewedPartitionThresholdInBytes': str(256 * 2**20),
+    'spark.sql.autoBroadcastJoinThreshold': str(64 * 2**20),
+    # Arrow for pandas_udf / toPandas
+    'spark.sql.execution.arrow.pyspark.enabled': 'true',
+    'spark.sql.execution.arrow.pyspark.fallback.enabled': 'true',
+    'spark.sql.execution.arrow.maxRecordsPerBatch': '20000',
+    # Delta Lake
+    'spark.sql.extensions': 'io.delta.sql.DeltaSparkSessionExtension',
+    'spark.sql.catalog.spark_catalog': 'org.apache.spark.sql.delta.catalog.DeltaCatalog',
+    'spark.databricks.delta.optimizeWrite.enabled': 'true',
+    'spark.databricks.delta.autoCompact.enabled': 'true',
+    'spark.databricks.delta.merge.repartitionBeforeWrite.enabled': 'true',
+    'spark.databricks.delta.retentionDurationCheck.enabled': 'true',
+    'spark.serializer': 'org.apache.spark.serializer.KryoSerializer',
+}
+
+LOCAL_CONFIG = {
+    'spark.driver.memory': os.environ.get('SPARK_DRIVER_MEMORY', '4g'),
+    'spark.ui.showConsoleProgress': 'false',
+    'spark.sql.warehouse.dir': os.path.join(os.environ.get('TMPDIR', '/tmp'), 'spark-warehouse'),
+}
+
+
+def shuffle_partitions_for(input_bytes: int) -> int:
+    """Shuffle partition count for `input_bytes` of input, clamped to sane bounds."""
+    if not input_bytes:
+        return DEFAULT_SHUFFLE_PARTITIONS
+    wanted = math.ceil(input_bytes / TARGET_PARTITION_BYTES)
+    return max(MIN_SHUFFLE_PARTITIONS, min(MAX_SHUFFLE_PARTITIONS, wanted))
+
+
+def input_size_bytes(spark, paths) -> int:
+    """Total bytes under `paths` (missing paths count as 0)."""
+    jvm = spark.sparkContext._jvm
+    conf = spark.sparkContext._jsc.hadoopConfiguration()
+    total = 0
+    for path in paths:
+        hadoop_path = jvm.org.apache.hadoop.fs.Path(path)
+        fs = hadoop_path.getFileSystem(conf)
+        if fs.exists(hadoop_path):
+            total += fs.getContentSummary(hadoop_path).getLength()
+    return total
+
+
+def get_spark(app_name: str, input_paths: list = None, local: bool = None) -> SparkSession:
+    """
+    The tuned session for a pipeline job. Re-uses an active session (e.g.
+    inside the local pipeline), in which case only the runtime settings —
+    shuffle partitions — are adjusted for this job's input.
+    """
+    if local is None:
+        local = os.environ.get('PIPELINE_LOCAL') == '1'
+
+    active = SparkSession.getActiveSession()
+    if active is None:
+        builder = SparkSession.builder.appName(app_name)
+        for key, value in BASE_CONFIG.items():
+            builder = builder.config(key, value)
+        if local:
+            from delta import configure_spark_with_delta_pip
+            # Python workers import sibling modules (match_scoring, ...) by name
+            os.environ['PYTHONPATH'] = os.pathsep.join(
+                p for p in (PIPELINES_DIR, os.environ.get('PYTHONPATH')) if p)
+            builder = builder.master(os.environ.get('SPARK_MASTER', 'local[*]'))
+            for key, value in LOCAL_CONFIG.items():
+                builder = builder.config(key, value)
+            builder = configure_spark_with_delta_pip(builder)
+        active = builder.getOrCreate()
+        if local:
+            active.sparkContext.setLogLevel('WARN')
+
+    partitions = (shuffle_partitions_for(input_size_bytes(active, input_paths))
+                  if input_paths else DEFAULT_SHUFFLE_PARTITIONS)
+    active.conf.set('spark.sql.shuffle.partitions', str(partitions))
+    print(f'[{app_name}] spark.sql.shuffle.partitions={partitions}')
+    return active
+
+
+# ═══════════════════════════════════════
+# Stage metrics
+# ═══════════════════════════════════════
+
+# REST stage field → metric name; peak memory is a max, the rest are sums
+STAGE_METRICS = {
+    'inputBytes': 'input_bytes',
+    'shuffleReadBytes': 'shuffle_read_bytes',
+    'shuffleWriteBytes': 'shuffle_write_bytes',
+    'peakExecutionMemory': 'peak_execution_memory_bytes',
+}
+
+
+@contextmanager
+def job_group(spark, group: str):
+    """Tag every Spark job started in the block (on this thread) with `group`."""
+    sc = spark.sparkContext
+    sc.setJobGroup(group, group)
+    try:
+        yield
+    finally:
+        sc.setLocalProperty('spark.jobGroup.id', None)
+
+
+def _rest(spark, endpoint: str):
+    sc = spark.sparkContext
+    url = f'{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/{endpoint}'
+    with urllib.request.urlopen(url) as resp:
+        return json.load(resp)
+
+
+def job_group_metrics(spark, group: str) -> dict:
+    """Stage metrics of all jobs run under `group` (see STAGE_METRICS)."""
+    tracker = spark.sparkContext.statusTracker()
+    stage_ids = {s for j in tracker.getJobIdsForGroup(group)
+                 for s in (tracker.getJobInfo(j).stageIds if tracker.getJobInfo(j) else [])}
+    totals = dict.fromkeys(STAGE_METRICS.values(), 0)
+    totals['stages'] = 0
+    for stage in _rest(spark, 'stages'):
+        if stage['stageId'] not in stage_ids:
+            continue
+        totals['stages'] += 1
+        for field, name in STAGE_METRICS.items():
+            value = stage.get(field, 0)
+            totals[name] = max(totals[name], value) if name.startswith('peak_') else totals[name] + value
+    return totals
+
+
+def jvm_peak_memory(spark) -> dict:
+    """Peak JVM heap / off-heap bytes per executor (the driver in local mode)."""
+    return {e['id']: {'heap_bytes': e['peakMemoryMetrics'].get('JVMHeapMemory', 0),
+                      'off_heap_bytes': e['peakMemoryMetrics'].get('JVMOffHeapMemory', 0)}
+            for e in _rest(spark, 'executors') if e.get('peakMemoryMetrics')}
@@ -0,0 +1,126 @@
+"""
+Spark-Native Similarity Expressions
+=====================================
+Jaro-Winkler and the composite match score as pure Spark SQL
+expressions, built from higher-order functions (`aggregate`,
+`transform`, `filter`, `sequence`).
+
+Scoring this way runs entirely inside the executor JVM: no Python
+worker, no Arrow/pickle serialization, and no `jellyfish` on the
+executors. Results agree with jellyfish and the NumPy engine in
+match_scoring.py to floating-point rounding, and are identical after
+the cast to FLOAT (same weights, same tier thresholds).
+
+Two flavours, selected via `mdm_matching.main(scoring_mode=...)`:
+  spark_sql              → Exact Jaro-Winkler from higher-order functions.
+                           Parity with the Python paths, but HOF lambdas are
+                           interpreted (CodegenFallback), so it is CPU-heavy.
+  spark_sql_levenshtein  → Normalized `levenshtein()` similarity instead of
+                           JW. Fully whole-stage code-generated and by far
+                           the cheapest, but only an approximation: scores
+                           differ from JW — validate tier thresholds before
+                           using it for merges.
+"""
+
+from pyspark.sql import Column
+from pyspark.sql.functions import expr
+
+from match_scoring import (
+    NAME_WEIGHT, EMAIL_WEIGHT, PHONE_WEIGHT, ADDRESS_WEIGHT, SOURCE_WEIGHT,
+)
+
+
+def _let(var: str, bindings: dict, body: str) -> str:
+    """SQL `let`: bind named values once via a one-element transform()."""
+    fields = ', '.join(f"'{name}', {value}" for name, value in bindings.items())
+    return f'transform(array(named_struct({fields})), {var} -> {body})[0]'
+
+
+def jaro_winkler_sql(left: str, right: str) -> str:
+    """
+    SQL text computing jellyfish-compatible Jaro-Winkler of two string
+    expressions (nulls are treated as empty strings and score 0.0).
+    """
+    # Greedy character matching: one fold step per character of `a`,
+    # scanning only its search window in `b`. The accumulator holds the
+    # matched positions of `a` and `b` (append-only, no per-step copies).
+    window_scan = ('aggregate(sequence(greatest(1, i - v.sr), least(v.lb, i + v.sr)), 0, '
+                   '(found, k) -> IF(found = 0 AND v.cb[k - 1] = v.ca[i - 1] '
+                   'AND NOT array_contains(acc.bm, k), k, found))')
+    candidate = f'IF(greatest(1, i - v.sr) > least(v.lb, i + v.sr), 0, {window_scan})'
+    step = _let('s', {'j': candidate},
+                "IF(s.j > 0, named_struct('am', concat(acc.am, array(i)), "
+                "'bm', concat(acc.bm, array(s.j))), acc)")
+    matching = (f"aggregate(sequence(1, v.la), "
+                f"named_struct('am', cast(array() as array<int>), 'bm', cast(array() as array<int>)), "
+                f"(acc, i) -> {step})")
+
+    # Transpositions, Jaro and the Winkler prefix boost
+    scored = _let('m', {
+        'c': 'size(mt.am)',
+        'tr': 'size(filter(zip_with(transform(mt.am, i -> v.ca[i - 1]), '
+              'transform(array_sort(mt.bm), k -> v.cb[k - 1]), (x, y) -> x != y), d -> d)) div 2',
+        'p': 'least(4, v.la, v.lb)',
+    }, _let('r', {
+        'jaro': 'IF(m.c = 0, 0D, (m.c / v.la + m.c / v.lb + (m.c - m.tr) / m.c) / 3)',
+        'pos': 'array_position(zip_with(slice(v.ca, 1, m.p), slice(v.cb, 1, m.p), (x, y) -> x != y), true)',
+    }, 'IF(r.jaro > 0.7, r.jaro + IF(r.pos = 0, m.p, r.pos - 1) * 0.1 * (1 - r.jaro), r.jaro)'))
+
+    body = f'transform(array({matching}), mt -> {scored})[0]'
+
+    a = f"coalesce({left}, '')"
+    b = f"coalesce({right}, '')"
+    return _let('v', {
+        'a': a,
+        'b': b,
+        'ca': f"split({a}, '')",
+        'cb': f"split({b}, '')",
+        'la': f'length({a})',
+        'lb': f'length({b})',
+        'sr': f'CAST(greatest(greatest(length({a}), length({b})) div 2 - 1, 0) AS INT)',
+    }, f'CASE WHEN v.la = 0 OR v.lb = 0 THEN 0D WHEN v.a = v.b THEN 1D ELSE {body} END')
+
+
+def jaro_winkler(left: str, right: str) -> Column:
+    """Column wrapper around jaro_winkler_sql()."""
+    return expr(jaro_winkler_sql(left, right))
+
+
+def levenshtein_similarity_sql(left: str, right: str) -> str:
+    """SQL text for 1 - levenshtein / max length (0.0 when either side is empty)."""
+    a = f"coalesce({left}, '')"
+    b = f"coalesce({right}, '')"
+    return (f'IF(length({a}) = 0 OR length({b}) = 0, 0D, '
+            f'1D - levenshtein({a}, {b}) / greatest(length({a}), length({b})))')
+
+
+SIMILARITY_SQL = {
+    'jaro_winkler': jaro_winkler_sql,
+    'levenshtein': levenshtein_similarity_sql,
+}
+
+
+def composite_match_score_sql(name_a: str, name_b: str, email_a: str, email_b: str,
+                              phone_a: str, phone_b: str, addr_a: str, addr_b: str,
+                              similarity: str = 'jaro_winkler') -> Column:
+    """
+    Weighted composite score as a single SQL expression.
+
+    Arguments are SQL column references (e.g. 'a.norm_name'). Terms are
+    summed in the same order as the Python scorers. `similarity` picks the
+    string metric for name and address (see SIMILARITY_SQL).
+    """
+    sim = SIMILARITY_SQL[similarity]
+    def present(c):
+        return f"coalesce({c}, '') != ''"
+
+    email = f'IF({present(email_a)} AND {present(email_b)} AND {email_a} = {email_b}, 1D, 0D)'
+    phone = (f'IF({present(phone_a)} AND {present(phone_b)} '
+             f'AND right({phone_a}, 10) = right({phone_b}, 10), 1D, 0D)')
+    return expr(
+        f'CAST({NAME_WEIGHT}D * {sim(name_a, name_b)}'
+        f' + {EMAIL_WEIGHT}D * {email}'
+        f' + {PHONE_WEIGHT}D * {phone}'
+        f' + {ADDRESS_WEIGHT}D * {sim(addr_a, addr_b)}'
+        f' + {SOURCE_WEIGHT}D AS FLOAT)'
+    )
@@ -0,0 +1,35 @@
+"""
+Shared Test Fixtures
+=====================
+`spark`: one in-process local Spark session (plain Spark, no Delta jars)
+for the pipeline tests that run DataFrame logic. Skipped when no Java
+runtime is available (JAVA_HOME unset and no `java` on PATH).
+"""
+
+import os
+import shutil
+
+import pytest
+
+PIPELINES_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines')
+
+
+@pytest.fixture(scope='session')
+def spark():
+    if not os.environ.get('JAVA_HOME') and shutil.which('java') is None:
+        pytest.skip('No Java runtime for local Spark')
+    pyspark_sql = pytest.importorskip('pyspark.sql')
+
+    # Python workers import sibling modules (match_scoring, ...) by name
+    os.environ['PYTHONPATH'] = os.pathsep.join(
+        p for p in (os.path.abspath(PIPELINES_DIR), os.environ.get('PYTHONPATH')) if p)
+    session = (pyspark_sql.SparkSession.builder
+               .master('local[2]')
+               .appName('mdm-lakehouse-tests')
+               .config('spark.sql.shuffle.partitions', '4')
+               .config('spark.ui.enabled', 'false')
+               .config('spark.ui.showConsoleProgress', 'false')
+               .getOrCreate())
+    session.sparkContext.setLogLevel('ERROR')
+    yield session
+    session.stop()
@@ -0,0 +1,138 @@
+"""
+Agent Loop Tests
+=================
+Concurrent tool execution in run_agent, against a scripted client and
+slow in-process tool handlers (no API calls).
+Run: pytest tests/test_agent_loop.py -v
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'agents'))
+
+import agent_loop  # noqa: E402
+
+
+def _tool_use(tool_id, name, **tool_input):
+    return SimpleNamespace(type='tool_use', id=tool_id, name=name, input=tool_input)
+
+
+class ScriptedClient:
+    """Returns the scripted responses in order and records each request."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def slow_handlers(monkeypatch):
+    def sleep_tool(seconds, label):
+        time.sleep(seconds)
+        return {'label': label}
+
+    def failing_tool():
+        raise ValueError('boom')
+
+    monkeypatch.setitem(agent_loop.TOOL_HANDLERS, 'sleep_tool', sleep_tool)
+    monkeypatch.setitem(agent_loop.TOOL_HANDLERS, 'failing_tool', failing_tool)
+
+
+def test_tools_run_concurrently_and_keep_tool_use_order(monkeypatch, slow_handlers):
+    blocks = [_tool_use('t1', 'sleep_tool', seconds=0.4, label='slow'),
+              _tool_use('t2', 'sleep_tool', seconds=0.1, label='fast'),
+              _tool_use('t3', 'failing_tool'),
+              _tool_use('t4', 'no_such_tool')]
+    client = ScriptedClient(
+        SimpleNamespace(stop_reason='tool_use', content=blocks),
+        SimpleNamespace(stop_reason='end_turn', content=[SimpleNamespace(type='text', text='done')]),
+    )
+    monkeypatch.setattr(agent_loop, 'client', client)
+
+    stats = {}
+    started = time.perf_counter()
+    assert agent_loop.run_agent('system', 'task', stats=stats) == 'done'
+    assert time.perf_counter() - started < 0.45  # slowest tool, not the sum
+
+    results = client.requests[1]['messages'][-1]['content']
+    assert [r['tool_use_id'] for r in results] == ['t1', 't2', 't3', 't4']
+    assert '"slow"' in results[0]['content'] and '"fast"' in results[1]['content']
+    assert results[2]['is_error'] and 'boom' in results[2]['content']
+    assert results[3]['is_error'] and 'Unknown tool' in results[3]['content']
+    assert [t['status'] for t in stats['tools']] == ['success', 'success', 'error', 'error']
+    assert stats['tools'][0]['seconds'] >= 0.4
+
+
+def test_slow_tool_times_out_without_blocking_the_others(slow_handlers):
+    blocks = [_tool_use('t1', 'sleep_tool', seconds=2, label='hung'),
+              _tool_use('t2', 'sleep_tool', seconds=0.05, label='ok')]
+    started = time.perf_counter()
+    results, latencies = agent_loop.execute_tools(blocks, max_workers=2, timeout_s=0.3)
+    assert time.perf_counter() - started < 1
+    assert results[0]['is_error'] and 'timed out' in results[0]['content']
+    assert not results[1].get('is_error')
+    assert [l['status'] for l in latencies] == ['error', 'success']
+
+    # Saturated pool: the hung tool's slot is freed on timeout, so the queued one still runs
+    started = time.perf_counter()
+    results, latencies = agent_loop.execute_tools(blocks, max_workers=1, timeout_s=0.3)
+    assert time.perf_counter() - started < 1
+    assert results[0]['is_error'] and not results[1].get('is_error')
+    assert [l['status'] for l in latencies] == ['error', 'success']
+
+
+def _usage(fresh, cache_read=0, cache_write=0):
+    return SimpleNamespace(input_tokens=fresh, cache_read_input_tokens=cache_read,
+                           cache_creation_input_tokens=cache_write, output_tokens=50)
+
+
+def test_stable_prefix_is_cache_marked_and_usage_tracked(monkeypatch, slow_handlers):
+    client = ScriptedClient(
+        SimpleNamespace(stop_reason='tool_use', usage=_usage(100, cache_write=2000),
+                        content=[_tool_use('t1', 'sleep_tool', seconds=0, label='a')]),
+        SimpleNamespace(stop_reason='end_turn', usage=_usage(100, cache_read=2000, cache_write=150),
+                        content=[SimpleNamespace(type='text', text='done')]),
+    )
+    monkeypatch.setattr(agent_loop, 'client', client)
+
+    stats = {}
+    agent_loop.run_agent('system', 'task', stats=stats)
+    first, second = client.requests
+    assert first['system'][0]['cache_control'] == {'type': 'ephemeral'}
+    assert first['tools'][-1]['name'] == 'recall_tool_result' and 'cache_control' in first['tools'][-1]
+    assert 'cache_control' in second['messages'][-1]['content'][-1]
+
+    assert [i['cache_read_input_tokens'] for i in stats['iterations']] == [0, 2000]
+    assert stats['tokens']['input_tokens'] == 200
+    assert stats['cache_hit_rate'] == round(2000 / 4350, 3)
+
+
+def test_old_tool_results_are_compacted_and_recallable(monkeypatch):
+    payload = 'x' * 20000 + 'TAIL'
+    monkeypatch.setitem(agent_loop.TOOL_HANDLERS, 'big_tool', lambda: payload)
+    client = ScriptedClient(
+        *[SimpleNamespace(stop_reason='tool_use', content=[_tool_use(f't{i}', 'big_tool')]) for i in range(1, 5)],
+        SimpleNamespace(stop_reason='tool_use',
+                        content=[_tool_use('t5', 'recall_tool_result', tool_use_id='t1', offset=20000)]),
+        SimpleNamespace(stop_reason='end_turn', content=[SimpleNamespace(type='text', text='done')]),
+    )
+    monkeypatch.setattr(agent_loop, 'client', client)
+
+    stats = {}
+    agent_loop.run_agent('system', 'task', history_token_budget=8000, stats=stats)
+    tool_turns = [m['content'][0]['content'] for m in client.requests[-1]['messages']
+                  if m['role'] == 'user' and isinstance(m['content'], list)]
+    assert stats['compactions'] >= 1
+    assert len(tool_turns[0]) < 1000 and 'recall_tool_result' in tool_turns[0]
+    assert len(tool_turns[3]) > 20000            # recent turns stay intact
+    assert '"total_chars": 20006' in tool_turns[-1] and 'TAIL' in tool_turns[-1]
@@ -0,0 +1,81 @@
+"""
+Blocking Index Tests
+=====================
+Per-pass blocking keys, block-size capping and candidate pair
+de-duplication in local Spark.
+Run: pytest tests/test_blocking.py -v
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines'))
+
+from blocking import (  # noqa: E402
+    BLOCKING_PASSES, MINHASH_BANDS, build_block_keys, candidate_pairs, cap_blocks,
+    incremental_candidate_pairs,
+)
+
+COLUMNS = ['customer_id', 'norm_name', 'norm_email', 'norm_phone']
+
+
+@pytest.fixture(scope='module')
+def customers(spark):
+    rows = [
+        ('C1', 'ACME CORP', 'ops@acme.com', '15125550123'),
+        ('C2', 'CORP ACME', 'billing@acme.com', '5550123'),
+        ('C3', 'JOHN SMITH', 'john@gmail.com', '123'),
+        ('C4', 'JON SMYTH', 'jon@www.smyth.org', ''),
+    ]
+    return spark.createDataFrame(rows, COLUMNS)
+
+
+def _keys(keys, block_pass):
+    return {(r['customer_id'], r['block_key']) for r in keys.filter(f"block_pass = '{block_pass}'").collect()}
+
+
+def _pairs(pairs):
+    return {(r['id_a'], r['id_b']): sorted(r['block_passes']) for r in pairs.collect()}
+
+
+def test_per_pass_keys(customers):
+    keys = build_block_keys(customers)
+    assert {r['block_pass'] for r in keys.collect()} == set(BLOCKING_PASSES)
+
+    assert _keys(keys, 'soundex') == {('C1', 'A252'), ('C2', 'C612'), ('C3', 'J525'), ('C4', 'J525')}
+    # Free-mail domains yield no key; a leading www. is dropped
+    assert _keys(keys, 'email_domain') == {('C1', 'acme.com'), ('C2', 'acme.com'), ('C4', 'smyth.org')}
+    # Last 7 digits; numbers shorter than that yield no key
+    assert _keys(keys, 'phone_suffix') == {('C1', '5550123'), ('C2', '5550123')}
+    assert _keys(keys, 'name_tokens') == {('C1', 'ACME CORP'), ('C2', 'ACME CORP'),
+                                          ('C3', 'JOHN SMITH'), ('C4', 'JON SMYTH')}
+    # One LSH bucket key per band, per record
+    qgrams = _keys(keys, 'name_qgram')
+    assert all(sum(c == cid for c, _ in qgrams) == MINHASH_BANDS for cid in ('C1', 'C2', 'C3', 'C4'))
+
+
+def test_pairs_are_deduplicated_across_passes(customers):
+    pairs = _pairs(candidate_pairs(cap_blocks(build_block_keys(customers, {
+        p: BLOCKING_PASSES[p] for p in ('soundex', 'email_domain', 'phone_suffix', 'name_tokens')}))))
+    assert pairs == {('C1', 'C2'): ['email_domain', 'name_tokens', 'phone_suffix'],
+                     ('C3', 'C4'): ['soundex']}
+
+
+def test_oversized_blocks_are_dropped(spark):
+    rows = [(f'C{i:02d}', 'ACME CORP', f'u{i}@acme.com', f'555{i:04d}') for i in range(6)]
+    keys = build_block_keys(spark.createDataFrame(rows, COLUMNS),
+                            {p: BLOCKING_PASSES[p] for p in ('soundex', 'phone_suffix')})
+
+    capped = cap_blocks(keys, max_block_size=5)
+    assert capped.count() == 0                      # soundex block of 6 > cap; phone blocks of 1
+    assert candidate_pairs(cap_blocks(keys, max_block_size=6)).count() == 15
+
+
+def test_incremental_pairs_match_full_run_for_changed_records(customers):
+    keys = build_block_keys(customers)
+    changed = keys.filter("customer_id = 'C2'")
+    full = {p: v for p, v in _pairs(candidate_pairs(cap_blocks(keys))).items() if 'C2' in p}
+    assert _pairs(incremental_candidate_pairs(changed, keys)) == full
+    assert incremental_candidate_pairs(changed, keys, max_block_size=1).count() == 0
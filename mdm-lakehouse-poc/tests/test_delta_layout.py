@@ -0,0 +1,27 @@
+"""
+Delta Layout Tests
+===================
+The partitioning check the SAP extraction runs before appending to Bronze
+KNA1. No Spark session needed.
+Run: pytest tests/test_delta_layout.py -v
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines'))
+
+pytest.importorskip('delta')
+from delta_layout import partition_columns, require_partitioning  # noqa: E402
+
+
+def test_registry_partitioning_passes():
+    require_partitioning('bronze_sap_kna1', partition_columns('bronze_sap_kna1'))
+    require_partitioning('bronze_sap_kna1', ['_ingestion_date'])
+
+
+def test_old_land1_partitioning_asks_for_relayout():
+    with pytest.raises(RuntimeError, match='--relayout --tables bronze_sap_kna1'):
+        require_partitioning('bronze_sap_kna1', ['LAND1'])
@@ -0,0 +1,84 @@
+"""
+Scale-Factor Generator Tests
+==============================
+Row counts, keys and reproducibility of the vectorized core generator
+and the streaming / sessionized clickstream generators.
+Run: pytest tests/test_generate_scaled.py -v
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'data_generation'))
+
+from generate_core_data import N_CUSTOMERS, N_ORDERS, N_PRODUCTS, customer_uids, generate_scaled  # noqa: E402
+from generate_clickstream import generate_clickstream_stream, generate_sessions_stream  # noqa: E402
+
+
+def _read(root, table):
+    return pd.read_parquet(os.path.join(root, f'{table}.parquet'))
+
+
+def test_scaled_tables_have_scaled_counts_and_valid_keys(tmp_path):
+    report = generate_scaled(2, str(tmp_path), chunk_rows=300)
+    assert report['dim_customer']['rows'] == 2 * N_CUSTOMERS
+    assert report['fact_sales']['rows'] == 2 * N_ORDERS
+
+    customers = _read(tmp_path, 'gold/dim_customer')
+    sales = _read(tmp_path, 'gold/fact_sales')
+    assert customers['customer_uid'].is_unique
+    assert sales['order_id'].is_unique
+    assert sales['customer_uid'].isin(customers['customer_uid']).all()
+    region = sales.merge(customers[['customer_uid', 'country']], on='customer_uid')
+    assert (region['region'] == region['country']).all()
+    assert (sales['line_total'] >= 0).all()
+
+
+def test_fixed_tables_are_written_once_with_small_chunks(tmp_path):
+    report = generate_scaled(1, str(tmp_path), chunk_rows=50)   # below the 80 products
+    products, dates = _read(tmp_path, 'gold/dim_product'), _read(tmp_path, 'gold/dim_date')
+    assert products['product_id'].is_unique and len(products) == N_PRODUCTS
+    assert dates['date_key'].is_unique
+    assert report['dim_product']['rows'] == N_PRODUCTS
+    assert report['dim_date']['rows'] == len(dates)
+
+
+def test_same_seed_same_output(tmp_path):
+    generate_scaled(1, str(tmp_path / 'a'), chunk_rows=700, seed=7)
+    generate_scaled(1, str(tmp_path / 'b'), chunk_rows=700, seed=7)
+    pd.testing.assert_frame_equal(_read(tmp_path / 'a', 'gold/fact_sales'),
+                                  _read(tmp_path / 'b', 'gold/fact_sales'))
+
+
+def test_clickstream_stream_is_date_partitioned(tmp_path):
+    uids = customer_uids(np.arange(50)).to_pylist()
+    stats = generate_clickstream_stream(uids, 30_000, str(tmp_path), chunk_events=7_000)
+    assert stats['events'] == 30_000
+
+    events = ds.dataset(str(tmp_path), format='parquet', partitioning='hive').to_table().to_pandas()
+    assert len(events) == 30_000 and events['event_id'].is_unique
+    assert (events['event_timestamp'].dt.strftime('%Y-%m-%d') == events['event_date'].astype(str)).all()
+    assert events['customer_uid'].dropna().isin(uids).all()
+    assert (events['customer_uid'].isna() == events['visitor_id'].notna()).all()
+    assert 0.2 < events['customer_uid'].isna().mean() < 0.4
+
+
+def test_sessions_are_ordered_and_monotonic(tmp_path):
+    uids = customer_uids(np.arange(50)).to_pylist()
+    stats = generate_sessions_stream(uids, 5_000, str(tmp_path), chunk_sessions=1_500)
+    assert stats['sessions'] == 5_000
+
+    events = ds.dataset(str(tmp_path), format='parquet', partitioning='hive').to_table().to_pandas()
+    assert events['session_id'].nunique() == 5_000
+    ordered = events.sort_values(['session_id', 'event_timestamp'], kind='stable')
+    assert (ordered.index == events.index).all()
+    by_session = events.groupby('session_id')
+    assert by_session['event_timestamp'].apply(lambda ts: ts.is_monotonic_increasing).all()
+    assert (by_session['session_step'].min() == 0).all()
+    assert (by_session['device_type'].nunique() == 1).all()
+    # Ids follow start time across batches, not just within one
+    assert by_session['event_timestamp'].min().sort_index().is_monotonic_increasing
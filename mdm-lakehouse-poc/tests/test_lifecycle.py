@@ -0,0 +1,55 @@
+"""
+Lifecycle Scoring Tests
+========================
+Stage rules and derived columns of the vectorized lifecycle scorer.
+Run: pytest tests/test_lifecycle.py -v
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'data_generation'))
+
+from generate_lifecycle import score_lifecycle  # noqa: E402
+
+# (status, created_date, last_activity_date, expected stage); reference date 2026-02-01
+CASES = [
+    ('Churned', '2020-01-01', '2026-01-30', 'Churned'),
+    ('New', '2025-12-15', '2026-01-30', 'Onboarding'),
+    ('New', '2025-06-01', '2026-01-30', 'Activated'),
+    ('Active', '2020-01-01', '2025-10-01', 'Dormant'),
+    ('Active', '2020-01-01', '2025-12-01', 'At-Risk'),
+    ('Active', '2020-01-01', '2026-01-30', 'Champion'),
+    ('Active', '2024-06-01', '2026-01-30', 'Loyal'),
+    ('Active', '2025-06-01', '2026-01-30', 'Growing'),
+]
+
+
+def _customers():
+    return pd.DataFrame({
+        'customer_uid': [f'CUST-{i}' for i in range(len(CASES))],
+        'status': [c[0] for c in CASES],
+        'created_date': [c[1] for c in CASES],
+        'last_activity_date': [c[2] for c in CASES],
+        'lifetime_value': 10000.0,
+    })
+
+
+def test_stage_rules_follow_first_match_order():
+    df = score_lifecycle(_customers(), np.random.default_rng(0))
+    assert df['lifecycle_stage'].tolist() == [c[3] for c in CASES]
+    assert df.loc[0, 'churn_risk_score'] == 1.0
+    assert df.loc[0, 'churn_risk_tier'] == 'High'
+
+
+def test_derived_columns_are_consistent():
+    df = score_lifecycle(_customers(), np.random.default_rng(0))
+    assert df.loc[0, 'tenure_days'] == 2223
+    assert df.loc[0, 'cohort_month'] == '2020-01'
+    assert df.loc[6, 'cohort_quarter'] == 'Q2 2024'
+    assert (df['last_order_date'] >= df['first_order_date']).all()
+    assert df['health_score'].between(0, 100).all()
+    assert (df['repeat_orders'] == df['total_orders'] - 1).all()
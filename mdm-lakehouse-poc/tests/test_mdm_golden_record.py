@@ -0,0 +1,84 @@
+"""
+Golden Record Tests
+====================
+Connected components and survivorship on small in-memory clusters in
+local Spark (plain DataFrames, no Delta).
+Run: pytest tests/test_mdm_golden_record.py -v
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines'))
+
+from mdm_golden_record import (  # noqa: E402
+    assign_clusters, build_golden_records, connected_components,
+)
+
+PAIR_COLUMNS = ['id_a', 'id_b', 'match_score', 'match_tier']
+CUSTOMER_COLUMNS = ['customer_id', 'source_id', '_source_system', '_ingestion_ts',
+                    'full_name', 'email', 'phone', 'country', 'city', 'street_address']
+
+# Columns the dim_customer model in src/pipelines/gold_dbt_models.sql reads from mdm_golden_records
+DIM_CUSTOMER_INPUTS = {'customer_uid', 'full_name', 'email', 'phone', 'country', 'city',
+                       'source_count', 'match_score', 'source_systems', 'created_date',
+                       'last_activity_date', 'primary_source_id'}
+
+
+def test_chain_converges_to_one_component(spark):
+    # A path whose smallest id sits in the middle: label propagation would need 7 rounds
+    chain = ['C05', 'C03', 'C08', 'C01', 'C07', 'C02', 'C06', 'C04']
+    edges = [(a, b) for a, b in zip(chain, chain[1:])] + [('C21', 'C20'), ('C20', 'C20')]
+    pairs = spark.createDataFrame(edges, ['id_a', 'id_b'])
+
+    components = {r['customer_id']: r['component_id'] for r in connected_components(pairs).collect()}
+    assert components == {**dict.fromkeys(chain, 'C01'), 'C20': 'C20', 'C21': 'C20'}
+
+
+def _customers(spark):
+    rows = [
+        # One cluster: SAP is oldest but highest priority; ECOMMERCE is newest but has no email
+        ('A1', 'SAP-1', 'SAP_ECC', datetime(2024, 1, 5), 'ACME Corporation', 'old@acme.com', None,
+         'US', None, None),
+        ('A2', 'SF-1', 'SALESFORCE', datetime(2024, 6, 1), 'Acme Corp', 'sales@acme.com', '555-0100',
+         'USA', 'Austin', '1 Main St'),
+        ('A3', 'EC-1', 'ECOMMERCE', datetime(2025, 2, 1), 'acme', None, '555-0199',
+         None, 'Dallas', None),
+        # Singleton
+        ('B1', 'ORA-9', 'ORACLE_CRM', datetime(2024, 3, 3), 'Beta LLC', 'b@beta.io', None,
+         'CA', 'Toronto', '9 King St'),
+    ]
+    return spark.createDataFrame(rows, CUSTOMER_COLUMNS)
+
+
+def test_survivorship_and_dim_customer_columns(spark):
+    customers = _customers(spark)
+    pairs = spark.createDataFrame([('A1', 'A2', 0.96, 'AUTO_MERGE'), ('A2', 'A3', 0.94, 'AUTO_MERGE'),
+                                   ('A1', 'B1', 0.80, 'REVIEW')], PAIR_COLUMNS)
+    crosswalk = assign_clusters(customers, pairs)
+    uids = {r['customer_id']: r['customer_uid'] for r in crosswalk.collect()}
+    assert uids['A1'] == uids['A2'] == uids['A3'] != uids['B1']
+
+    golden = build_golden_records(customers, crosswalk, pairs)
+    assert DIM_CUSTOMER_INPUTS <= set(golden.columns)
+    rows = {r['customer_uid']: r for r in golden.collect()}
+    assert len(rows) == 2
+
+    acme = rows[uids['A1']]
+    assert acme['full_name'] == 'ACME Corporation'      # source_priority: SAP_ECC first
+    assert acme['country'] == 'US'
+    assert acme['email'] == 'sales@acme.com'            # most_recent non-null
+    assert acme['phone'] == '555-0199'                  # most_recent
+    assert acme['city'] == 'Austin'                     # most_complete
+    assert acme['street_address'] == '1 Main St'
+    assert acme['primary_source_id'] == 'SAP-1'
+    assert acme['source_systems'] == 'ECOMMERCE+SALESFORCE+SAP_ECC'
+    assert acme['source_count'] == 3
+    assert acme['created_date'] == date(2024, 1, 5)
+    assert acme['last_activity_date'] == date(2025, 2, 1)
+    assert abs(acme['match_score'] - 0.95) < 1e-9
+
+    beta = rows[uids['B1']]
+    assert beta['source_count'] == 1 and beta['match_score'] is None
+    assert beta['full_name'] == 'Beta LLC'
@@ -0,0 +1,123 @@
+"""
+Orchestrator Tests
+===================
+The async agent loop and the DAG scheduler, against a local fake
+Anthropic messages endpoint (a threaded HTTP server, no API key).
+Run: pytest tests/test_orchestrator.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anthropic
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'agents'))
+
+import orchestrator  # noqa: E402
+from agent_loop import RateLimiter, run_agent_async  # noqa: E402
+
+RESPONSE_DELAY_S = 0.2
+
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+    """
+    POST /v1/messages: the first turn of a conversation asks for one
+    profile_data_source call, the turn after the tool result ends it.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        time.sleep(RESPONSE_DELAY_S)
+        task = body['messages'][0]['content']
+        if len(body['messages']) == 1:
+            content = [{'type': 'tool_use', 'id': f'toolu_{len(self.server.requests)}',
+                        'name': 'profile_data_source', 'input': {'source': 'sap', 'table': 'KNA1'}}]
+            stop_reason = 'tool_use'
+        else:
+            content = [{'type': 'text', 'text': f'done: {task.splitlines()[0]}'}]
+            stop_reason = 'end_turn'
+        out = json.dumps({
+            'id': 'msg_fake', 'type': 'message', 'role': 'assistant', 'model': body['model'],
+            'content': content, 'stop_reason': stop_reason, 'stop_sequence': None,
+            'usage': {'input_tokens': 10, 'output_tokens': 5},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeMessagesHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = anthropic.AsyncAnthropic(base_url=f'http://127.0.0.1:{server.server_port}',
+                                      api_key='test', max_retries=0)
+    yield server, client
+    server.shutdown()
+
+
+def test_run_agent_async_executes_tools_and_returns_text(fake_endpoint):
+    server, client = fake_endpoint
+    stats = {}
+    result = asyncio.run(run_agent_async('system', 'Profile KNA1', client=client, stats=stats))
+    assert result == 'done: Profile KNA1'
+    assert [t['tool'] for t in stats['tools']] == ['profile_data_source']
+    tool_result = server.requests[1]['messages'][-1]['content'][0]
+    assert tool_result['tool_use_id'] == 'toolu_1' and '"KNA1"' in tool_result['content']
+
+
+def test_dag_runs_independent_tasks_concurrently(fake_endpoint):
+    server, client = fake_endpoint
+    tasks = orchestrator.build_project_dag()
+    started = time.perf_counter()
+    timeline = asyncio.run(orchestrator.run_dag(tasks, concurrency=4, requests_per_minute=0, client=client))
+    elapsed = time.perf_counter() - started
+    by_name = {e['name']: e for e in timeline}
+
+    assert all(e['status'] == 'success' for e in timeline)
+    # Two API round trips per task; ETL ×4 → DQ ‖ MDM → dbt → DAG → docs is 5 waves
+    assert elapsed < 0.7 * len(tasks) * 2 * RESPONSE_DELAY_S
+    etl = [by_name[t.name] for t in tasks if t.agent == 'etl_generator']
+    assert max(e['start_s'] for e in etl) < min(e['end_s'] for e in etl)
+    assert by_name['mdm_matcher']['start_s'] < by_name['dq_engine']['end_s']
+    assert by_name['dbt_modeler']['start_s'] >= max(by_name['dq_engine']['end_s'], by_name['mdm_matcher']['end_s'])
+
+    dbt_prompt = next(r['messages'][0]['content'] for r in server.requests
+                      if r['messages'][0]['content'].startswith('Generate star schema'))
+    assert 'done: Create customer matching engine' in dbt_prompt
+
+
+def test_failed_task_skips_downstream():
+    async def runner(system_prompt, task, stats=None, **_):
+        if task.startswith('Create customer matching'):
+            raise RuntimeError('rate limited')
+        return 'ok'
+
+    timeline = asyncio.run(orchestrator.run_dag(orchestrator.build_project_dag(), runner=runner,
+                                                requests_per_minute=0))
+    status = {e['name']: e['status'] for e in timeline}
+    assert status['dq_engine'] == 'success' and status['mdm_matcher'] == 'failed'
+    assert [status[n] for n in ('dbt_modeler', 'dag_builder', 'doc_writer')] == ['skipped'] * 3
+
+
+def test_rate_limiter_spaces_requests():
+    async def burst():
+        limiter = RateLimiter(requests_per_minute=600)
+        started = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+        return time.perf_counter() - started
+
+    assert asyncio.run(burst()) >= 0.39
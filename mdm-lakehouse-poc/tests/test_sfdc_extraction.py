@@ -0,0 +1,195 @@
+"""
+Salesforce Extraction Tests
+============================
+Streaming Bulk 2.0 pages to Parquet parts and batched CDC objects on S3,
+against moto.
+Run: pytest tests/test_sfdc_extraction.py -v
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines'))
+
+moto = pytest.importorskip('moto')
+pytest.importorskip('simple_salesforce')
+import boto3  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from s3_writer import S3MultipartWriter  # noqa: E402
+import sfdc_extraction  # noqa: E402
+from sfdc_extraction import (  # noqa: E402
+    ACCOUNT_FIELDS, compact_cdc_hour, lambda_handler, parse_bulk_page, write_bulk_pages,
+)
+
+BUCKET = 'company-mdm-lakehouse-prod'
+MiB = 2**20
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        client = boto3.client('s3')
+        client.create_bucket(Bucket=BUCKET)
+        monkeypatch.setattr(sfdc_extraction, '_s3_client', None)
+        yield client
+
+
+def bulk_pages(n_pages, rows_per_page):
+    """CSV pages shaped like Bulk 2.0 query results."""
+    header = ','.join(f'"{f}"' for f in ACCOUNT_FIELDS)
+    for p in range(n_pages):
+        lines = [header]
+        for r in range(rows_per_page):
+            i = p * rows_per_page + r
+            values = [f'001{i:015d}', f'Account, {i}', 'US', 'Austin', f'{i} Main St\nSuite 1',
+                      '', 'example.com', 'Tech', str(i * 10), '', '005A', '2024-01-01', '2025-01-01']
+            lines.append(','.join('"' + v.replace('"', '""') + '"' if v else '' for v in values))
+        yield '\n'.join(lines) + '\n'
+
+
+def _objects(s3, prefix):
+    return sorted(o['Key'] for o in s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix).get('Contents', []))
+
+
+class TestMultipartWriter:
+    def test_small_object_single_put(self, s3):
+        with S3MultipartWriter(s3, BUCKET, 'small.bin') as w:
+            w.write(b'hello')
+        assert w._upload_id is None
+        assert s3.get_object(Bucket=BUCKET, Key='small.bin')['Body'].read() == b'hello'
+
+    def test_large_object_multipart(self, s3):
+        payload = os.urandom(12 * MiB)
+        with S3MultipartWriter(s3, BUCKET, 'large.bin', chunk_bytes=5 * MiB) as w:
+            for i in range(0, len(payload), MiB):
+                w.write(payload[i:i + MiB])
+        assert len(w._parts) == 3
+        assert s3.get_object(Bucket=BUCKET, Key='large.bin')['Body'].read() == payload
+
+    def test_error_aborts_upload(self, s3):
+        with pytest.raises(RuntimeError):
+            with S3MultipartWriter(s3, BUCKET, 'aborted.bin', chunk_bytes=5 * MiB) as w:
+                w.write(os.urandom(6 * MiB))
+                raise RuntimeError('boom')
+        assert _objects(s3, 'aborted') == []
+        assert not s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads')
+
+
+class TestWriteBulkPages:
+    def test_multiline_values_on_a_page_larger_than_one_block(self):
+        page = next(bulk_pages(1, 20_000))
+        assert len(page) > 2 * MiB                    # pyarrow's CSV block size is 1 MiB
+        table = parse_bulk_page(page, ACCOUNT_FIELDS)
+        assert table.num_rows == 20_000
+        assert table.column('BillingStreet')[19_999].as_py() == '19999 Main St\nSuite 1'
+
+    def test_pages_stream_into_parquet_parts(self, s3):
+        stats = write_bulk_pages(bulk_pages(6, 500), s3, BUCKET, 'bronze/sfdc/b1/', ACCOUNT_FIELDS,
+                                 'batch_test', target_bytes=1)
+        assert stats['records'] == 3000 and stats['pages'] == 6
+        # target_bytes=1 rolls after every page
+        assert _objects(s3, 'bronze/sfdc/b1/') == [f'bronze/sfdc/b1/part-{i:05d}.parquet' for i in range(6)]
+
+        table = pq.read_table(io.BytesIO(
+            s3.get_object(Bucket=BUCKET, Key='bronze/sfdc/b1/part-00001.parquet')['Body'].read()))
+        row = table.slice(0, 1).to_pylist()[0]
+        assert row['Id'] == '001000000000000500'
+        assert row['Name'] == 'Account, 500'
+        assert row['BillingStreet'] == '500 Main St\nSuite 1'
+        assert row['Phone'] is None
+        assert row['_batch_id'] == 'batch_test' and row['_source_system'] == 'SALESFORCE'
+
+    def test_pages_share_one_part_below_target(self, s3):
+        stats = write_bulk_pages(bulk_pages(4, 100), s3, BUCKET, 'bronze/sfdc/b2/', ACCOUNT_FIELDS, 'b')
+        assert [o['rows'] for o in stats['objects']] == [400]
+        meta = pq.read_metadata(io.BytesIO(
+            s3.get_object(Bucket=BUCKET, Key=stats['objects'][0]['key'])['Body'].read()))
+        assert meta.num_row_groups == 4
+
+    def test_no_results_writes_nothing(self, s3):
+        stats = write_bulk_pages(iter([]), s3, BUCKET, 'bronze/sfdc/b3/', ACCOUNT_FIELDS, 'b')
+        assert stats == {'records': 0, 'pages': 0, 'objects': []}
+        assert _objects(s3, 'bronze/sfdc/b3/') == []
+
+    def test_failing_page_leaves_no_objects(self, s3):
+        def pages():
+            yield from bulk_pages(3, 200)
+            raise ConnectionError('locator expired')
+
+        with pytest.raises(ConnectionError):
+            write_bulk_pages(pages(), s3, BUCKET, 'bronze/sfdc/b4/', ACCOUNT_FIELDS, 'b', target_bytes=1)
+        assert _objects(s3, 'bronze/sfdc/b4/') == []
+        assert not s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads')
+
+
+def change_event(record_ids, change_type='UPDATE', **fields):
+    return {
+        'detail-type': 'AccountChangeEvent',
+        'detail': {'payload': {
+            'ChangeEventHeader': {'entityName': 'Account', 'changeType': change_type,
+                                  'recordIds': record_ids, 'changedFields': list(fields),
+                                  'commitTimestamp': 1760000000000},
+            **fields,
+        }},
+    }
+
+
+def _read_jsonl(s3, key):
+    body = gzip.decompress(s3.get_object(Bucket=BUCKET, Key=key)['Body'].read())
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+class TestCDCHandler:
+    def test_multi_record_change_keeps_every_record(self, s3):
+        resp = lambda_handler(change_event(['001A', '001B'], Phone='555'), SimpleNamespace(aws_request_id='req-1'))
+        metrics = json.loads(resp['body'])
+        assert metrics['ChangeEvents'] == 1 and metrics['Records'] == 2 and metrics['Objects'] == 1
+
+        (key,) = _objects(s3, 'bronze/salesforce/cdc/')
+        assert key.endswith('_req-1.jsonl.gz')
+        rows = _read_jsonl(s3, key)
+        assert [r['record_id'] for r in rows] == ['001A', '001B']
+        assert rows[0]['changed_values'] == {'Phone': '555'}
+
+    def test_sqs_batch_is_one_object(self, s3):
+        batch = {'Records': [{'body': json.dumps(change_event([f'001{i}'], Name=f'N{i}'))} for i in range(25)]}
+        metrics = json.loads(lambda_handler(batch, SimpleNamespace(aws_request_id='req-2'))['body'])
+        assert metrics['ChangeEvents'] == 25 and metrics['Objects'] == 1
+        (key,) = _objects(s3, 'bronze/salesforce/cdc/')
+        assert len(_read_jsonl(s3, key)) == 25
+
+    def test_concurrent_invocations_do_not_overwrite(self, s3):
+        for request_id in ('req-a', 'req-b'):
+            lambda_handler(change_event(['001A']), SimpleNamespace(aws_request_id=request_id))
+        assert len(_objects(s3, 'bronze/salesforce/cdc/')) == 2
+
+    def test_client_reused_across_invocations(self, s3):
+        lambda_handler(change_event(['001A']), SimpleNamespace(aws_request_id='r1'))
+        client = sfdc_extraction._s3_client
+        lambda_handler(change_event(['001B']), SimpleNamespace(aws_request_id='r2'))
+        assert sfdc_extraction._s3_client is client
+
+    def test_empty_event_writes_nothing(self, s3):
+        metrics = json.loads(lambda_handler({'detail': {}}, None)['body'])
+        assert metrics['Objects'] == 0
+        assert _objects(s3, 'bronze/salesforce/cdc/') == []
+
+    def test_compact_hour_merges_objects_losslessly(self, s3):
+        for i in range(5):
+            lambda_handler(change_event([f'001{i}', f'002{i}']), SimpleNamespace(aws_request_id=f'r{i}'))
+        (hour_prefix,) = {k.rsplit('/', 1)[0] + '/' for k in _objects(s3, 'bronze/salesforce/cdc/')}
+
+        stats = compact_cdc_hour(s3, BUCKET, hour_prefix)
+        assert stats['objects_before'] == 5 and stats['objects_after'] == 1
+        (key,) = _objects(s3, hour_prefix)
+        assert '/compacted_' in key
+        assert sorted(r['record_id'] for r in _read_jsonl(s3, key)) == sorted(
+            f'{p}{i}' for i in range(5) for p in ('001', '002'))
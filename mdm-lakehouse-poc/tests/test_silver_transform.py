@@ -0,0 +1,39 @@
+"""
+Silver Transform Tests
+=======================
+Watermark advancement for incremental Silver loads: the watermark follows
+what was read from Bronze, not what the MERGE changed.
+Run: pytest tests/test_silver_transform.py -v
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines'))
+
+from silver_mappings import SILVER_COLUMNS  # noqa: E402
+from silver_transform import advance_watermarks, dedupe_latest, max_ingestion_ts  # noqa: E402
+
+JAN_1, JAN_2, JAN_3 = datetime(2026, 1, 1), datetime(2026, 1, 2), datetime(2026, 1, 3)
+
+
+def test_advance_keeps_sources_without_new_rows_and_never_goes_back():
+    watermarks = {'SAP_ECC': JAN_2, 'SALESFORCE': JAN_1}
+    assert advance_watermarks(watermarks, {'SAP_ECC': JAN_1, 'SALESFORCE': JAN_3, 'ECOMMERCE': JAN_2}) == \
+        {'SAP_ECC': JAN_2, 'SALESFORCE': JAN_3, 'ECOMMERCE': JAN_2}
+    assert advance_watermarks(watermarks, {}) == watermarks
+
+
+def test_unchanged_slice_still_moves_the_watermark(spark):
+    # Re-ingested copies of records Silver already holds: the MERGE would update nothing
+    record = ('0001', 'ACME', 'a@acme.com', '555', 'DE', 'BERLIN', 'MAIN ST 1')
+    slice_ = spark.createDataFrame(
+        [record + ('SAP_ECC', JAN_2), record + ('SAP_ECC', JAN_3)],
+        SILVER_COLUMNS + ['_source_system', '_ingestion_ts'])
+    updates = dedupe_latest(slice_)
+
+    assert updates.count() == 1
+    read = max_ingestion_ts(updates)
+    assert read == {'SAP_ECC': JAN_3}
+    assert advance_watermarks({'SAP_ECC': JAN_1}, read) == {'SAP_ECC': JAN_3}
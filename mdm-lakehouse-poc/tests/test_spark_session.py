@@ -0,0 +1,26 @@
+"""
+Spark Session Factory Tests
+=============================
+Shuffle partition sizing (no Spark session needed).
+Run: pytest tests/test_spark_session.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipelines'))
+
+from spark_session import (  # noqa: E402
+    DEFAULT_SHUFFLE_PARTITIONS, MAX_SHUFFLE_PARTITIONS, MIN_SHUFFLE_PARTITIONS,
+    TARGET_PARTITION_BYTES, shuffle_partitions_for,
+)
+
+
+def test_unknown_input_uses_default():
+    assert shuffle_partitions_for(0) == DEFAULT_SHUFFLE_PARTITIONS
+
+
+def test_partitions_scale_with_input_and_are_clamped():
+    assert shuffle_partitions_for(1024) == MIN_SHUFFLE_PARTITIONS
+    assert shuffle_partitions_for(100 * TARGET_PARTITION_BYTES + 1) == 101
+    assert shuffle_partitions_for(10**15) == MAX_SHUFFLE_PARTITIONS
@@ -0,0 +1,120 @@
+"""
+Tool Result Cache Tests
+========================
+Keys, TTL, LRU eviction and write invalidation of the on-disk cache for
+read-only agent tools.
+Run: pytest tests/test_tool_cache.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'agents'))
+
+from tool_cache import ToolResultCache, cache_key  # noqa: E402
+
+
+@pytest.fixture
+def counting_handlers():
+    calls = []
+
+    def handler(name):
+        def run(**tool_input):
+            calls.append(name)
+            return {'tool': name, 'input': tool_input, 'call': len(calls)}
+        return run
+
+    names = ['profile_data_source', 'query_database', 'delta_lake_operation', 'write_pipeline_code']
+    return {n: handler(n) for n in names}, calls
+
+
+def test_key_is_canonical():
+    assert cache_key('query_database', {'connection': 'oracle', 'sql': 'SELECT 1'}) == \
+        cache_key('query_database', {'sql': ' SELECT 1', 'max_rows': 1000, 'connection': 'oracle'})
+    assert cache_key('query_database', {'connection': 'oracle', 'sql': 'SELECT 1', 'max_rows': 10}) != \
+        cache_key('query_database', {'connection': 'oracle', 'sql': 'SELECT 1'})
+
+
+def test_read_only_calls_are_cached_and_writes_are_not(tmp_path, counting_handlers):
+    handlers, calls = counting_handlers
+    cached = ToolResultCache(str(tmp_path)).wrap(handlers)
+
+    first = cached['profile_data_source'](source='silver', table='customer_master')
+    assert cached['profile_data_source'](table='customer_master', source='silver') == first
+    cached['delta_lake_operation'](operation='describe', path='s3://lake/silver/customer_master')
+    cached['delta_lake_operation'](operation='describe', path='s3://lake/silver/customer_master')
+    cached['query_database'](connection='oracle', sql='DELETE FROM customers')
+    cached['query_database'](connection='oracle', sql='DELETE FROM customers')
+    cached['delta_lake_operation'](operation='read', path='s3://lake/silver/customer_master')
+    cached['delta_lake_operation'](operation='read', path='s3://lake/silver/customer_master')
+    assert calls == ['profile_data_source', 'delta_lake_operation'] + ['query_database'] * 2 \
+        + ['delta_lake_operation'] * 2
+
+
+def test_writes_invalidate_entries_on_the_same_target(tmp_path, counting_handlers):
+    handlers, calls = counting_handlers
+    cache = ToolResultCache(str(tmp_path))
+    cached = cache.wrap(handlers)
+
+    cached['profile_data_source'](source='silver', table='customer_master')
+    cached['query_database'](connection='snowflake', sql='SELECT * FROM gold.dim_product')
+    cached['delta_lake_operation'](operation='merge', path='s3://lake/silver/customer_master/')
+    cached['profile_data_source'](source='silver', table='customer_master')
+    cached['query_database'](connection='snowflake', sql='SELECT * FROM gold.dim_product')
+    assert calls.count('profile_data_source') == 2
+    assert calls.count('query_database') == 1
+
+    cached['write_pipeline_code'](filename='models/gold/dim_product.sql', content='select 1')
+    cached['query_database'](connection='snowflake', sql='SELECT * FROM gold.dim_product')
+    assert calls.count('query_database') == 2
+    assert cache.stats['invalidated'] == 2
+
+
+def test_ttl_and_lru_eviction(tmp_path, counting_handlers):
+    handlers, calls = counting_handlers
+    cache = ToolResultCache(str(tmp_path), tools={'profile_data_source': 60}, max_entries=2)
+    cached = cache.wrap(handlers)
+
+    for i, table in enumerate(['a', 'b']):
+        cached['profile_data_source'](source='s', table=table)
+        os.utime(cache._path(cache_key('profile_data_source', {'source': 's', 'table': table})),
+                 (time.time() - 100 + i, time.time() - 100 + i))
+    cached['profile_data_source'](source='s', table='a')           # hit → most recently used
+    cached['profile_data_source'](source='s', table='c')           # evicts b
+    assert cache.stats['evicted'] == 1
+    cached['profile_data_source'](source='s', table='b')
+    assert calls.count('profile_data_source') == 4
+
+    cache.tools['profile_data_source'] = 0                          # everything expired
+    cached['profile_data_source'](source='s', table='b')
+    assert calls.count('profile_data_source') == 5
+
+
+def test_read_in_flight_during_write_is_not_cached(tmp_path, counting_handlers):
+    handlers, calls = counting_handlers
+    read_started, release_read = threading.Event(), threading.Event()
+    profile = handlers['profile_data_source']
+
+    def slow_profile(**tool_input):
+        read_started.set()
+        release_read.wait(5)
+        return profile(**tool_input)
+
+    cache = ToolResultCache(str(tmp_path))
+    cached = cache.wrap({**handlers, 'profile_data_source': slow_profile})
+    reader = threading.Thread(target=cached['profile_data_source'],
+                              kwargs={'source': 'silver', 'table': 'customer_master'})
+    reader.start()
+    read_started.wait(5)
+    cached['delta_lake_operation'](operation='merge', path='s3://lake/silver/customer_master')
+    release_read.set()
+    reader.join(5)
+
+    assert cache.stats['stale_skipped'] == 1
+    cached['profile_data_source'](source='silver', table='customer_master')
+    assert calls.count('profile_data_source') == 2
+    assert cache._mtime(str(tmp_path / 'gone.json')) == 0.0
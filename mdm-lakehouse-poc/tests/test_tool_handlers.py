@@ -0,0 +1,73 @@
+"""
+Tool Handler Tests
+===================
+query_database against a local SQLite stand-in for the warehouse:
+pooled engines, row and byte limits, column-oriented results.
+Run: pytest tests/test_tool_handlers.py -v
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'agents'))
+
+import tool_handlers  # noqa: E402
+from tool_handlers import execute_database_query, get_engine  # noqa: E402
+
+N_ROWS = 5000
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    path = tmp_path / 'warehouse.db'
+    with sqlite3.connect(path) as db:
+        db.execute('CREATE TABLE dim_customer (customer_uid TEXT, name TEXT, lifetime_value REAL, notes TEXT)')
+        db.executemany('INSERT INTO dim_customer VALUES (?, ?, ?, ?)',
+                       [(f'CUST-{i:06d}', f'Customer {i}', i * 1.5, 'x' * (5000 if i == 0 else 10))
+                        for i in range(N_ROWS)])
+    monkeypatch.setenv('AGENT_DB_URL_SNOWFLAKE', f'sqlite:///{path}')
+    return path
+
+
+def test_rows_are_column_oriented_and_limited_at_the_cursor(warehouse):
+    result = execute_database_query('snowflake', 'SELECT customer_uid, lifetime_value FROM dim_customer '
+                                                 'ORDER BY customer_uid', max_rows=100)
+    assert result['columns'] == ['customer_uid', 'lifetime_value']
+    assert result['row_count'] == 100
+    assert result['data'][0][:2] == ['CUST-000000', 'CUST-000001']
+    assert result['data'][1][:2] == [0.0, 1.5]
+    assert result['truncated']['reason'] == 'max_rows'
+
+    small = execute_database_query('snowflake', 'SELECT COUNT(*) AS n FROM dim_customer')
+    assert small['data'] == [[N_ROWS]] and 'truncated' not in small
+
+
+def test_byte_cap_and_long_cells_are_marked(warehouse, monkeypatch):
+    monkeypatch.setattr(tool_handlers, 'MAX_RESULT_BYTES', 20_000)
+    result = execute_database_query('snowflake', 'SELECT * FROM dim_customer ORDER BY customer_uid',
+                                    max_rows=N_ROWS)
+    assert result['truncated']['reason'] == 'max_bytes'
+    assert 0 < result['row_count'] < N_ROWS
+    notes = result['data'][result['columns'].index('notes')]
+    assert notes[0].endswith('...[+3,000 chars]')
+    assert result['truncated']['cells_clipped_at_chars'] == tool_handlers.MAX_CELL_CHARS
+
+
+def test_engine_is_pooled_and_queries_are_read_only(warehouse):
+    assert get_engine('snowflake') is get_engine('snowflake')
+    with pytest.raises(ValueError, match='read-only'):
+        execute_database_query('snowflake', "DELETE FROM dim_customer WHERE customer_uid = 'CUST-000001'")
+    with pytest.raises(ValueError, match='read-only'):
+        execute_database_query('snowflake', 'DROP TABLE dim_customer')
+    # Passes the statement check but writes: refused by the connection
+    with pytest.raises((ValueError, DBAPIError)):
+        execute_database_query('snowflake', "WITH x AS (SELECT 1) DELETE FROM dim_customer")
+    count = execute_database_query('snowflake', 'SELECT COUNT(*) FROM dim_customer')
+    assert count['data'] == [[N_ROWS]]
+
+    with pytest.raises(ValueError, match='AGENT_DB_URL_ORACLE'):
+        execute_database_query('oracle', 'SELECT 1')